@@ -4,20 +4,22 @@ import discord
 from discord.ext import commands
 import logging
 import asyncio
+import math
 import sys
+import time
 
-# ---------------------------
-# Logging setup
-# ---------------------------
-logger = logging.getLogger("MerlinBot")
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s")
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-# Reduce noisy discord logs
-logging.getLogger("discord").setLevel(logging.WARNING)
+from pipeline import MessagePipeline
+from cooldowns import CooldownStore
+from user_resolver import UserResolver
+from xp_ledger import XPLedger
+from sharding import current_cluster, partition_path
+from ipc import IPCClient
+from gateway import GatewayMonitor, build_intents, build_member_cache
+from cog_loader import CogLoader
+import metrics
+from logs import setup_logging, stop_logging
+from metrics import COMMAND_ERRORS, COMMAND_SECONDS, LISTENER_SECONDS, MetricsExporter
+import database
 
 # -----------------------------
 # IMPORT CONFIG
@@ -27,12 +29,30 @@ try:
     PREFIX = getattr(config, "PREFIX", "!")
     OWNER_IDS = set(getattr(config, "OWNER_IDS", []))
     COGS = getattr(config, "COGS", [])
+    DEFERRED_COGS = getattr(config, "DEFERRED_COGS", [])
     BOT_TOKEN = getattr(config, "BOT_TOKEN", None)
-    logger.info("✅ Config imported successfully!")
 except ImportError as e:
-    logger.error(f"❌ Failed to import config: {e}")
+    print(f"❌ Failed to import config: {e}")
     sys.exit(1)
 
+# ---------------------------
+# Logging setup
+# ---------------------------
+CLUSTER = current_cluster()  # None unless started by launcher.py
+
+# Every logger goes through one queue; levels and sampling come from LOG_SETTINGS
+if CLUSTER:
+    LOG_FORMAT = f"[%(asctime)s] [cluster {CLUSTER.cluster_id}] [%(levelname)s] %(message)s"
+else:
+    LOG_FORMAT = "[%(asctime)s] [%(levelname)s] %(message)s"
+LOG_SETTINGS = dict(getattr(config, "LOG_SETTINGS", {"level": "INFO", "levels": {"discord": "WARNING"}}))
+if LOG_SETTINGS.get("file"):
+    LOG_SETTINGS["file"] = partition_path(LOG_SETTINGS["file"])
+setup_logging(LOG_SETTINGS, LOG_FORMAT)
+
+logger = logging.getLogger("MerlinBot")
+logger.info("✅ Config imported successfully!")
+
 # -----------------------------
 # IMPORT STORAGE
 # -----------------------------
@@ -45,46 +65,87 @@ except ImportError as e:
     logger.error(f"❌ Storage module not found: {e}")
     sys.exit(1)
 
-# -----------------------------
-# IMPORT LEVELING SYSTEM
-# -----------------------------
-try:
-    from discordLevelingSystem import DiscordLevelingSystem, errors as leveling_errors
-    LEVEL_SYSTEM = DiscordLevelingSystem(rate=1, per=60.0)
-except ImportError as e:
-    logger.error(f"❌ Failed to import leveling system: {e}")
-    LEVEL_SYSTEM = None
-    leveling_errors = None
-
 # -----------------------------
 # MERLIN BOT CLASS
 # -----------------------------
-class MerlinBot(commands.Bot):
+class MerlinBot(commands.AutoShardedBot):
     def __init__(self):
+        # Under launcher.py this process only runs its own shards
+        shard_options = {}
+        if CLUSTER:
+            shard_options = {"shard_ids": CLUSTER.shard_ids, "shard_count": CLUSTER.shard_count}
+        # Only ask Discord for what the loaded cogs use (see INTENT_PROFILE / COG_INTENTS)
+        intent_profile = getattr(config, "INTENT_PROFILE", "auto")
+        member_cache = getattr(config, "MEMBER_CACHE", "on_demand")
+        intents = build_intents(intent_profile, COGS, getattr(config, "COG_INTENTS", {}))
+        cache_flags, chunk_at_startup = build_member_cache(member_cache, intents)
         super().__init__(
             command_prefix=PREFIX,
-            intents=discord.Intents.all(),
+            intents=intents,
+            member_cache_flags=cache_flags,
+            chunk_guilds_at_startup=chunk_at_startup,
             help_command=None,
-            owner_ids=OWNER_IDS
+            owner_ids=OWNER_IDS,
+            **shard_options
         )
+        self.gateway_monitor = GatewayMonitor(
+            intent_profile, member_cache,
+            window=getattr(config, "GATEWAY_REPORT_SECONDS", 60),
+            report_file=partition_path("gateway_profile.json")
+        )
+        enabled = sorted(name for name, value in intents if value)
+        logger.info(f"📡 Intents ({intent_profile}): {', '.join(enabled)} • member cache: {member_cache}")
         self.storage = STORAGE
-        self.levelsystem = LEVEL_SYSTEM
+        self.cluster = CLUSTER
+        self.ipc = None
+        self.cog_loader = CogLoader(self, COGS, DEFERRED_COGS)
         self.user_data = {}
 
-    async def setup_hook(self):
+        # Every XP award (messages, !givexp, achievements) goes through this ledger
+        level_settings = getattr(config, "LEVEL_SETTINGS", {})
+        self.xp_ledger = XPLedger(flush_interval=level_settings.get("save_interval_seconds", 30))
+
+        # Shared by every cog through cooldowns.get_cooldowns(bot)
+        cooldown_settings = getattr(config, "COOLDOWN_SETTINGS", {})
+        self.cooldowns = CooldownStore(max_entries=cooldown_settings.get("max_entries", 50000))
+
+        # Cached, batched user ID -> display name lookups for embeds
+        resolver_settings = getattr(config, "USER_RESOLVER_SETTINGS", {})
+        self.user_resolver = UserResolver(
+            self,
+            ttl=resolver_settings.get("ttl_seconds", 3600),
+            max_entries=resolver_settings.get("max_entries", 10000),
+            max_concurrency=resolver_settings.get("max_concurrent_fetches", 5)
+        )
+
+        # Hot-path metrics (see METRICS_SETTINGS); disabled they cost one flag check
+        metrics_settings = getattr(config, "METRICS_SETTINGS", {})
+        metrics.configure(metrics_settings.get("enabled", True))
+        self.metrics = metrics.registry
+        self.metrics.collector("bot", self.collect_metrics)
+        self.metrics_exporter = None
+        export_file = metrics_settings.get("export_file")
+        export_port = metrics_settings.get("export_port")
+        if export_file or export_port:
+            if export_port and CLUSTER:
+                export_port += CLUSTER.cluster_id
+            self.metrics_exporter = MetricsExporter(
+                self.metrics,
+                path=partition_path(export_file) if export_file else None,
+                host=metrics_settings.get("export_host", "127.0.0.1"),
+                port=export_port,
+                interval=metrics_settings.get("export_interval_seconds", 15)
+            )
+
         # -----------------------------
-        # Connect leveling DB
+        # Message pipeline (cogs add their own stages in cog_load)
         # -----------------------------
-        if self.levelsystem:
-            loop = asyncio.get_running_loop()
-            try:
-                await loop.run_in_executor(None, self.levelsystem.connect_to_database_file, "./leveling.db")
-                logger.info("✅ Leveling system database connected")
-            except leveling_errors.ConnectionFailure:
-                logger.error("❌ Failed to connect to leveling database")
-            except Exception as e:
-                logger.error(f"❌ Leveling DB error: {e}")
+        self.pipeline = MessagePipeline(PREFIX)
+        self.pipeline.register("prefilter", self.prefilter_stage, MessagePipeline.PRE_FILTER)
+        self.pipeline.register("message_tracking", self.tracking_stage, MessagePipeline.XP)
+        self.pipeline.register("commands", self.command_stage, MessagePipeline.COMMANDS)
 
+    async def setup_hook(self):
         # -----------------------------
         # Load storage data
         # -----------------------------
@@ -95,20 +156,80 @@ class MerlinBot(commands.Bot):
             except Exception as e:
                 logger.error(f"❌ Failed to load storage data: {e}")
 
+        self.xp_ledger.start()
+
+        if self.metrics_exporter:
+            try:
+                await self.metrics_exporter.start()
+            except OSError as e:
+                logger.error(f"❌ Failed to start metrics export: {e}")
+
+        # -----------------------------
+        # Join the launcher's IPC hub (cross-cluster commands)
+        # -----------------------------
+        if self.cluster and self.cluster.ipc_port:
+            sharding_settings = getattr(config, "SHARDING", {})
+            self.ipc = IPCClient(self.cluster.cluster_id, sharding_settings.get("ipc_host", "127.0.0.1"), self.cluster.ipc_port)
+            self.ipc.handler("stats", self.ipc_stats)
+            self.ipc.start()
+
         # -----------------------------
-        # Load cogs
+        # Load cogs (concurrently; DEFERRED_COGS wait for their first command)
         # -----------------------------
         logger.info("🚀 Loading cogs...")
-        loaded = 0
-        for cog in COGS:
-            try:
-                # Pass storage to all cogs that accept it
-                await self.load_extension(cog)
-                logger.info(f"   ✅ {cog}")
-                loaded += 1
-            except Exception as e:
-                logger.error(f"   ❌ {cog}: {e}")
-        logger.info(f"📊 Loaded {loaded}/{len(COGS)} cogs")
+        await self.cog_loader.load_all()
+
+    async def add_cog(self, cog, **kwargs):
+        # Timed so the startup profile can split import time from setup time
+        started = time.perf_counter()
+        try:
+            await super().add_cog(cog, **kwargs)
+        finally:
+            self.cog_loader.record_setup(time.perf_counter() - started)
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        # Every listener (on_message, cog listeners, ...) is timed per event name
+        with LISTENER_SECONDS.time(event_name):
+            await super()._run_event(coro, event_name, *args, **kwargs)
+
+    async def invoke(self, ctx):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        name = ctx.command.qualified_name
+        with COMMAND_SECONDS.time(name):
+            await super().invoke(ctx)
+        if ctx.command_failed:
+            COMMAND_ERRORS.inc(name)
+
+    def collect_metrics(self):
+        """Stats the services already keep, read only when metrics are exported or shown"""
+        yield "messages_total", {}, self.pipeline.messages
+        yield "pipeline_short_circuits_total", {}, self.pipeline.short_circuits
+        for stage in self.pipeline.stages:
+            yield "pipeline_stage_errors_total", {"stage": stage.name}, stage.errors
+        yield "pipeline_background_errors_total", {}, self.pipeline.background_errors
+        yield "guilds", {}, len(self.guilds)
+        if not math.isnan(self.latency):
+            yield "gateway_latency_seconds", {}, self.latency
+        yield "gateway_report_events", {}, sum(self.gateway_monitor.events.values())
+        if self.storage:
+            for key, value in self.storage.get_flush_stats().items():
+                if key in ("mutations", "writes", "failed_writes", "writes_saved", "snapshot_reused", "snapshot_frozen"):
+                    yield f"storage_{key}_total", {}, value
+                else:
+                    yield f"storage_{key}", {}, value
+            if getattr(self.storage, "lazy", False):
+                for key, value in self.storage.get_guild_stats().items():
+                    suffix = "" if key.startswith("resident") else "_total"
+                    yield f"storage_guild_{key}{suffix}", {}, value
+        for key, value in self.xp_ledger.get_stats().items():
+            suffix = "" if key.startswith(("last_", "pending_")) else "_total"
+            yield f"xp_{key}{suffix}", {}, value
+        for key, value in self.cooldowns.stats.items():
+            yield f"cooldown_{key}_total", {}, value
+        yield "cooldown_entries", {}, len(self.cooldowns)
+        for key, value in self.user_resolver.stats.items():
+            yield f"user_resolver_{key}_total", {}, value
 
     async def on_ready(self):
         logger.info(f"🎉 {self.user} is online!")
@@ -121,43 +242,83 @@ class MerlinBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
 
-    async def on_message(self, message):
-        if message.author.bot:
-            return
+        asyncio.create_task(self.gateway_monitor.report_after_ready(self))
 
+    async def close(self):
         # -----------------------------
-        # Ensure storage profile exists
+        # Flush pending storage writes
         # -----------------------------
-        if self.storage and message.guild:
-            self.storage.get_user_profile(message.author.id, message.guild.id)
+        if self.storage:
+            try:
+                await self.storage.close()
+            except Exception as e:
+                logger.error(f"❌ Failed to flush storage on shutdown: {e}")
+        await self.xp_ledger.close()
+        if self.metrics_exporter:
+            await self.metrics_exporter.close()
+        if self.ipc:
+            await self.ipc.close()
+        await database.close_pools()
+        await super().close()
 
-        # -----------------------------
-        # Award leveling XP
-        # -----------------------------
-        if self.levelsystem:
+    def local_stats(self):
+        """Guild/member counts for this process's shards"""
+        return {
+            "cluster": self.cluster.cluster_id if self.cluster else 0,
+            "shards": sorted(self.shards),
+            "guilds": len(self.guilds),
+            "members": sum(guild.member_count or 0 for guild in self.guilds),
+            "latency_ms": None if math.isnan(self.latency) else round(self.latency * 1000)
+        }
+
+    async def ipc_stats(self, payload):
+        return self.local_stats()
+
+    async def cluster_stats(self):
+        """local_stats() from every cluster (just this one when not sharded or the hub is down)"""
+        if self.ipc and self.ipc.connected:
             try:
-                await self.levelsystem.award_xp(amount=[15, 25], message=message)
-            except leveling_errors.TableNotFound:
-                await self.levelsystem.create_database_file()
-                await self.levelsystem.award_xp(amount=[15, 25], message=message)
+                return await self.ipc.broadcast("stats")
             except Exception as e:
-                logger.error(f"❌ Failed to award XP: {e}")
+                logger.warning(f"⚠️ Cross-cluster stats failed, showing local only: {e}")
+        return [self.local_stats()]
 
-        # -----------------------------
-        # Track messages
-        # -----------------------------
-        if message.guild:
-            user_id = message.author.id
-            if user_id not in self.user_data:
-                joined_date = message.author.joined_at.isoformat() if message.author.joined_at else "Unknown"
-                self.user_data[user_id] = {
-                    "username": str(message.author),
-                    "joined_at": joined_date,
-                    "messages": 0
-                }
-            self.user_data[user_id]["messages"] += 1
-
-        await self.process_commands(message)
+    async def on_message(self, message):
+        await self.pipeline.process(message)
+
+    # -----------------------------
+    # Core pipeline stages
+    # -----------------------------
+    async def prefilter_stage(self, ctx):
+        if ctx.author.bot:
+            ctx.stop()
+            return
+
+        # Load the guild's data if it is not in memory (lazy_guilds), then ensure the profile exists
+        if self.storage and ctx.guild:
+            await self.storage.ensure_guild(ctx.guild.id)
+            self.storage.get_user_profile(ctx.author.id, ctx.guild.id)
+
+    async def tracking_stage(self, ctx):
+        if not ctx.guild:
+            return
+        user_id = ctx.author.id
+        if user_id not in self.user_data:
+            joined_date = ctx.author.joined_at.isoformat() if ctx.author.joined_at else "Unknown"
+            self.user_data[user_id] = {
+                "username": str(ctx.author),
+                "joined_at": joined_date,
+                "messages": 0
+            }
+        self.user_data[user_id]["messages"] += 1
+
+    async def command_stage(self, ctx):
+        # First use of a deferred cog's command loads the cog before dispatching
+        if ctx.is_command and self.cog_loader.deferred_commands:
+            invoked = ctx.content[len(PREFIX):].split(maxsplit=1)
+            if invoked and self.get_command(invoked[0]) is None:
+                await self.cog_loader.load_for_command(invoked[0])
+        await self.process_commands(ctx.message)
 
 # -----------------------------
 # MAIN FUNCTION
@@ -173,9 +334,8 @@ async def main():
 
     bot = MerlinBot()
 
-    # Inject storage and leveling system into cogs
+    # Inject storage into cogs
     bot.storage = STORAGE
-    bot.levelsystem = LEVEL_SYSTEM
 
     try:
         await bot.start(BOT_TOKEN)
@@ -185,6 +345,10 @@ async def main():
         logger.error("\n🛑 Bot stopped by user")
     except Exception as e:
         logger.error(f"❌ Unexpected error: {e}")
+    finally:
+        if not bot.is_closed():
+            await bot.close()
+        stop_logging()
 
 # -----------------------------
 # ENTRY POINT
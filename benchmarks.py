@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for Merlin's hot paths (no Discord connection needed).
+
+Usage: python benchmarks.py [name ...]   - runs every benchmark by default
+"""
+import random
+import sys
+import time
+
+
+def timed(func, repeat=1):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+# -----------------------------
+# LEADERBOARD RANK
+# -----------------------------
+def bench_rank(sizes=(10_000, 100_000, 1_000_000)):
+    """!rank / !leaderboard: full sort per command vs RankIndex"""
+    from leaderboard import RankIndex
+
+    print("== rank lookup ==")
+    print(f"{'members':>10} {'sorted rank':>14} {'index rank':>12} {'index top10':>12} {'index update':>13}")
+    for size in sizes:
+        rng = random.Random(size)
+        server_data = {str(i): {'xp': rng.randint(0, 500_000)} for i in range(size)}
+        target = str(rng.randrange(size))
+
+        def sorted_rank():
+            ranked = sorted(server_data.items(), key=lambda x: x[1]['xp'], reverse=True)
+            return next(i + 1 for i, (uid, _) in enumerate(ranked) if uid == target)
+
+        index = RankIndex((uid, data['xp']) for uid, data in server_data.items())
+        keys = list(server_data)
+
+        def update():
+            index.update(rng.choice(keys), rng.randint(0, 500_000))
+
+        baseline = timed(sorted_rank, repeat=3 if size < 1_000_000 else 1)
+        print(f"{size:>10,} {fmt(baseline):>14} {fmt(timed(lambda: index.rank(target), 10_000)):>12} "
+              f"{fmt(timed(lambda: index.top(10), 10_000)):>12} {fmt(timed(update, 10_000)):>13}")
+
+
+# -----------------------------
+# NAME TROLL DETECTION
+# -----------------------------
+def bench_nametroll(lengths=(100, 1_000, 2_000)):
+    """NameTroll: regex per variant per message vs one precompiled alternation"""
+    import re
+    from cogs.name_troll import NameTroll
+
+    cog = NameTroll(bot=None)
+    rng = random.Random(0)
+    words = ["hello", "there", "general", "kenobi", "standoff", "gold", "skins", "lobby", "ranked", "gg"]
+
+    def old_detect(content):
+        for name, variants in cog.name_variants.items():
+            for variant in variants:
+                if re.search(rf"\b{re.escape(variant)}\b", content):
+                    return name
+        return None
+
+    print("== name detection ==")
+    print(f"{'chars':>8} {'hit':>5} {'old loop':>12} {'compiled':>12}")
+    for length in lengths:
+        text = ""
+        while len(text) < length:
+            text += rng.choice(words) + " "
+        for label, content in (("no", text), ("yes", text + "kartik")):
+            assert old_detect(content) == cog.detect_name(content)[0]
+            old = timed(lambda: old_detect(content), 200)
+            new = timed(lambda: cog.detect_name(content), 200)
+            print(f"{length:>8,} {label:>5} {fmt(old):>12} {fmt(new):>12}")
+
+
+# -----------------------------
+# LEVEL MATH
+# -----------------------------
+def bench_levels(size=100_000):
+    """XP -> level: ProfileSystem's old while loop vs LevelCurve lookups"""
+    from level_curve import LevelCurve
+
+    def old_profile_level(total_xp, base_xp=100, multiplier=1.5):
+        level, required_xp = 0, 0
+        while total_xp >= required_xp:
+            level += 1
+            required_xp = base_xp * (multiplier ** (level - 1))
+        return level - 1
+
+    rng = random.Random(size)
+    xps = [rng.randint(0, 5_000_000) for _ in range(size)]
+    curve = LevelCurve("exponential")
+
+    print("== level math ==")
+    print(f"{'users':>10} {'while loop':>12} {'bisect':>12} {'batch':>12}")
+    old = timed(lambda: [old_profile_level(xp) for xp in xps])
+    single = timed(lambda: [curve.level_for(xp) for xp in xps])
+    batch = timed(lambda: curve.levels_for(xps))
+    print(f"{size:>10,} {fmt(old):>12} {fmt(single):>12} {fmt(batch):>12}")
+
+
+# -----------------------------
+# METRICS OVERHEAD
+# -----------------------------
+def bench_metrics(calls=200_000):
+    """Cost per instrumented call with metrics disabled and enabled"""
+    import metrics
+
+    histogram = metrics.STAGE_SECONDS
+    was_enabled = metrics.registry.enabled
+
+    def observe():
+        for _ in range(calls):
+            histogram.observe(0.003, "bench")
+
+    def timer():
+        for _ in range(calls):
+            with histogram.time("bench"):
+                pass
+
+    print("== metrics overhead (per call) ==")
+    print(f"{'':>10} {'observe':>12} {'timer':>12}")
+    for label, enabled in (("disabled", False), ("enabled", True)):
+        metrics.configure(enabled)
+        print(f"{label:>10} {fmt(timed(observe) / calls):>12} {fmt(timed(timer) / calls):>12}")
+    metrics.configure(was_enabled)
+    metrics.registry.reset()
+
+
+# -----------------------------
+# LOGGING
+# -----------------------------
+def bench_logging(calls=20_000):
+    """Per-message debug output: f-string print vs level-gated lazy logging vs queued INFO"""
+    import logging
+    import os
+    import logs
+    from contextlib import redirect_stdout
+
+    author, channel, xp = "someone#1234", "general", 21
+    logger = logging.getLogger("bench.logging")
+
+    def printed():
+        # Line-buffered like a console: one write per message
+        with open(os.devnull, 'w', buffering=1) as sink, redirect_stdout(sink):
+            for _ in range(calls):
+                print(f"🎯 DEBUG - {author} gained {xp} XP in #{channel}")
+
+    def gated():
+        for _ in range(calls):
+            logger.debug("🎯 %s gained %d XP in #%s", author, xp, channel)
+
+    def queued():
+        for _ in range(calls):
+            logger.info("🎯 %s gained %d XP in #%s", author, xp, channel)
+
+    listener = logs.setup_logging({"level": "INFO"})
+    listener.handlers = (logging.NullHandler(),)
+    print("== per-message logging (per call) ==")
+    print(f"{'print':>12} {'debug off':>12} {'queued info':>12} {'sampled 1/100':>14}")
+    results = [timed(printed), timed(gated), timed(queued)]
+    logs.set_sampling("bench.logging", 100)
+    results.append(timed(queued))
+    logs.set_sampling("bench.logging", 1)
+    logs.stop_logging()
+    print(" ".join(f"{fmt(seconds / calls):>12}" for seconds in results[:3]) + f" {fmt(results[3] / calls):>14}")
+
+
+# -----------------------------
+# PER-USER MEMORY
+# -----------------------------
+def bench_records(users=100_000, guilds=10):
+    """DataStorage memory: plain dicts with ISO strings vs slotted records with interned keys"""
+    import gc
+    import json
+    import tracemalloc
+    from datetime import datetime, timedelta
+    from records import from_json_section, to_json
+
+    rng = random.Random(users)
+    start = datetime(2024, 1, 1)
+
+    def stamp():
+        return (start + timedelta(seconds=rng.randrange(50_000_000), microseconds=rng.randrange(1_000_000))).isoformat()
+
+    def build_json():
+        """The bot_data.json layout, as json.load returns it"""
+        sections = {name: {} for name in ("user_profiles", "marriages", "warnings", "achievements")}
+        for i in range(users):
+            server_key, user_key = str(1_000_000 + i % guilds), str(10 ** 17 + i)
+            sections["user_profiles"].setdefault(server_key, {})[user_key] = {
+                'bio': 'No bio set yet...', 'title': 'Newcomer', 'color': None, 'banner': 'assassin',
+                'badges': [], 'profile_views': rng.randrange(50), 'created_at': stamp(), 'last_updated': stamp()
+            }
+            sections["achievements"].setdefault(server_key, {})[user_key] = [
+                {'id': achievement, 'name': achievement.title(), 'description': 'Unlocked', 'icon': '🏆',
+                 'unlocked_at': stamp(), 'rarity': 'common'}
+                for achievement in ("first_message", "chatterbox")
+            ]
+            if i % 5 == 0:
+                sections["warnings"].setdefault(server_key, {})[user_key] = [{'reason': 'spam', 'timestamp': stamp()}]
+            if i % 4 == 0:
+                sections["marriages"].setdefault(server_key, {})[user_key] = {
+                    'partner': 10 ** 17 + i + 1, 'married_at': stamp(), 'partner_name': f"User_{10 ** 17 + i + 1}"
+                }
+        return json.loads(json.dumps(sections))  # fresh strings, like a real load
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        data = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return data, size
+
+    raw = build_json()
+    text = json.dumps(raw)
+    dicts, dict_bytes = measure(lambda: json.loads(text))
+    compact, record_bytes = measure(lambda: {name: from_json_section(name, servers) for name, servers in json.loads(text).items()})
+    assert json.loads(json.dumps(compact, default=to_json)) == raw
+
+    print("== per-user memory ==")
+    print(f"{'users':>10} {'dicts':>12} {'records':>12} {'saved':>8}")
+    print(f"{users:>10,} {dict_bytes / 2**20:>9.1f} MB {record_bytes / 2**20:>9.1f} MB {1 - record_bytes / dict_bytes:>7.0%}")
+    del dicts, compact
+
+
+# -----------------------------
+# STORAGE JOURNAL
+# -----------------------------
+def bench_journal(users=100_000, guilds=10, flushes=50, per_flush=20):
+    """Flush cost (full bot_data.json rewrite vs journal append) and journal recovery time"""
+    import asyncio
+    import os
+    import tempfile
+    from storage import SECTIONS, JournalBackend, JsonBackend
+    from records import Profile, from_json_section
+
+    rng = random.Random(users)
+    raw = {section: {} for section in SECTIONS}
+    for i in range(users):
+        raw["user_profiles"].setdefault(str(1_000_000 + i % guilds), {})[str(10 ** 17 + i)] = Profile().to_dict()
+        raw["reputation"].setdefault(str(1_000_000 + i % guilds), {})[str(10 ** 17 + i)] = rng.randrange(100)
+    sections = {section: from_json_section(section, servers) for section, servers in raw.items()}
+    keys = [(server_key, user_key) for server_key, users_ in sections["reputation"].items() for user_key in users_]
+
+    def mutate():
+        dirty = set()
+        for server_key, user_key in rng.sample(keys, per_flush):
+            sections["reputation"][server_key][user_key] += 1
+            dirty.add(("reputation", server_key, user_key))
+        return dirty
+
+    async def run(directory):
+        path = os.path.join(directory, "bot_data.json")
+        json_backend = JsonBackend(path)
+        journal = JournalBackend(path, compact_records=10 ** 9, compact_bytes=2 ** 62)
+
+        rewrites = max(1, flushes // 10)  # seconds each at this size
+        started = time.perf_counter()
+        for _ in range(rewrites):
+            await json_backend.write(sections, mutate())
+        rewrite = (time.perf_counter() - started) / rewrites
+
+        await journal.compact(sections)
+        started = time.perf_counter()
+        for _ in range(flushes):
+            await journal.write(sections, mutate())
+        append = (time.perf_counter() - started) / flushes
+        await journal.close()
+
+        print("== storage journal ==")
+        print(f"{'users':>10} {'json rewrite':>14} {'journal append':>15} {'records/s':>10}")
+        print(f"{users:>10,} {fmt(rewrite):>14} {fmt(append):>15} {per_flush / append:>10,.0f}")
+
+        print(f"{'journal lines':>14} {'recovery':>12}")
+        for lines in (0, 10_000, 100_000):
+            journal = JournalBackend(path, compact_records=10 ** 9, compact_bytes=2 ** 62)
+            await journal.compact(sections)
+            batch = set()
+            for _ in range(lines):
+                server_key, user_key = rng.choice(keys)
+                batch.add(("reputation", server_key, user_key))
+                if len(batch) >= 1000:
+                    await journal.write(sections, batch)
+                    batch = set()
+            if batch:
+                await journal.write(sections, batch)
+            await journal.close()
+            recovery = timed(lambda: JournalBackend(path).read())
+            print(f"{journal.journal_records:>14,} {fmt(recovery):>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+# -----------------------------
+# PER-GUILD SHARD FILES
+# -----------------------------
+def bench_sharded(users=100_000, guilds=1_000):
+    """One guild's change: full bot_data.json rewrite vs rewriting that guild's file; concurrent load"""
+    import asyncio
+    import os
+    import tempfile
+    from storage import SECTIONS, JsonBackend, ShardedJsonBackend
+    from records import Profile, from_json_section
+
+    rng = random.Random(users)
+    raw = {section: {} for section in SECTIONS}
+    for i in range(users):
+        server_key, user_key = str(1_000_000 + i % guilds), str(10 ** 17 + i)
+        raw["user_profiles"].setdefault(server_key, {})[user_key] = Profile().to_dict()
+        raw["reputation"].setdefault(server_key, {})[user_key] = rng.randrange(100)
+    sections = {section: from_json_section(section, servers) for section, servers in raw.items()}
+    server_key = next(iter(sections["reputation"]))
+    user_key = next(iter(sections["reputation"][server_key]))
+    dirty = {("reputation", server_key, user_key)}
+
+    async def run(directory):
+        json_backend = JsonBackend(os.path.join(directory, "bot_data.json"))
+        sharded = ShardedJsonBackend(os.path.join(directory, "bot_data.guilds"))
+        await sharded.write(sections, {(section, key, None) for section in ("user_profiles", "reputation") for key in sections[section]})
+
+        started = time.perf_counter()
+        await json_backend.write(sections, dirty)
+        rewrite = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(100):
+            await sharded.write(sections, dirty)
+        shard_write = (time.perf_counter() - started) / 100
+
+        started = time.perf_counter()
+        await json_backend.load()
+        json_load = time.perf_counter() - started
+        started = time.perf_counter()
+        await ShardedJsonBackend(sharded.directory).load()
+        shard_load = time.perf_counter() - started
+
+        print("== per-guild shard files ==")
+        print(f"{'users':>10} {'guilds':>7} {'json write':>11} {'guild write':>12} {'json load':>10} {'shard load':>11}")
+        print(f"{users:>10,} {guilds:>7,} {fmt(rewrite):>11} {fmt(shard_write):>12} {fmt(json_load):>10} {fmt(shard_load):>11}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+# -----------------------------
+# OFF-LOOP SNAPSHOTS
+# -----------------------------
+def bench_snapshot(users=100_000, guilds=100, flushes=5):
+    """Longest event-loop stall during a full bot_data.json write: json.dumps on the loop vs SnapshotCache"""
+    import asyncio
+    import json
+    import os
+    import tempfile
+    from storage import SECTIONS, JsonBackend
+    from records import Profile, from_json_section, to_json
+
+    rng = random.Random(users)
+    raw = {section: {} for section in SECTIONS}
+    for i in range(users):
+        server_key, user_key = str(1_000_000 + i % guilds), str(10 ** 17 + i)
+        raw["user_profiles"].setdefault(server_key, {})[user_key] = Profile().to_dict()
+        raw["reputation"].setdefault(server_key, {})[user_key] = rng.randrange(100)
+    keys = [(server_key, user_key) for server_key, users_ in raw["reputation"].items() for user_key in users_]
+
+    async def max_stall(write):
+        """Run write() while a 1 ms ticker measures the longest gap between its ticks"""
+        stalls = []
+        done = False
+
+        async def ticker():
+            last = time.perf_counter()
+            while not done:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                stalls.append(now - last)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        await write()
+        elapsed = time.perf_counter() - started
+        done = True
+        await task
+        return max(stalls), elapsed
+
+    async def run(directory):
+        path = os.path.join(directory, "bot_data.json")
+        with open(path, 'w') as f:
+            json.dump(raw, f, indent=2)
+        backend = JsonBackend(path)
+        sections = {section: from_json_section(section, servers) for section, servers in (await backend.load()).items()}
+
+        def mutate():
+            server_key, user_key = rng.choice(keys)
+            sections["reputation"][server_key][user_key] += 1
+            return {("reputation", server_key, user_key)}
+
+        async def on_loop():
+            # What JsonBackend.write did before: serialize on the loop, then write
+            with open(path, 'w') as f:
+                f.write(json.dumps(sections, indent=2, default=to_json))
+
+        old_stall, old_time = 0.0, 0.0
+        new_stall, new_time = 0.0, 0.0
+        for _ in range(flushes):
+            dirty = mutate()
+            stall, elapsed = await max_stall(on_loop)
+            old_stall, old_time = max(old_stall, stall), old_time + elapsed / flushes
+            dirty |= mutate()
+            stall, elapsed = await max_stall(lambda: backend.write(sections, dirty))
+            new_stall, new_time = max(new_stall, stall), new_time + elapsed / flushes
+
+        with open(path) as f:
+            assert json.load(f) == json.loads(json.dumps(sections, default=to_json))
+
+        print("== off-loop snapshots ==")
+        print(f"{'users':>10} {'guilds':>7} {'':>14} {'write':>10} {'max loop stall':>15}")
+        print(f"{users:>10,} {guilds:>7,} {'dumps on loop':>14} {fmt(old_time):>10} {fmt(old_stall):>15}")
+        print(f"{'':>10} {'':>7} {'snapshot cache':>14} {fmt(new_time):>10} {fmt(new_stall):>15}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+# -----------------------------
+# SNAPSHOT FORMATS
+# -----------------------------
+def bench_snapformat(sizes=(10_000, 100_000), guilds=100):
+    """Full save, streaming load and file size: pretty bot_data.json vs compact bot_data.snap variants"""
+    import asyncio
+    import os
+    import tempfile
+    from storage import SECTIONS, JsonBackend, SnapshotBackend, orjson, zstandard
+    from records import Achievement, Profile, from_json_section
+
+    variants = [("json (indent=2)", None, None)]
+    codecs = ["orjson", "json"] if orjson is not None else ["json"]
+    for codec in codecs:
+        for compression in (None, "gzip", "zstd"):
+            if compression == "zstd" and zstandard is None:
+                continue
+            variants.append((f"snap {codec}{'+' + compression if compression else ''}", codec, compression))
+
+    async def load_json(backend):
+        data = await backend.load()
+        return {section: from_json_section(section, data.get(section, {})) for section in SECTIONS}
+
+    async def load_snapshot(backend):
+        return {section: servers async for section, servers in backend.load_sections()}
+
+    async def run(directory, users):
+        rng = random.Random(users)
+        raw = {section: {} for section in SECTIONS}
+        for i in range(users):
+            server_key, user_key = str(1_000_000 + i % guilds), str(10 ** 17 + i)
+            raw["user_profiles"].setdefault(server_key, {})[user_key] = Profile(profile_views=rng.randrange(50)).to_dict()
+            raw["achievements"].setdefault(server_key, {})[user_key] = [
+                Achievement(id="first_message", name="First Message").to_dict()]
+            raw["reputation"].setdefault(server_key, {})[user_key] = rng.randrange(100)
+        sections = {section: from_json_section(section, servers) for section, servers in raw.items()}
+        dirty = {(section, server_key, None) for section, servers in sections.items() for server_key in servers}
+
+        for label, codec, compression in variants:
+            if codec is None:
+                backend = JsonBackend(os.path.join(directory, "bot_data.json"))
+                path, load = backend.path, load_json
+            else:
+                backend = SnapshotBackend(os.path.join(directory, "bot_data.snap"), codec=codec, compression=compression)
+                path, load = backend.path, load_snapshot
+            started = time.perf_counter()
+            await backend.write(sections, dirty)  # cold cache: every guild is serialized
+            save = time.perf_counter() - started
+            started = time.perf_counter()
+            await load(type(backend)(path) if codec is None else SnapshotBackend(path))
+            loaded = time.perf_counter() - started
+            print(f"{users:>10,} {label:>20} {fmt(save):>10} {fmt(loaded):>10} {os.path.getsize(path) / 2**20:>8.1f} MB")
+            os.remove(path)
+
+    print("== snapshot formats ==")
+    print(f"{'users':>10} {'format':>20} {'save':>10} {'load':>10} {'size':>11}")
+    for users in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(directory, users))
+
+
+# -----------------------------
+# LAZY GUILD HYDRATION
+# -----------------------------
+def bench_lazy(users=100_000, guilds=1_000, active=50):
+    """Startup time and memory: every guild loaded vs lazy_guilds with a small active set; miss/hit cost"""
+    import asyncio
+    import gc
+    import os
+    import tempfile
+    import tracemalloc
+    import storage
+    from storage import SECTIONS, DataStorage, ShardedJsonBackend
+    from records import Profile, from_json_section
+
+    rng = random.Random(users)
+    raw = {section: {} for section in SECTIONS}
+    for i in range(users):
+        server_key, user_key = str(1_000_000 + i % guilds), str(10 ** 17 + i)
+        raw["user_profiles"].setdefault(server_key, {})[user_key] = Profile().to_dict()
+        raw["reputation"].setdefault(server_key, {})[user_key] = rng.randrange(100)
+    sections = {section: from_json_section(section, servers) for section, servers in raw.items()}
+    guild_ids = [int(key) for key in sections["user_profiles"]]
+
+    async def start(directory, lazy, trace):
+        """Timings, or (with trace) the memory held after startup and the active guilds' first use"""
+        storage.Config.STORAGE_SETTINGS = dict(settings, lazy_guilds=lazy)
+        DataStorage._instance = None
+        data = DataStorage()
+        data.backend = ShardedJsonBackend(directory)
+        data.lazy = lazy
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        await data.load_data_async()
+        startup = time.perf_counter() - started
+        misses = []
+        for guild_id in rng.sample(guild_ids, active):
+            started = time.perf_counter()
+            await data.ensure_guild(guild_id)
+            misses.append(time.perf_counter() - started)
+        memory = 0
+        if trace:
+            gc.collect()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+        hit = timed(lambda: data.get_user_profile(1, guild_ids[0]), 10_000)
+        await data.close()
+        return startup, memory, sum(misses) / len(misses), hit
+
+    async def run(directory):
+        await ShardedJsonBackend(directory).write(
+            sections, {(section, key, None) for section, servers in sections.items() for key in servers})
+        print("== lazy guild hydration ==")
+        print(f"{'users':>10} {'guilds':>7} {'mode':>14} {'startup':>10} {'memory':>10} {'miss':>10} {'accessor':>10}")
+        for lazy in (False, True):
+            startup, _, miss, hit = await start(directory, lazy, trace=False)
+            memory = (await start(directory, lazy, trace=True))[1]
+            mode = f"lazy ({active} used)" if lazy else "load all"
+            print(f"{users:>10,} {guilds:>7,} {mode:>14} {fmt(startup):>10} {memory / 2**20:>7.1f} MB "
+                  f"{fmt(miss) if lazy else '-':>10} {fmt(hit):>10}")
+
+    settings = storage.Config.STORAGE_SETTINGS
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(os.path.join(directory, "bot_data.guilds")))
+    finally:
+        storage.Config.STORAGE_SETTINGS = settings
+        DataStorage._instance = None
+
+
+BENCHMARKS = {
+    "rank": bench_rank,
+    "nametroll": bench_nametroll,
+    "levels": bench_levels,
+    "metrics": bench_metrics,
+    "logging": bench_logging,
+    "records": bench_records,
+    "journal": bench_journal,
+    "sharded": bench_sharded,
+    "snapshot": bench_snapshot,
+    "snapformat": bench_snapformat,
+    "lazy": bench_lazy,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
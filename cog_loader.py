@@ -0,0 +1,143 @@
+# cog_loader.py - Concurrent cog loading, deferred cogs and the startup profile
+import ast
+import asyncio
+import contextvars
+import importlib.util
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("MerlinBot")
+
+# Which extension is being loaded in the current task (so add_cog time lands on the right cog)
+current_extension: contextvars.ContextVar = contextvars.ContextVar("current_extension", default=None)
+
+
+class CogProfile:
+    def __init__(self, name: str, deferred: bool):
+        self.name = name
+        self.deferred = deferred
+        self.loaded = False
+        self.error: Optional[str] = None
+        self.total_seconds = 0.0
+        self.setup_seconds = 0.0  # add_cog + cog_load
+
+    @property
+    def import_seconds(self) -> float:
+        """Module import and everything in setup() before add_cog"""
+        return max(0.0, self.total_seconds - self.setup_seconds)
+
+
+def command_names(extension: str) -> List[str]:
+    """Command names/aliases declared in an extension, read from its source without importing it"""
+    spec = importlib.util.find_spec(extension)
+    if spec is None or not spec.origin:
+        return []
+    with open(spec.origin, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    names = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if not isinstance(decorator, ast.Call):
+                continue
+            func = decorator.func
+            if not (isinstance(func, ast.Attribute) and func.attr in ("command", "group")):
+                continue
+            name = node.name
+            for keyword in decorator.keywords:
+                if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                    name = keyword.value.value
+                elif keyword.arg == "aliases" and isinstance(keyword.value, (ast.List, ast.Tuple)):
+                    names.extend(alias.value for alias in keyword.value.elts if isinstance(alias, ast.Constant))
+            names.append(name)
+    return names
+
+
+class CogLoader:
+    """Loads independent cogs concurrently and holds deferred ones back until one of their commands is used"""
+
+    def __init__(self, bot, cogs: Iterable[str], deferred: Iterable[str] = ()):
+        self.bot = bot
+        self.cogs = list(cogs)
+        deferred = set(deferred)
+        self.profiles: Dict[str, CogProfile] = {name: CogProfile(name, name in deferred) for name in self.cogs}
+        self.deferred_commands: Dict[str, str] = {}  # command name -> deferred extension
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.started = time.perf_counter()
+        self.startup_seconds = 0.0
+
+    async def _load(self, name: str) -> bool:
+        profile = self.profiles[name]
+        token = current_extension.set(name)
+        started = time.perf_counter()
+        try:
+            await self.bot.load_extension(name)
+            profile.loaded = True
+            profile.error = None
+        except Exception as e:
+            profile.error = str(e)
+            logger.error(f"   ❌ {name}: {e}")
+        finally:
+            profile.total_seconds = time.perf_counter() - started
+            current_extension.reset(token)
+        if profile.loaded:
+            logger.info(f"   ✅ {name} ({profile.total_seconds * 1000:.0f} ms)")
+        return profile.loaded
+
+    async def load_all(self):
+        """Load every non-deferred cog at once; index the commands of the deferred ones"""
+        eager = [name for name in self.cogs if not self.profiles[name].deferred]
+        results = await asyncio.gather(*(self._load(name) for name in eager))
+
+        for name in self.cogs:
+            if not self.profiles[name].deferred:
+                continue
+            try:
+                for command in command_names(name):
+                    self.deferred_commands[command] = name
+                logger.info(f"   ⏸️ {name} deferred until first use")
+            except (OSError, SyntaxError, ImportError) as e:
+                logger.warning(f"   ⚠️ Could not read commands of {name} ({e}); loading it now")
+                await self._load(name)
+
+        self.startup_seconds = time.perf_counter() - self.started
+        logger.info(f"📊 Loaded {sum(results)}/{len(eager)} cogs in {self.startup_seconds * 1000:.0f} ms "
+                    f"({len(self.cogs) - len(eager)} deferred)")
+        self.log_profile()
+
+    async def load_for_command(self, command: str) -> bool:
+        """Load the deferred cog that owns command, if any; True if it was loaded now"""
+        name = self.deferred_commands.get(command)
+        if name is None:
+            return False
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if self.profiles[name].loaded:
+                return False
+            if self.profiles[name].error is not None:
+                return False
+            logger.info(f"⏯️ Loading deferred cog {name} for '{command}'")
+            loaded = await self._load(name)
+        # Loaded or failed, its commands stop routing here (a broken cog is tried and logged once)
+        self.deferred_commands = {cmd: ext for cmd, ext in self.deferred_commands.items() if ext != name}
+        return loaded
+
+    def record_setup(self, seconds: float):
+        """Called by the bot's add_cog with how long add_cog (and cog_load) took"""
+        name = current_extension.get()
+        if name in self.profiles:
+            self.profiles[name].setup_seconds += seconds
+
+    def report(self) -> List[CogProfile]:
+        """Profiles, slowest first"""
+        return sorted(self.profiles.values(), key=lambda profile: profile.total_seconds, reverse=True)
+
+    def log_profile(self):
+        for profile in self.report():
+            if not profile.loaded:
+                continue
+            logger.debug("   ⏱️ %s: import %.1f ms, setup %.1f ms",
+                         profile.name, profile.import_seconds * 1000, profile.setup_seconds * 1000)
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from datetime import datetime
+from xp_ledger import get_ledger
 
 class AchievementSystem(commands.Cog):
     def __init__(self, bot, storage):
@@ -271,15 +272,8 @@ class AchievementSystem(commands.Cog):
             reward_text = []
             
             if 'xp' in rewards:
-                # Add XP to user
-                user_key = str(ctx.author.id)
-                server_key = str(ctx.guild.id)
-                if server_key not in self.storage.user_levels:
-                    self.storage.user_levels[server_key] = {}
-                if user_key not in self.storage.user_levels[server_key]:
-                    self.storage.user_levels[server_key][user_key] = {'xp': 0, 'level': 1}
-                
-                self.storage.user_levels[server_key][user_key]['xp'] += rewards['xp']
+                # Add XP to user (same ledger as message XP)
+                get_ledger(self.bot).award(ctx.author.id, ctx.guild.id, rewards['xp'])
                 reward_text.append(f"**XP:** +{rewards['xp']}")
             
             if 'banner' in rewards:
@@ -334,6 +328,8 @@ class AchievementSystem(commands.Cog):
         await ctx.send(embed=embed)
 
 async def setup(bot):
-    from storage import DataStorage
-    storage = DataStorage()
+    storage = getattr(bot, "storage", None)
+    if storage is None:
+        from storage import DataStorage
+        storage = DataStorage()
     await bot.add_cog(AchievementSystem(bot, storage))
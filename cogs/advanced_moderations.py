@@ -1,9 +1,12 @@
 import discord
 from discord.ext import commands
 import asyncio
+import logging
 import sys
 import os
 
+logger = logging.getLogger(__name__)
+
 # Add parent directory to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
@@ -14,9 +17,8 @@ if parent_dir not in sys.path:
 try:
     from storage import DataStorage
     STORAGE_AVAILABLE = True
-    print("✅ Storage imported successfully!")
 except ImportError as e:
-    print(f"⚠️ Storage import failed: {e}")
+    logger.warning("⚠️ Storage import failed: %s", e)
     STORAGE_AVAILABLE = False
     
     # Create a simple fallback
@@ -52,7 +54,7 @@ class AdvancedModeration(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.storage = DataStorage()
-        print(f"✅ Storage initialized: {type(self.storage).__name__}")
+        logger.info("✅ Storage initialized: %s", type(self.storage).__name__)
 
     @commands.command()
     async def teststorage(self, ctx):
@@ -135,4 +137,3 @@ class AdvancedModeration(commands.Cog):
 
 async def setup(bot):
     await bot.add_cog(AdvancedModeration(bot))
-    print("✅ Advanced Moderations cog loaded with storage!")
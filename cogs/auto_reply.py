@@ -1,38 +1,107 @@
 import discord
 from discord.ext import commands
 import random
+from collections import Counter
 import config
+from trigger_matcher import TriggerMatcher
+import metrics
 
 class AutoReply(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.special_matcher = TriggerMatcher()
+        self.reply_matcher = TriggerMatcher()
+        self.replies_sent = Counter()
+        self.trigger_version = None
+        self.rebuild_matchers()
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Handle auto-reply to messages"""
-        if message.author.bot:
-            return
-        
+    async def cog_load(self):
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline:
+            pipeline.register("auto_reply", self.handle_message, pipeline.TRIGGERS)
+        metrics.registry.collector("auto_reply", self.collect_metrics)
+
+    async def cog_unload(self):
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline:
+            pipeline.unregister("auto_reply")
+        metrics.registry.remove_collector("auto_reply")
+
+    def collect_metrics(self):
+        yield "auto_reply_triggers", {}, len(self.special_matcher) + len(self.reply_matcher)
+        yield "auto_reply_matches_total", {}, sum(self.special_matcher.hits.values()) + sum(self.reply_matcher.hits.values())
+        yield "auto_reply_replies_total", {}, sum(self.replies_sent.values())
+
+    def current_trigger_version(self):
+        """Fingerprint of the trigger dicts: their keys in order, so adding, removing,
+        renaming or reordering a trigger at runtime rebuilds the matchers (replies are read live)"""
+        return (tuple(getattr(config, "SPECIAL_REPLIES", {})), tuple(config.AUTO_REPLIES))
+
+    def rebuild_matchers(self):
+        """Compile the trigger automatons (only needed when the trigger set changes)"""
+        self.special_matcher.rebuild(getattr(config, "SPECIAL_REPLIES", {}).keys())
+        self.reply_matcher.rebuild(config.AUTO_REPLIES.keys())
+        self.trigger_version = self.current_trigger_version()
+
+    async def handle_message(self, ctx):
+        """Handle auto-reply to messages (message pipeline trigger stage)"""
         # Don't reply to commands
-        if message.content.startswith(config.PREFIX):
+        if ctx.is_command:
             return
         
-        content = message.content.lower()
+        if self.trigger_version != self.current_trigger_version():
+            self.rebuild_matchers()
+        
+        message = ctx.message
+        content = ctx.lowered
         
         # Check special replies first (if you add SPECIAL_REPLIES in config)
-        if hasattr(config, "SPECIAL_REPLIES"):
-            for trigger, reply in config.SPECIAL_REPLIES.items():
-                if trigger in content:
-                    await message.reply(reply)
-                    return
+        trigger = self.special_matcher.first_match(content)
+        if trigger is not None:
+            self.special_matcher.record_hit(trigger)
+            self.replies_sent[trigger] += 1
+            await message.reply(config.SPECIAL_REPLIES[trigger])
+            return
+        
+        # Check regular auto-replies, in config order
+        matches = self.reply_matcher.find_all(content)
+        for trigger in matches:
+            self.reply_matcher.record_hit(trigger)
+        for trigger in matches:
+            if random.random() < config.AUTO_REPLY_SETTINGS["chance"]:
+                response = random.choice(config.AUTO_REPLIES[trigger])
+                self.replies_sent[trigger] += 1
+                await message.reply(response)
+                return
+
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def autoreplystats(self, ctx):
+        """Show the most matched auto-reply triggers (Admin only)"""
+        hits = self.special_matcher.hits + self.reply_matcher.hits
         
-        # Check regular auto-replies
-        for trigger, replies in config.AUTO_REPLIES.items():
-            if trigger in content:
-                if random.random() < config.AUTO_REPLY_SETTINGS["chance"]:
-                    response = random.choice(replies)
-                    await message.reply(response)
-                    return
+        embed = discord.Embed(
+            title="🤖 Auto-Reply Stats",
+            color=discord.Color.blue()
+        )
+        
+        if hits:
+            embed.description = "\n".join(
+                f"`{trigger}` - **{count}** matches, {self.replies_sent[trigger]} replies"
+                for trigger, count in hits.most_common(15)
+            )
+        else:
+            embed.description = "No triggers matched yet!"
+        
+        embed.set_footer(text=f"{len(self.special_matcher) + len(self.reply_matcher)} triggers loaded")
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def reloadreplies(self, ctx):
+        """Recompile the auto-reply triggers from config (Admin only)"""
+        self.rebuild_matchers()
+        await ctx.send(f"✅ Reloaded **{len(self.special_matcher) + len(self.reply_matcher)}** auto-reply triggers")
 
 async def setup(bot):
     await bot.add_cog(AutoReply(bot))
@@ -1,41 +1,6 @@
-# app.py - Merlin Discord Bot (Rewritten)
+# banner_system.py - Banner collection, previews and equipping
 import discord
 from discord.ext import commands
-import asyncio
-import sys
-from datetime import datetime
-
-# -----------------------------
-# Config import
-# -----------------------------
-try:
-    import config
-    print("✅ Config imported successfully!")
-except ImportError as e:
-    print(f"❌ Failed to import config: {e}")
-    sys.exit(1)
-
-# -----------------------------
-# Storage import
-# -----------------------------
-try:
-    from storage import DataStorage
-    STORAGE = DataStorage()
-    print("✅ Storage instance created (async load deferred)")
-except ImportError as e:
-    STORAGE = None
-    print(f"❌ Storage module not found: {e}")
-
-
-# -----------------------------
-# Leveling system import
-# -----------------------------
-try:
-    from discordLevelingSystem import DiscordLevelingSystem, errors as leveling_errors
-except ImportError as e:
-    print(f"❌ Leveling system import failed: {e}")
-    DiscordLevelingSystem = None
-    leveling_errors = None
 
 # -----------------------------
 # Banner System Cog
@@ -81,101 +46,6 @@ class BannerSystem(commands.Cog):
 
         return None, None
 
-    # -----------------------------
-    # Commands (simplified example)
-    # -----------------------------
-    @commands.command()
-    async def banners(self, ctx):
-        embed = discord.Embed(title="🎨 Available Banners", description="Check your banners!", color=discord.Color.purple())
-        for bid, binfo in self.available_banners.items():
-            embed.add_field(name=f"{binfo['emoji']} {binfo['name']}", value=f"Rarity: {binfo['rarity'].title()}", inline=False)
-        await ctx.send(embed=embed)
-
-# -----------------------------
-# Merlin Bot Class
-# -----------------------------
-class MerlinBot(commands.Bot):
-    def __init__(self):
-        super().__init__(
-            command_prefix=config.PREFIX,
-            intents=discord.Intents.all(),
-            help_command=None,
-            owner_ids=set(getattr(config, "OWNER_IDS", []))
-        )
-        self.user_data = {}
-        self.levelsystem = DiscordLevelingSystem(rate=1, per=60.0) if DiscordLevelingSystem else None
-
-    async def setup_hook(self):
-        if self.levelsystem:
-            loop = asyncio.get_running_loop()
-            try:
-                await loop.run_in_executor(None, self.levelsystem.connect_to_database_file, "./leveling.db")
-                print("✅ Leveling database connected!")
-            except leveling_errors.ConnectionFailure:
-                print("❌ Failed to connect leveling database!")
-
-        if STORAGE:
-            try:
-                await STORAGE.load_data_async()
-                print("✅ Storage loaded successfully!")
-            except Exception as e:
-                print(f"❌ Storage load failed: {e}")
-
-        # Load BannerSystem cog
-        try:
-            await self.add_cog(BannerSystem(self, STORAGE))
-            print("✅ BannerSystem cog loaded!")
-        except Exception as e:
-            print(f"❌ Failed to load BannerSystem cog: {e}")
-
-    async def on_ready(self):
-        print(f"\n🎉 {self.user} is online | Connected to {len(self.guilds)} guild(s)")
-        activity = discord.Activity(type=discord.ActivityType.watching, name=f"{len(self.guilds)} servers | {config.PREFIX}help")
-        await self.change_presence(activity=activity)
-
-    async def on_message(self, message):
-        if message.author.bot:
-            return await self.process_commands(message)
-
-        if STORAGE:
-            STORAGE.get_user_profile(message.author.id, message.guild.id)
-
-        if self.levelsystem:
-            await self.levelsystem.award_xp(amount=[15, 25], message=message)
-
-        user_id = message.author.id
-        if user_id not in self.user_data:
-            joined_date = message.author.joined_at.isoformat() if message.author.joined_at else datetime.now().isoformat()
-            self.user_data[user_id] = {"username": str(message.author), "joined_at": joined_date, "messages": 0}
-        self.user_data[user_id]["messages"] += 1
-        await self.process_commands(message)
-
-# -----------------------------
-# Main Entry
-# -----------------------------
-async def main():
-    print("="*50)
-    print("🤖 Starting Merlin Discord Bot...")
-    print("="*50)
-
-    if not getattr(config, "BOT_TOKEN", None) or config.BOT_TOKEN == "YOUR_ACTUAL_BOT_TOKEN_HERE":
-        print("❌ Bot token not configured!")
-        return
-
-    bot = MerlinBot()
-    try:
-        await bot.start(config.BOT_TOKEN)
-    except discord.LoginFailure:
-        print("❌ Invalid bot token!")
-    except KeyboardInterrupt:
-        print("\n🛑 Bot stopped by user")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
-
     @commands.command()
     async def banners(self, ctx):
         """View available banners with improved display"""
@@ -277,43 +147,6 @@ if __name__ == "__main__":
         
         await ctx.send(embed=embed)
 
-    @commands.command()
-    async def setbanner(self, ctx, *, banner_name: str):
-        """Set your profile banner with improved search"""
-        if not self.storage:
-            await ctx.send("❌ Storage system not available. Please contact bot administrator.")
-            return
-            
-        # Find banner by name using our improved function
-        banner_id, banner_info = self.find_banner_by_name(banner_name)
-        
-        if not banner_id:
-            # Show available banners to help user
-            available_names = [b['name'] for b in self.available_banners.values()]
-            await ctx.send(f"❌ Banner '{banner_name}' not found! Available banners: {', '.join(available_names)}")
-            return
-        
-        # Check if user has unlocked this banner
-        user_banners = self.storage.get_banners(ctx.author.id, ctx.guild.id)
-        banner_unlocked = any(bg['id'] == banner_id for bg in user_banners)
-        
-        if not banner_unlocked and banner_id != 'assassin':
-            await ctx.send(f"❌ You haven't unlocked the **{banner_info['name']}** banner yet!")
-            return
-        
-        self.storage.update_user_banner(ctx.author.id, ctx.guild.id, banner_id)
-        
-        embed = discord.Embed(
-            title="🎨 Banner Updated!",
-            description=f"Your profile banner is now **{banner_info['name']}** {banner_info['emoji']}",
-            color=discord.Color(int(banner_info['color'].replace('#', ''), 16)) if banner_info.get('color') else discord.Color.blue()
-        )
-        
-        if banner_info.get('banner_url'):
-            embed.set_image(url=banner_info['banner_url'])
-        
-        await ctx.send(embed=embed)
-
     @commands.command()
     async def userbanners(self, ctx, member: discord.Member = None):
         """Check what banners a user has unlocked with previews"""
@@ -447,12 +280,8 @@ if __name__ == "__main__":
         await ctx.send(embed=embed)
 
 async def setup(bot):
-    try:
+    storage = getattr(bot, "storage", None)
+    if storage is None:
         from storage import DataStorage
         storage = DataStorage()
-        await bot.add_cog(BannerSystem(bot, storage))
-        print("✅ BannerSystem cog loaded successfully!")
-    except Exception as e:
-        print(f"❌ Failed to load BannerSystem: {e}")
-        # Fallback without storage
-        await bot.add_cog(BannerSystem(bot, None))
+    await bot.add_cog(BannerSystem(bot, storage))
@@ -2,6 +2,9 @@
 import discord
 from discord.ext import commands
 import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Events(commands.Cog):
     def __init__(self, bot):
@@ -10,8 +13,8 @@ class Events(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self):
         """When bot is ready"""
-        print(f'✅ {self.bot.user} is online!')
-        print(f'📊 Connected to {len(self.bot.guilds)} servers')
+        logger.info("✅ %s is online!", self.bot.user)
+        logger.info("📊 Connected to %d servers", len(self.bot.guilds))
         
         await self.bot.change_presence(
             activity=discord.Activity(
@@ -39,7 +42,7 @@ class Events(commands.Cog):
             await ctx.send("❌ Member not found.")
         
         else:
-            print(f"Error: {error}")
+            logger.error("❌ Command %s failed: %s", ctx.command, error, exc_info=error)
             await ctx.send("❌ An unexpected error occurred.")
 
     @commands.Cog.listener()
@@ -3,13 +3,14 @@ from discord.ext import commands
 import random
 import config
 import asyncio
-from datetime import datetime
+from cooldowns import get_cooldowns
 
 class Fun(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.roast_cooldowns = {}
-        self.mock_cooldowns = {}
+        self.cooldowns = get_cooldowns(bot)
+        # !roast and !superroast share "roast" (10 s / 30 s): remember a roast for the longer one
+        self.cooldowns.keep("roast", 30)
 
     # 🔥 EXPANDED ROAST DATABASE - 50+ ROASTS!
     ADVANCED_ROASTS = [
@@ -92,20 +93,15 @@ class Fun(commands.Cog):
         "You have a great future behind you!",
     ]
 
-    def is_on_cooldown(self, user_id, cooldown_dict, seconds=10):
+    def is_on_cooldown(self, user_id, bucket, seconds=10):
         """Check if a user is on cooldown"""
-        if user_id in cooldown_dict:
-            time_diff = datetime.now() - cooldown_dict[user_id]
-            if time_diff.total_seconds() < seconds:
-                return True
-        cooldown_dict[user_id] = datetime.now()
-        return False
+        return self.cooldowns.check(bucket, user_id, seconds)
 
     @commands.command()
     async def roast(self, ctx, member: discord.Member = None):
         """Roast someone (or get roasted yourself)"""
         # Cooldown check
-        if self.is_on_cooldown(ctx.author.id, self.roast_cooldowns, 10):
+        if self.is_on_cooldown(ctx.author.id, "roast", 10):
             await ctx.send("🔥 Calm down! Wait 10 seconds before roasting again.")
             return
         
@@ -156,7 +152,7 @@ class Fun(commands.Cog):
     async def superroast(self, ctx, member: discord.Member = None):
         """ULTIMATE ROAST - Use with caution!"""
         # Longer cooldown for super roast
-        if self.is_on_cooldown(ctx.author.id, self.roast_cooldowns, 30):
+        if self.is_on_cooldown(ctx.author.id, "roast", 30):
             await ctx.send("🔥 That was too hot! Wait 30 seconds before another super roast.")
             return
         
@@ -370,7 +366,7 @@ class Fun(commands.Cog):
     @commands.command()
     async def mock(self, ctx, *, text: str = None):
         """Mock someone's text (sPoNgEbOb CaSe)"""
-        if self.is_on_cooldown(ctx.author.id, self.mock_cooldowns, 5):
+        if self.is_on_cooldown(ctx.author.id, "mock", 5):
             await ctx.send("🤪 Calm down! Wait 5 seconds before mocking again.")
             return
             
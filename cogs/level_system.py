@@ -1,58 +1,87 @@
 import discord
 from discord.ext import commands
 import random
-import json
-import os
-from datetime import datetime, timedelta
+import logging
+import config
+from leaderboard import GuildStats, RankIndex
+from cooldowns import get_cooldowns
+from user_resolver import get_resolver
+from level_curve import get_curve
+from xp_ledger import get_ledger
+
+logger = logging.getLogger(__name__)
 
 class LevelSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_file = "level_data.json"
-        self.user_data = self.load_data()
-        self.cooldowns = {}
-        self.debug_mode = True  # Set to False to disable debug messages
+        # XP lives in the bot-wide ledger; user_data is its server -> user -> record dict
+        self.ledger = get_ledger(bot)
+        self.user_data = self.ledger.data
+        self.cooldowns = get_cooldowns(bot)
+        self.cooldown_seconds = config.LEVEL_SETTINGS.get("cooldown_seconds", 3)
+        self.xp_range = tuple(config.LEVEL_SETTINGS.get("message_xp_range", (15, 25)))
+        self.rankings = {}  # server_id -> RankIndex, built on first use
+        self.guild_stats = {}  # server_id -> GuildStats, built on first use
+        self.curve = get_curve()
+
+    async def cog_load(self):
+        self.ledger.listeners.append(self.on_xp_change)
+        self.ledger.start()
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline:
+            pipeline.register("level_system", self.handle_message, pipeline.XP)
 
-    def load_data(self):
-        """Load level data from file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+    async def cog_unload(self):
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline:
+            pipeline.unregister("level_system")
+        if self.on_xp_change in self.ledger.listeners:
+            self.ledger.listeners.remove(self.on_xp_change)
+        await self.ledger.flush()
 
-    def save_data(self):
-        """Save level data to file"""
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump(self.user_data, f, indent=2)
-        except Exception as e:
-            print(f"❌ Error saving level data: {e}")
+    def on_xp_change(self, server_key, user_key, old_xp, new_xp, messages):
+        """Keep rankings and stats in step with every ledger change (including other cogs' awards)"""
+        if server_key in self.rankings:
+            self.rankings[server_key].update(user_key, new_xp)
+        if server_key in self.guild_stats:
+            if old_xp is None:
+                self.guild_stats[server_key].add_user(new_xp, messages)
+            else:
+                self.guild_stats[server_key].record(old_xp, new_xp, messages)
 
     def calculate_level(self, xp):
         """Calculate level based on XP"""
-        return int((xp / 100) ** 0.5) + 1
+        return self.curve.level_for(xp)
 
     def calculate_xp_for_level(self, level):
         """Calculate XP needed for a specific level"""
-        return (level - 1) ** 2 * 100
+        return self.curve.xp_for_level(level)
 
     def get_user_data(self, user_id, server_id):
         """Get or create user data"""
-        if str(server_id) not in self.user_data:
-            self.user_data[str(server_id)] = {}
-        
-        if str(user_id) not in self.user_data[str(server_id)]:
-            self.user_data[str(server_id)][str(user_id)] = {
-                'xp': 0,
-                'messages': 0,
-                'last_message': None,
-                'level_up_notifications': True
-            }
-        
-        return self.user_data[str(server_id)][str(user_id)]
+        return self.ledger.get_record(user_id, server_id)
+
+    def get_rank_index(self, server_id):
+        """Get the server's ranking index, building it from user_data the first time"""
+        server_key = str(server_id)
+        if server_key not in self.rankings:
+            server_data = self.user_data.get(server_key, {})
+            self.rankings[server_key] = RankIndex(
+                (user_id, data['xp']) for user_id, data in server_data.items()
+            )
+        return self.rankings[server_key]
+
+    def get_guild_stats(self, server_id):
+        """Get the server's running XP statistics, building them from user_data the first time"""
+        server_key = str(server_id)
+        if server_key not in self.guild_stats:
+            server_data = self.user_data.get(server_key, {})
+            self.guild_stats[server_key] = GuildStats(
+                self.curve.level_for,
+                ((data['xp'], data['messages']) for data in server_data.values()),
+                levels_of=self.curve.levels_for
+            )
+        return self.guild_stats[server_key]
 
     def get_level_up_gif(self, level):
         """Get appropriate GIF URL for level up"""
@@ -133,66 +162,47 @@ class LevelSystem(commands.Cog):
 
     def add_xp(self, user_id, server_id, xp_amount):
         """Add XP to user and check for level up"""
-        user_data = self.get_user_data(user_id, server_id)
-        old_level = self.calculate_level(user_data['xp'])
-        
-        user_data['xp'] += xp_amount
-        user_data['messages'] += 1
-        
-        new_level = self.calculate_level(user_data['xp'])
-        
-        self.save_data()
-        return old_level, new_level
+        old_xp, new_xp = self.ledger.award(user_id, server_id, xp_amount, messages=1)
+        return self.calculate_level(old_xp), self.calculate_level(new_xp)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Give XP for messages"""
-        if message.author.bot:
-            return
-        
-        # Debug: Print message info
-        if self.debug_mode:
-            print(f"🔍 DEBUG - Message from {message.author} in #{message.channel}: '{message.content}'")
+    async def handle_message(self, ctx):
+        """Give XP for messages (message pipeline XP stage)"""
+        message = ctx.message
+        # One flag check per message; the debug lines below cost nothing unless DEBUG is on
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         # Check cooldown (prevent spam)
         user_id = message.author.id
         server_id = message.guild.id if message.guild else None
         
         if not server_id:
-            if self.debug_mode:
-                print("❌ DEBUG - No server ID (DM message), skipping XP")
             return
         
-        current_time = datetime.now()
-        if user_id in self.cooldowns:
-            time_diff = current_time - self.cooldowns[user_id]
-            if time_diff < timedelta(seconds=3):
-                if self.debug_mode:
-                    print(f"⏰ DEBUG - Cooldown active for {message.author}, {60 - time_diff.seconds}s remaining")
-                return
-        
-        self.cooldowns[user_id] = current_time
+        if self.cooldowns.check("xp", user_id, self.cooldown_seconds):
+            if debug:
+                logger.debug("⏰ Cooldown active for %s, %.1fs remaining", message.author,
+                             self.cooldowns.remaining("xp", user_id, self.cooldown_seconds))
+            return
         
-        # Give random XP between 15-25 per message
-        xp_gain = random.randint(15, 25)
+        # Give random XP in message_xp_range (15-25 by default) per message
+        xp_gain = random.randint(*self.xp_range)
         old_level, new_level = self.add_xp(user_id, server_id, xp_gain)
         
-        # Debug: Print XP gain
-        if self.debug_mode:
+        if debug:
             user_data = self.get_user_data(user_id, server_id)
-            print(f"🎯 DEBUG - {message.author} gained {xp_gain} XP")
-            print(f"📊 DEBUG - Total: {user_data['xp']} XP, Level: {new_level}, Messages: {user_data['messages']}")
+            logger.debug("🎯 %s gained %d XP in #%s (total %d XP, level %d, %d messages)",
+                         message.author, xp_gain, message.channel, user_data['xp'], new_level, user_data['messages'])
         
         # Check for level up
         if new_level > old_level:
             user_data = self.get_user_data(user_id, server_id)
             if user_data['level_up_notifications']:
-                if self.debug_mode:
-                    print(f"🎉 DEBUG - LEVEL UP! {message.author} reached level {new_level}")
+                logger.info("🎉 %s reached level %d", message.author, new_level)
                 
-                # Create and send level up embed with progress bar
+                # Create and send level up embed with progress bar (in the background, so a
+                # slow or rate-limited send doesn't hold up this message's command)
                 embed = self.create_level_up_embed(message.author, new_level, user_data)
-                await message.channel.send(embed=embed)
+                ctx.send_later(message.channel.send(embed=embed))
 
     @commands.command()
     @commands.has_permissions(administrator=True)
@@ -258,12 +268,7 @@ class LevelSystem(commands.Cog):
         # Add rank if available
         server_data = self.user_data.get(str(ctx.guild.id), {})
         if server_data:
-            sorted_users = sorted(
-                server_data.items(),
-                key=lambda x: x[1]['xp'],
-                reverse=True
-            )
-            rank = next((i + 1 for i, (uid, _) in enumerate(sorted_users) if uid == str(target.id)), None)
+            rank = self.get_rank_index(ctx.guild.id).rank(str(target.id))
             if rank:
                 embed.add_field(name="Server Rank", value=f"**#{rank}**", inline=True)
         
@@ -279,25 +284,19 @@ class LevelSystem(commands.Cog):
             return
         
         # Get top 10 users
-        sorted_users = sorted(
-            server_data.items(),
-            key=lambda x: x[1]['xp'],
-            reverse=True
-        )[:10]
+        top_users = self.get_rank_index(ctx.guild.id).top(10)
         
         embed = discord.Embed(
             title="🏆 Server Leaderboard",
             color=discord.Color.gold()
         )
         
+        names = await get_resolver(self.bot).display_names((user_id for user_id, _ in top_users), ctx.guild)
         description = ""
-        for i, (user_id, data) in enumerate(sorted_users, 1):
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                level = self.calculate_level(data['xp'])
-                description += f"**{i}. {user.display_name}** - Level {level} ({data['xp']} XP)\n"
-            except:
-                description += f"**{i}. Unknown User** - Level {level} ({data['xp']} XP)\n"
+        for i, (user_id, xp) in enumerate(top_users, 1):
+            level = self.calculate_level(xp)
+            name = names.get(int(user_id)) or "Unknown User"
+            description += f"**{i}. {name}** - Level {level} ({xp} XP)\n"
         
         embed.description = description
         embed.set_footer(text=f"Total users: {len(server_data)}")
@@ -314,13 +313,7 @@ class LevelSystem(commands.Cog):
             await ctx.send("❌ No level data available for this server yet!")
             return
         
-        sorted_users = sorted(
-            server_data.items(),
-            key=lambda x: x[1]['xp'],
-            reverse=True
-        )
-        
-        rank = next((i + 1 for i, (uid, _) in enumerate(sorted_users) if uid == str(target.id)), None)
+        rank = self.get_rank_index(ctx.guild.id).rank(str(target.id))
         
         if rank:
             user_data = self.get_user_data(target.id, ctx.guild.id)
@@ -363,6 +356,7 @@ class LevelSystem(commands.Cog):
         """Toggle level-up notifications on/off"""
         user_data = self.get_user_data(ctx.author.id, ctx.guild.id)
         user_data['level_up_notifications'] = not user_data['level_up_notifications']
+        self.ledger.mark_dirty(ctx.guild.id)
         
         status = "enabled" if user_data['level_up_notifications'] else "disabled"
         await ctx.send(f"✅ Level-up notifications **{status}**!")
@@ -431,11 +425,9 @@ class LevelSystem(commands.Cog):
         embed.add_field(name="Notifications", value="On" if user_data['level_up_notifications'] else "Off", inline=True)
         
         # Check cooldown status
-        current_time = datetime.now()
-        if target.id in self.cooldowns:
-            time_diff = current_time - self.cooldowns[target.id]
-            cooldown_remaining = max(0, 60 - time_diff.seconds)
-            embed.add_field(name="Cooldown", value=f"{cooldown_remaining}s remaining", inline=True)
+        cooldown_remaining = self.cooldowns.remaining("xp", target.id, self.cooldown_seconds)
+        if cooldown_remaining:
+            embed.add_field(name="Cooldown", value=f"{cooldown_remaining:.1f}s remaining", inline=True)
         else:
             embed.add_field(name="Cooldown", value="No cooldown", inline=True)
         
@@ -444,38 +436,34 @@ class LevelSystem(commands.Cog):
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def toggledebug(self, ctx):
-        """Toggle debug mode on/off (Admin only)"""
-        self.debug_mode = not self.debug_mode
-        status = "ON" if self.debug_mode else "OFF"
+        """Toggle per-message XP debug logging on/off (Admin only)"""
+        logger.setLevel(logging.INFO if logger.isEnabledFor(logging.DEBUG) else logging.DEBUG)
+        status = "ON" if logger.isEnabledFor(logging.DEBUG) else "OFF"
         await ctx.send(f"🔧 Debug mode **{status}**")
 
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def xpstats(self, ctx):
         """Show server XP statistics (Admin only)"""
-        server_data = self.user_data.get(str(ctx.guild.id), {})
-        
-        if not server_data:
+        if not self.user_data.get(str(ctx.guild.id)):
             await ctx.send("❌ No level data available for this server yet!")
             return
         
-        total_users = len(server_data)
-        total_xp = sum(data['xp'] for data in server_data.values())
-        total_messages = sum(data['messages'] for data in server_data.values())
-        avg_xp = total_xp / total_users if total_users > 0 else 0
-        avg_level = sum(self.calculate_level(data['xp']) for data in server_data.values()) / total_users if total_users > 0 else 0
+        stats = self.get_guild_stats(ctx.guild.id)
         
         embed = discord.Embed(
             title="📈 Server XP Statistics",
             color=discord.Color.blue()
         )
         
-        embed.add_field(name="Total Users", value=total_users, inline=True)
-        embed.add_field(name="Total XP", value=total_xp, inline=True)
-        embed.add_field(name="Total Messages", value=total_messages, inline=True)
-        embed.add_field(name="Average XP", value=f"{avg_xp:.1f}", inline=True)
-        embed.add_field(name="Average Level", value=f"{avg_level:.1f}", inline=True)
-        embed.add_field(name="Debug Mode", value="ON" if self.debug_mode else "OFF", inline=True)
+        embed.add_field(name="Total Users", value=stats.users, inline=True)
+        embed.add_field(name="Total XP", value=stats.total_xp, inline=True)
+        embed.add_field(name="Total Messages", value=stats.total_messages, inline=True)
+        embed.add_field(name="Average XP", value=f"{stats.average_xp:.1f}", inline=True)
+        embed.add_field(name="Average Level", value=f"{stats.average_level:.1f}", inline=True)
+        embed.add_field(name="Median Level", value=stats.median_level, inline=True)
+        embed.add_field(name="Level Percentiles", value=f"p75: {stats.percentile(75)} • p90: {stats.percentile(90)} • p99: {stats.percentile(99)}", inline=False)
+        embed.add_field(name="Debug Mode", value="ON" if logger.isEnabledFor(logging.DEBUG) else "OFF", inline=True)
         
         await ctx.send(embed=embed)
 
@@ -1,8 +1,12 @@
 import discord
 from discord.ext import commands
 import random
+import re
+import logging
 import config
 
+logger = logging.getLogger(__name__)
+
 class NameTroll(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -29,7 +33,17 @@ class NameTroll(commands.Cog):
 
         # Create variants for each name
         self.name_variants = self.create_name_variants(self.name_responses)
+        self.build_name_index()
+
+    async def cog_load(self):
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline:
+            pipeline.register("name_troll", self.handle_message, pipeline.TRIGGERS)
 
+    async def cog_unload(self):
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline:
+            pipeline.unregister("name_troll")
 
     def load_name_responses(self):
         """Load name-based troll responses"""
@@ -165,6 +179,38 @@ class NameTroll(commands.Cog):
             }
         return variants
 
+    def build_name_index(self):
+        """Compile every variant into one word-boundary regex (call again when names change)"""
+        # variant -> (priority, name); earlier names win, like the old nested loop
+        self.variant_owners = {}
+        for priority, (name, variants) in enumerate(self.name_variants.items()):
+            for variant in variants:
+                if variant and variant not in self.variant_owners:
+                    self.variant_owners[variant] = (priority, name)
+
+        if not self.variant_owners:
+            self.name_pattern = None
+            return
+        # Longest first so a longer variant wins over its own prefix at the same position
+        alternation = "|".join(re.escape(v) for v in sorted(self.variant_owners, key=len, reverse=True))
+        self.name_pattern = re.compile(rf"\b({alternation})\b")
+
+    def detect_name(self, content):
+        """Return (name, variant) for the highest-priority tracked name in content, in one scan"""
+        if self.name_pattern is None:
+            return None, None
+        best = None
+        for match in self.name_pattern.finditer(content):
+            variant = match.group(1)
+            priority, name = self.variant_owners[variant]
+            if best is None or priority < best[0]:
+                best = (priority, name, variant)
+                if priority == 0:
+                    break
+        if best is None:
+            return None, None
+        return best[1], best[2]
+
     def get_manual_mentions(self, message):
         """Return set of names that were manually mentioned via mapping"""
         mentioned_names = set()
@@ -174,37 +220,30 @@ class NameTroll(commands.Cog):
                     mentioned_names.add(name)
         return mentioned_names
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot:
-            return
-
-        content = message.content.lower()
+    async def handle_message(self, ctx):
+        """Reply when a tracked name shows up (message pipeline trigger stage)"""
+        message = ctx.message
+        content = ctx.lowered
         manually_mentioned_names = self.get_manual_mentions(message)
-        detected_name = None
 
         # Check text variants first
-        for name, variants in self.name_variants.items():
-            for variant in variants:
-                if re.search(rf"\b{re.escape(variant)}\b", content):
-                    detected_name = name
-                    print(f"🎯 DEBUG - Name variant '{variant}' detected in message: {content}")
-                    break
-            if detected_name:
-                break
+        detected_name, variant = self.detect_name(content)
+        if detected_name:
+            logger.debug("🎯 Name variant '%s' detected in message: %s", variant, content)
 
         # If no variant detected, check manual mentions
         if not detected_name:
             for name in manually_mentioned_names:
                 detected_name = name
-                print(f"📌 DEBUG - @{name} manually mentioned in message: {content}")
+                logger.debug("📌 @%s manually mentioned in message: %s", name, content)
                 break
 
         # Send response if detected
         if detected_name:
             response = random.choice(self.name_responses[detected_name])
-            await message.reply(response)
-            print(f"✅ DEBUG - Replied to {message.author} for name '{detected_name}'")
+            # Reply in the background so a command mentioning a tracked name isn't held up
+            ctx.send_later(message.reply(response))
+            logger.info("✅ Replied to %s for name '%s'", message.author, detected_name)
 
     # Command group for management
     @commands.group(name="nametroll", invoke_without_command=True)
@@ -240,7 +279,7 @@ class NameTroll(commands.Cog):
         if name in self.name_responses:
             # Simulate message detection
             test_message = f"test message with {name} in it"
-            print(f"🧪 Testing name: '{name}' in message: '{test_message}'")
+            logger.debug("🧪 Testing name: '%s' in message: '%s'", name, test_message)
             
             # Check if it would trigger
             if f" {name} " in f" {test_message} " or test_message.startswith(name) or test_message.endswith(name):
@@ -260,6 +299,7 @@ class NameTroll(commands.Cog):
         self.name_responses[name].append(response)
         # Update variants dynamically
         self.name_variants[name] = {name, name + "y", name + "ie", name.capitalize()}
+        self.build_name_index()
         await ctx.send(f"✅ Added response for **{name}**: \"{response}\"")
 
     @nametroll.command(name="remove")
@@ -269,6 +309,7 @@ class NameTroll(commands.Cog):
         if name in self.name_responses:
             del self.name_responses[name]
             self.name_variants.pop(name, None)
+            self.build_name_index()
             await ctx.send(f"✅ Removed **{name}** from tracking")
         else:
             await ctx.send(f"❌ **{name}** is not being tracked")
@@ -1,7 +1,12 @@
 # profile_system.py
 import discord
 from discord.ext import commands
+import logging
 from typing import Optional
+from level_curve import get_curve
+from xp_ledger import get_ledger
+
+logger = logging.getLogger(__name__)
 
 class ProfileSystem(commands.Cog):
     """Profile System with XP, Levels, Banners, Bio, and Title"""
@@ -15,34 +20,14 @@ class ProfileSystem(commands.Cog):
     def __init__(self, bot, storage):
         self.bot = bot
         self.storage = storage  # Make sure this is your main DataStorage
+        self.curve = get_curve()
 
     @commands.Cog.listener()
     async def on_ready(self):
-        print(f"✅ {self.__class__.__name__} loaded successfully!")
+        logger.info("✅ %s loaded successfully!", self.__class__.__name__)
 
     def calculate_level(self, total_xp: int):
-        base_xp = 100
-        multiplier = 1.5
-        level = 0
-        required_xp = 0
-
-        while total_xp >= required_xp:
-            level += 1
-            required_xp = base_xp * (multiplier ** (level - 1))
-
-        current_level = level - 1
-        previous_xp = base_xp * (multiplier ** (current_level - 1)) if current_level > 0 else 0
-        current_required_xp = (base_xp * (multiplier ** current_level)) - previous_xp if current_level > 0 else base_xp
-        current_xp_in_level = total_xp - previous_xp
-        progress_percentage = min(100, int((current_xp_in_level / current_required_xp) * 100)) if current_required_xp > 0 else 100
-
-        return {
-            "level": current_level,
-            "current_xp": int(current_xp_in_level),
-            "required_xp": int(current_required_xp),
-            "progress_percentage": progress_percentage,
-            "total_xp": total_xp
-        }
+        return self.curve.progress(total_xp)
 
     def create_progress_bar(self, percentage: int, length: int = 20):
         filled = int(length * percentage / 100)
@@ -63,13 +48,10 @@ class ProfileSystem(commands.Cog):
         if profile_data is None:
             return await ctx.send(f"⚠️ No profile found for {target.display_name}. Start interacting!")
 
-        # If your leveling system is separate, merge XP/messages from it:
-        try:
-            total_xp = self.storage.leveling.get_xp(target.id)  # replace with your method
-            messages = self.storage.leveling.get_messages(target.id)
-        except Exception:
-            total_xp = profile_data.get("total_xp", 0)
-            messages = profile_data.get("messages", 0)
+        # XP and message counts live in the bot-wide XP ledger (looked up, not created, for a profile view)
+        record = get_ledger(self.bot).data.get(str(ctx.guild.id), {}).get(str(target.id), {})
+        total_xp = record.get("xp", 0)
+        messages = record.get("messages", 0)
 
         level_info = self.calculate_level(total_xp)
         progress_bar = self.create_progress_bar(level_info["progress_percentage"])
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
+import logging
 from datetime import datetime
 import sys
 import os
@@ -12,38 +13,30 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-try:
-    from storage import DataStorage
-    import config
-    storage = DataStorage()  # ← REMOVED the config argument
-    STORAGE_AVAILABLE = True
-    print("✅ Storage imported successfully for Social System!")
-except ImportError as e:
-    print(f"❌ Failed to import storage modules: {e}")
-    STORAGE_AVAILABLE = False
-    storage = None
+from cooldowns import get_cooldowns
+from user_resolver import get_resolver
+
+logger = logging.getLogger(__name__)
 
 class SocialSystem(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, storage=None):
         self.bot = bot
-        # Use the storage instance created above, don't create a new one
+        # Use the bot's storage instance, don't create a new one
         self.storage = storage
         
-        if STORAGE_AVAILABLE:
-            print("✅ Social System loaded with storage!")
+        if self.storage:
+            logger.info("✅ Social System loaded with storage!")
         else:
-            print("❌ Social System loaded WITHOUT storage - features limited")
+            logger.warning("❌ Social System loaded WITHOUT storage - features limited")
         
-        self.marriage_cooldowns = {}
-        self.rep_cooldowns = {}
-        self.adoption_cooldowns = {}
+        self.cooldowns = get_cooldowns(bot)
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Called when cog is loaded and ready"""
-        print(f"✅ {self.__class__.__name__} cog loaded successfully!")
-        if not STORAGE_AVAILABLE:
-            print("❌ Storage system not available - social features limited")
+        logger.info("✅ %s cog loaded successfully!", self.__class__.__name__)
+        if not self.storage:
+            logger.warning("❌ Storage system not available - social features limited")
 
     # 💍 MARRIAGE COMMANDS
     @commands.command()
@@ -62,7 +55,7 @@ class SocialSystem(commands.Cog):
             return
         
         # Check cooldown
-        if self.is_on_cooldown(ctx.author.id, self.marriage_cooldowns, 3600):
+        if self.is_on_cooldown(ctx.author.id, "marriage", 3600):
             await ctx.send("💔 Calm down! You can only propose once per hour.")
             return
         
@@ -101,7 +94,8 @@ class SocialSystem(commands.Cog):
             reaction, user = await self.bot.wait_for('reaction_add', timeout=120.0, check=check)
             
             if str(reaction.emoji) == "✅":
-                # Marriage accepted!
+                # Marriage accepted! (the guild may have been unloaded while we waited)
+                await self.storage.ensure_guild(ctx.guild.id)
                 self.storage.add_marriage(ctx.author.id, member.id, ctx.guild.id)
                 
                 success_embed = discord.Embed(
@@ -157,7 +151,8 @@ class SocialSystem(commands.Cog):
         try:
             await self.bot.wait_for('reaction_add', timeout=30.0, check=check)
             
-            # Process divorce
+            # Process divorce (reloading the guild first if it was unloaded while we waited)
+            await self.storage.ensure_guild(ctx.guild.id)
             self.storage.remove_marriage(ctx.author.id, ctx.guild.id)
             
             await ctx.send(f"💔 **DIVORCE FINALIZED**\n{ctx.author.mention} and <@{partner_id}> are no longer married.")
@@ -213,7 +208,7 @@ class SocialSystem(commands.Cog):
             return
         
         # Check cooldown (1 adoption per day)
-        if self.is_on_cooldown(ctx.author.id, self.adoption_cooldowns, 86400):
+        if self.is_on_cooldown(ctx.author.id, "adoption", 86400):
             await ctx.send("❌ You can only adopt one child per day! Be responsible!")
             return
         
@@ -342,13 +337,8 @@ class SocialSystem(commands.Cog):
             color=discord.Color.blue()
         )
         
-        friends_list = []
-        for friend_id in friend_ids[:15]:
-            try:
-                friend_user = await self.bot.fetch_user(friend_id)
-                friends_list.append(friend_user.display_name)
-            except:
-                friends_list.append(f"Unknown User ({friend_id})")
+        names = await get_resolver(self.bot).display_names(friend_ids[:15], ctx.guild)
+        friends_list = [name or f"Unknown User ({friend_id})" for friend_id, name in names.items()]
         
         embed.description = "\n".join([f"• {name}" for name in friends_list])
         embed.set_footer(text=f"Total friends: {len(friend_ids)}")
@@ -376,7 +366,7 @@ class SocialSystem(commands.Cog):
             return
         
         # Check cooldown (12 hours between rep)
-        if self.is_on_cooldown(ctx.author.id, self.rep_cooldowns, 43200):
+        if self.is_on_cooldown(ctx.author.id, "rep", 43200):
             await ctx.send("⏰ You can only give reputation once every 12 hours!")
             return
         
@@ -506,14 +496,9 @@ class SocialSystem(commands.Cog):
         await ctx.send(embed=embed)
 
     # 🔧 HELPER METHODS
-    def is_on_cooldown(self, user_id, cooldown_dict, seconds):
+    def is_on_cooldown(self, user_id, bucket, seconds):
         """Check if user is on cooldown"""
-        if user_id in cooldown_dict:
-            time_diff = datetime.now() - cooldown_dict[user_id]
-            if time_diff.total_seconds() < seconds:
-                return True
-        cooldown_dict[user_id] = datetime.now()
-        return False
+        return self.cooldowns.check(bucket, user_id, seconds)
 
     @commands.command()
     async def socialhelp(self, ctx):
@@ -566,5 +551,7 @@ class SocialSystem(commands.Cog):
         
         await ctx.send(embed=embed)
 
-async def setup(bot):
-    await bot.add_cog(SocialSystem(bot))
+async def setup(bot, storage=None):
+    if storage is None:
+        storage = getattr(bot, "storage", None)
+    await bot.add_cog(SocialSystem(bot, storage))
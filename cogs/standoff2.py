@@ -1,6 +1,11 @@
 import discord
 from discord.ext import commands
-import aiosqlite
+import logging
+from bisect import bisect_left
+from typing import Dict, List, Optional
+import database
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = "database.db"
 AUTHORIZED_ROLE = "SO2-Manager"
@@ -12,8 +17,60 @@ SKINS = {
     # add more skins...
 }
 
-class SetPriceDropdown(discord.ui.Select):
+class PriceCache:
+    """In-memory copy of standoff_prices with case-insensitive/prefix skin lookup.
+
+    Loaded once when the cog starts, with the pool the cog opened then;
+    SetPriceModal writes through it, so !price never has to read the
+    database afterwards and no query has to look the pool up again.
+    """
+
     def __init__(self):
+        self.pool: Optional[database.ConnectionPool] = None
+        self.prices: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}   # lowercased -> canonical skin name
+        self._sorted: List[str] = []       # lowercased names, for prefix search
+        self._reindex()
+
+    def _reindex(self):
+        self._names = {name.lower(): name for name in list(SKINS) + list(self.prices)}
+        self._sorted = sorted(self._names)
+
+    async def load(self, pool: database.ConnectionPool):
+        self.pool = pool
+        rows = await pool.fetchall("SELECT skin_name, price FROM standoff_prices")
+        self.prices = {skin: price for skin, price in rows}
+        self._reindex()
+
+    async def save(self, skin: str, price: int):
+        await self.pool.execute("REPLACE INTO standoff_prices (skin_name, price) VALUES (?, ?)", (skin, price))
+        # Only update the cache once the write has committed
+        self.set(skin, price)
+
+    def set(self, skin: str, price: int):
+        is_new = skin not in self.prices
+        self.prices[skin] = price
+        if is_new and skin.lower() not in self._names:
+            self._reindex()
+
+    def get(self, skin: str) -> Optional[int]:
+        return self.prices.get(skin)
+
+    def resolve(self, query: str) -> List[str]:
+        """Canonical skin names matching query: an exact (case-insensitive) hit, else every prefix match"""
+        key = query.strip().lower()
+        if key in self._names:
+            return [self._names[key]]
+        matches = []
+        index = bisect_left(self._sorted, key)
+        while index < len(self._sorted) and self._sorted[index].startswith(key):
+            matches.append(self._names[self._sorted[index]])
+            index += 1
+        return matches
+
+class SetPriceDropdown(discord.ui.Select):
+    def __init__(self, cache: PriceCache):
+        self.cache = cache
         options = [
             discord.SelectOption(label=skin, description=f"Set price for {skin}")
             for skin in SKINS.keys()
@@ -22,17 +79,18 @@ class SetPriceDropdown(discord.ui.Select):
 
     async def callback(self, interaction: discord.Interaction):
         skin = self.values[0]
-        await interaction.response.send_modal(SetPriceModal(skin))
+        await interaction.response.send_modal(SetPriceModal(skin, self.cache))
 
 class SetPriceView(discord.ui.View):
-    def __init__(self):
+    def __init__(self, cache: PriceCache):
         super().__init__(timeout=None)
-        self.add_item(SetPriceDropdown())
+        self.add_item(SetPriceDropdown(cache))
 
 class SetPriceModal(discord.ui.Modal, title="Set Skin Price"):
-    def __init__(self, skin_name):
+    def __init__(self, skin_name, cache: PriceCache):
         super().__init__()
         self.skin = skin_name
+        self.cache = cache
         self.price = discord.ui.TextInput(
             label="New price (integer)",
             placeholder="e.g. 450",
@@ -47,12 +105,7 @@ class SetPriceModal(discord.ui.Modal, title="Set Skin Price"):
             await interaction.response.send_message("❌ Invalid price value.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute(
-                "REPLACE INTO standoff_prices (skin_name, price) VALUES (?, ?)",
-                (self.skin, new_price)
-            )
-            await db.commit()
+        await self.cache.save(self.skin, new_price)
 
         img_url = SKINS.get(self.skin)
         embed = discord.Embed(
@@ -68,11 +121,21 @@ class SetPriceModal(discord.ui.Modal, title="Set Skin Price"):
 class Standoff2Cog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.prices = PriceCache()
+
+    async def cog_load(self):
+        # The cog's one pool lookup: opened here at startup, then held by the price cache
+        pool = await database.get_pool(DB_PATH)
+        await pool.execute(
+            "CREATE TABLE IF NOT EXISTS standoff_prices (skin_name TEXT PRIMARY KEY, price INTEGER NOT NULL)"
+        )
+        await self.prices.load(pool)
+        logger.info("✅ Standoff2 price cache loaded (%d skins)", len(self.prices.prices))
 
     @commands.command(name="setprice")
     @commands.has_role(AUTHORIZED_ROLE)
     async def setprice_cmd(self, ctx):
-        view = SetPriceView()
+        view = SetPriceView(self.prices)
         await ctx.send("Select a skin to set price:", view=view)
 
     @setprice_cmd.error
@@ -82,16 +145,18 @@ class Standoff2Cog(commands.Cog):
 
     @commands.command(name="price")
     async def price_cmd(self, ctx, *, skin_name: str):
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute(
-                "SELECT price FROM standoff_prices WHERE skin_name = ?", (skin_name,)
-            ) as cursor:
-                row = await cursor.fetchone()
-        if row is None:
+        matches = self.prices.resolve(skin_name)
+        if len(matches) > 1:
+            listed = "\n".join(f"• {name}" for name in matches[:10])
+            await ctx.send(f"🔎 Several skins match **{skin_name}**:\n{listed}")
+            return
+
+        price = self.prices.get(matches[0]) if matches else None
+        if price is None:
             await ctx.send(f"❌ Skin **{skin_name}** not found.")
             return
 
-        price = row[0]
+        skin_name = matches[0]
         img_url = SKINS.get(skin_name)
         embed = discord.Embed(
             title=skin_name,
@@ -103,5 +168,5 @@ class Standoff2Cog(commands.Cog):
 
         await ctx.send(embed=embed)
 
-def setup(bot):
-    bot.add_cog(Standoff2Cog(bot))
+async def setup(bot):
+    await bot.add_cog(Standoff2Cog(bot))
@@ -2,6 +2,8 @@
 import discord
 from discord.ext import commands
 import datetime
+import io
+import logs
 
 class Utilities(commands.Cog):
     def __init__(self, bot):
@@ -165,8 +167,13 @@ class Utilities(commands.Cog):
     @commands.command()
     async def servers(self, ctx):
         """Show how many servers the bot is in"""
-        server_count = len(self.bot.guilds)
-        member_count = sum(guild.member_count for guild in self.bot.guilds)
+        # Sharded bots add up every cluster's numbers over IPC
+        if hasattr(self.bot, "cluster_stats"):
+            clusters = await self.bot.cluster_stats()
+        else:
+            clusters = [{"guilds": len(self.bot.guilds), "members": sum(guild.member_count or 0 for guild in self.bot.guilds)}]
+        server_count = sum(cluster["guilds"] for cluster in clusters)
+        member_count = sum(cluster["members"] for cluster in clusters)
         
         embed = discord.Embed(
             title="📊 Bot Statistics",
@@ -175,9 +182,139 @@ class Utilities(commands.Cog):
         embed.add_field(name="Servers", value=server_count, inline=True)
         embed.add_field(name="Total Members", value=member_count, inline=True)
         embed.add_field(name="Ping", value=f"{round(self.bot.latency * 1000)}ms", inline=True)
+        if len(clusters) > 1:
+            shard_total = sum(len(cluster.get("shards", [])) for cluster in clusters)
+            embed.add_field(name="Clusters", value=f"{len(clusters)} ({shard_total} shards)", inline=True)
         
         await ctx.send(embed=embed)
 
+    @commands.command()
+    @commands.is_owner()
+    async def startupprofile(self, ctx):
+        """Show how long each cog took to load (Owner only)"""
+        loader = getattr(self.bot, "cog_loader", None)
+        if not loader:
+            await ctx.send("❌ No startup profile available.")
+            return
+        
+        lines = []
+        for profile in loader.report():
+            if profile.loaded:
+                lines.append(f"`{profile.name}` • import {profile.import_seconds * 1000:.1f} ms • setup {profile.setup_seconds * 1000:.1f} ms"
+                             + (" • deferred" if profile.deferred else ""))
+            elif profile.error:
+                lines.append(f"`{profile.name}` • ❌ {profile.error[:80]}")
+            else:
+                lines.append(f"`{profile.name}` • ⏸️ not loaded yet")
+        
+        embed = discord.Embed(
+            title="⏱️ Startup Profile",
+            description="\n".join(lines),
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Cog startup: {loader.startup_seconds * 1000:.0f} ms")
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.is_owner()
+    async def perf(self, ctx, action: str = None):
+        """Show where time goes: slowest listeners, commands, stages and writes (Owner only)
+        
+        !perf        - summary
+        !perf reset  - clear the timings
+        !perf prom   - the full Prometheus export as a file
+        """
+        registry = getattr(self.bot, "metrics", None)
+        if registry is None:
+            await ctx.send("❌ Metrics are not available.")
+            return
+        
+        if action == "reset":
+            registry.reset()
+            await ctx.send("✅ Performance metrics reset")
+            return
+        if action == "prom":
+            export = io.BytesIO(registry.render().encode())
+            await ctx.send(file=discord.File(export, filename="metrics.prom"))
+            return
+        
+        rows = registry.summary(limit=12)
+        lines = [
+            f"`{row['metric'].replace('_seconds', '')}:{row['labels']}` • {row['count']}× • "
+            f"avg {row['avg_ms']:.2f} ms • p95 {row['p95_ms']:.2f} ms • max {row['max_ms']:.1f} ms"
+            for row in rows
+        ]
+        
+        embed = discord.Embed(
+            title="⚡ Performance",
+            description="\n".join(lines) if lines else ("No timings recorded yet." if registry.enabled else "Metrics are disabled (METRICS_SETTINGS)."),
+            color=discord.Color.blue()
+        )
+        
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline:
+            embed.add_field(name="Messages", value=f"{pipeline.messages} ({pipeline.short_circuits} stopped early)", inline=True)
+        storage = getattr(self.bot, "storage", None)
+        if storage and hasattr(storage, "get_flush_stats"):
+            stats = storage.get_flush_stats()
+            embed.add_field(name="Storage", value=f"{stats['writes']} writes • {stats['writes_saved']} saved • {stats['pending_records']} pending", inline=True)
+            if getattr(storage, "lazy", False):
+                stats = storage.get_guild_stats()
+                embed.add_field(name="Guild Data", value=f"{stats['resident']} in memory • {stats['hits']} hits • "
+                                f"{stats['misses'] + stats['sync_misses']} loads • {stats['evictions']} evicted", inline=True)
+        cooldowns = getattr(self.bot, "cooldowns", None)
+        if cooldowns:
+            embed.add_field(name="Cooldowns", value=f"{len(cooldowns)} active • {cooldowns.stats['hits']} hits", inline=True)
+        ledger = getattr(self.bot, "xp_ledger", None)
+        if ledger:
+            stats = ledger.get_stats()
+            embed.add_field(name="XP Ledger", value=f"{stats['awards']} awards • {stats['flushes']} flushes • {stats['pending_guilds']} guilds pending", inline=True)
+        resolver = getattr(self.bot, "user_resolver", None)
+        if resolver:
+            stats = resolver.stats
+            embed.add_field(name="Name Lookups", value=f"{stats['member_hits'] + stats['cache_hits']} cached • {stats['fetches']} fetched", inline=True)
+        
+        embed.set_footer(text=f"Sorted by total time • {ctx.prefix}perf prom for the full export")
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.is_owner()
+    async def loglevel(self, ctx, name: str = None, level: str = None):
+        """Show or change log levels at runtime (Owner only)
+        
+        !loglevel                     - current levels and sampling
+        !loglevel level_system DEBUG  - cogs can be named without "cogs."
+        !loglevel root WARNING
+        """
+        if name and level:
+            if name == "root":
+                name = ""
+            elif "." not in name and f"cogs.{name}" in self.bot.extensions:
+                name = f"cogs.{name}"
+            try:
+                effective = logs.set_level(name, level)
+            except ValueError as e:
+                await ctx.send(f"❌ {e}")
+                return
+            await ctx.send(f"🔧 `{name or 'root'}` now logs at **{effective}**")
+            return
+        
+        sampling = logs.sampling_stats()
+        lines = []
+        for logger_name, logger_level in logs.levels().items():
+            line = f"`{logger_name}` • {logger_level}"
+            if logger_name in sampling:
+                line += f" • 1 in {sampling[logger_name]['every']} ({sampling[logger_name]['dropped']} dropped)"
+            lines.append(line)
+        
+        embed = discord.Embed(
+            title="📝 Log Levels",
+            description="\n".join(lines),
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"{ctx.prefix}loglevel <logger> <DEBUG|INFO|WARNING|ERROR>")
+        await ctx.send(embed=embed)
+
     @commands.command()
     async def info(self, ctx):
         """Get bot information"""
@@ -216,7 +353,9 @@ class Utilities(commands.Cog):
         
         embed.add_field(name="Username", value=f"{target.name}#{target.discriminator}", inline=True)
         embed.add_field(name="ID", value=target.id, inline=True)
-        embed.add_field(name="Status", value=str(target.status).title(), inline=True)
+        if ctx.bot.intents.presences:
+            # Without the presences intent (INTENT_PROFILE "auto"/"minimal") every member reads as offline
+            embed.add_field(name="Status", value=str(target.status).title(), inline=True)
         
         embed.add_field(name="Account Created", value=target.created_at.strftime("%Y-%m-%d"), inline=True)
         embed.add_field(name="Joined Server", value=target.joined_at.strftime("%Y-%m-%d") if target.joined_at else "N/A", inline=True)
@@ -10,6 +10,27 @@ BOT_TOKEN = "BOT.TOKEN"
 PREFIX = "!"
 DATABASE_URL = "sqlite:///merlin_data.db"
 
+# ===== STORAGE SETTINGS =====
+STORAGE_SETTINGS = {
+    "backend": "json",              # "json" (bot_data.json), "sharded" (file per guild+section), "journal"
+                                    # (snapshot + append-only journal), "snapshot" (compact bot_data.snap) or "sqlite";
+                                    # the others import bot_data.json on first start and leave it as it was -
+                                    # run `python storage.py export` before switching back to "json"
+    "sharded_dir": None,            # sharded: None = bot_data.guilds/
+    "lazy_guilds": False,           # sharded: read a guild's data on its first message/command, not at startup
+    "guild_memory_budget_mb": 256,  # lazy: past this (estimated) size, least recently used guilds are dropped
+    "guild_idle_seconds": 3600,     # lazy: drop guilds unused for this long (unsaved changes are written first)
+    "guild_record_bytes": 400,      # lazy: estimated memory per stored record, for the budget
+    "sqlite_file": "bot_data.db",
+    "snapshot_codec": "orjson",     # snapshot: "orjson" (falls back to json if not installed) or "json"
+    "snapshot_compression": None,   # snapshot: None, "gzip" or "zstd" (needs the zstandard package)
+    "snapshot_compression_level": None,  # None = gzip 6 / zstd 3
+    "compact_every_records": 10000, # journal: fold the journal into bot_data.snapshot after this many records
+    "compact_max_bytes": 16 * 1024 * 1024,  # ...or once the journal is this big
+    "flush_interval_seconds": 5,    # write once changes have been quiet this long
+    "max_flush_delay_seconds": 30   # never keep a change unsaved longer than this
+}
+
 # ===== BANNER SYSTEM =====
 AVAILABLE_BANNERS = {
     "default": {"name": "Default", "rarity": "common", "url": ""},
@@ -41,11 +62,50 @@ FRIEND_SETTINGS = {
 
 # ===== LEVEL SYSTEM =====
 LEVEL_SETTINGS = {
+    "curve": "quadratic",  # "quadratic" or "exponential" (uses xp_multiplier)
     "base_xp": 100,
     "xp_multiplier": 1.5,
     "message_xp_range": (15, 25),
     "cooldown_seconds": 3,
-    "max_level": 1000
+    "max_level": 1000,
+    "save_interval_seconds": 30  # how often level_data.json is written
+}
+
+# ===== COOLDOWNS =====
+COOLDOWN_SETTINGS = {
+    "max_entries": 50000  # oldest cooldowns are evicted past this many
+}
+
+# ===== USER NAME LOOKUPS =====
+USER_RESOLVER_SETTINGS = {
+    "ttl_seconds": 3600,          # how long fetched display names are reused
+    "max_entries": 10000,
+    "max_concurrent_fetches": 5
+}
+
+# ===== LOGGING =====
+LOG_SETTINGS = {
+    "level": "INFO",
+    # Per-logger overrides; cogs log as "cogs.<name>" (change at runtime with !loglevel)
+    "levels": {
+        "discord": "WARNING",
+        "cogs.level_system": "INFO",  # "DEBUG" logs every message's XP decision
+    },
+    # Keep 1 in N INFO/DEBUG records per message for per-message events
+    "sample_every": {
+        "cogs.level_system": 100,
+        "cogs.name_troll": 20,
+    },
+    "file": None  # e.g. "merlin.log" (rotated at 5 MB, one file per cluster)
+}
+
+# ===== METRICS =====
+METRICS_SETTINGS = {
+    "enabled": True,              # listener/command/stage/storage timings (!perf)
+    "export_file": None,          # e.g. "metrics.prom" for node_exporter's textfile collector
+    "export_port": None,          # e.g. 9108 to serve http://127.0.0.1:9108/metrics (+ cluster id)
+    "export_host": "127.0.0.1",
+    "export_interval_seconds": 15
 }
 
 # ===== AUTO-REPLY SYSTEM =====
@@ -109,6 +169,35 @@ COGS = [
     "cogs.achievement_system"  # Achievements & badges system
 ]
 
+# Command-only cogs loaded on their first command instead of at startup
+DEFERRED_COGS = [
+    "cogs.banner_system",
+    "cogs.social_system",
+]
+
+# ===== GATEWAY INTENTS & MEMBER CACHE =====
+INTENT_PROFILE = "auto"     # "auto" (from COGS below), "minimal", or "all" (every intent, incl. presences)
+MEMBER_CACHE = "on_demand"  # "on_demand" (no member lists), "joined" (cache members as seen), "all" (chunk every guild)
+GATEWAY_REPORT_SECONDS = 60  # measure events/min and RAM this long after startup (0 = no report)
+
+# Extra intents each cog needs on top of guilds/messages/message content
+COG_INTENTS = {
+    "cogs.events": ["members"],                 # on_member_join / on_member_remove
+    "cogs.fun": ["guild_reactions"],            # roast battle accept reaction
+    "cogs.social_system": ["guild_reactions"],  # marriage proposal reactions
+    "cogs.advanced_moderations": ["members"],   # kick/ban/mute member lookups
+}
+
+# ===== SHARDING (launcher.py) =====
+SHARDING = {
+    "processes": 1,            # cluster processes started by launcher.py
+    "shards_per_process": 1,
+    "shard_count": None,       # None = processes * shards_per_process
+    "ipc_host": "127.0.0.1",   # local hub for cross-cluster commands like !servers
+    "ipc_port": 20000,
+    "restart_delay_seconds": 10
+}
+
 # ===== BOT METADATA =====
 OWNER_IDS = [717689371293384766]  # Your Discord ID for owner commands
 DEBUG_MODE = False
@@ -0,0 +1,110 @@
+# cooldowns.py - Shared, bounded cooldown store for every cog
+import heapq
+import time
+from typing import Dict, Hashable, List, Tuple
+
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+class CooldownStore:
+    """Cooldowns keyed by (bucket, key), e.g. ("rep", user_id).
+
+    Stores the monotonic time a cooldown started. Entries sit in a heap
+    ordered by when they stop mattering and are dropped lazily on the next
+    access, so memory only holds users that are actually cooling down. If
+    the store still grows past max_entries, the entries closest to expiry
+    are evicted first.
+
+    A bucket may be checked with different lengths (!roast and !superroast
+    share "roast" at 10 and 30 seconds), so an entry is kept for the longest
+    length checked against it, or declared for its bucket with keep().
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._started: Dict[Tuple[str, Hashable], float] = {}
+        self._expires: Dict[Tuple[str, Hashable], float] = {}  # when each entry stops mattering
+        self._heap: List[Tuple[float, Tuple[str, Hashable]]] = []
+        # Longest cooldown seen (or declared) per bucket; an entry is kept that long after it starts
+        self._bucket_ttl: Dict[str, float] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def __len__(self):
+        return len(self._started)
+
+    def check(self, bucket: str, key: Hashable, seconds: float) -> bool:
+        """True if key is still on cooldown; otherwise start a new cooldown and return False"""
+        now = self.clock()
+        self._expire(now)
+        entry = (bucket, key)
+        ttl = max(seconds, self._bucket_ttl.get(bucket, 0))
+        self._bucket_ttl[bucket] = ttl
+        started = self._started.get(entry)
+        if started is not None and now - started < seconds:
+            self.stats['hits'] += 1
+            if started + ttl > self._expires[entry]:
+                # A longer cooldown on the same bucket: keep the entry until that one ends too
+                self._expires[entry] = started + ttl
+                heapq.heappush(self._heap, (started + ttl, entry))
+            return True
+
+        self.stats['misses'] += 1
+        self._started[entry] = now
+        self._expires[entry] = now + ttl
+        heapq.heappush(self._heap, (now + ttl, entry))
+        if len(self._started) > self.max_entries:
+            self._evict()
+        elif len(self._heap) > 2 * len(self._started) + 64:
+            self._compact()
+        return False
+
+    def remaining(self, bucket: str, key: Hashable, seconds: float) -> float:
+        """Seconds left on a cooldown of the given length (0 if not cooling down)"""
+        started = self._started.get((bucket, key))
+        if started is None:
+            return 0.0
+        return max(0.0, seconds - (self.clock() - started))
+
+    def reset(self, bucket: str, key: Hashable):
+        self._started.pop((bucket, key), None)
+        self._expires.pop((bucket, key), None)
+
+    def keep(self, bucket: str, seconds: float):
+        """Keep every entry of bucket at least this long (its longest cooldown, before anyone has used it)"""
+        self._bucket_ttl[bucket] = max(seconds, self._bucket_ttl.get(bucket, 0))
+
+    def _drop(self, entry: Tuple[str, Hashable]):
+        del self._started[entry]
+        del self._expires[entry]
+
+    def _expire(self, now: float):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires, entry = heapq.heappop(heap)
+            # Skip stale heap items for cooldowns that were restarted, extended or reset
+            if self._expires.get(entry) == expires:
+                self._drop(entry)
+                self.stats['expired'] += 1
+
+    def _evict(self):
+        heap = self._heap
+        while heap and len(self._started) > self.max_entries:
+            expires, entry = heapq.heappop(heap)
+            if self._expires.get(entry) == expires:
+                self._drop(entry)
+                self.stats['evictions'] += 1
+
+    def _compact(self):
+        """Drop stale heap items left behind by restarted or extended cooldowns"""
+        self._heap = [item for item in self._heap if self._expires.get(item[1]) == item[0]]
+        heapq.heapify(self._heap)
+
+
+def get_cooldowns(bot) -> CooldownStore:
+    """The bot-wide cooldown store (created on first use for bots that don't set one up)"""
+    store = getattr(bot, "cooldowns", None)
+    if store is None:
+        store = CooldownStore()
+        bot.cooldowns = store
+    return store
@@ -1,15 +1,133 @@
 #database.py
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
 import aiosqlite
 
-DB_PATH = "./leveling.db"  # your SQLite database file
-
-async def get_user(user_id: int):
-    try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute("SELECT xp, level, messages FROM users WHERE user_id = ?", (user_id,))
-            row = await cursor.fetchone()
-            await cursor.close()
-            return row
-    except Exception as e:
-        print(f"❌ Error fetching user {user_id}: {e}")
-        return None
+logger = logging.getLogger(__name__)
+
+READ_CONNECTIONS = 2      # pooled read-only connections per database
+CACHED_STATEMENTS = 128   # prepared statements kept per connection
+
+
+class ConnectionPool:
+    """Long-lived connections to one SQLite file.
+
+    All writes go through a single writer connection (SQLite only allows one
+    writer anyway); reads are spread over a small pool of connections that
+    WAL lets run alongside the writer. Each connection keeps its prepared
+    statements cached, so repeated queries skip parsing.
+    """
+
+    def __init__(self, path: str, readers: int = READ_CONNECTIONS):
+        self.path = path
+        self.reader_count = max(1, readers)
+        self.writer: Optional[aiosqlite.Connection] = None
+        self._readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._all_readers: List[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path, cached_statements=CACHED_STATEMENTS)
+        await db.execute("PRAGMA busy_timeout=5000")
+        if read_only:
+            await db.execute("PRAGMA query_only=ON")
+        else:
+            await db.execute("PRAGMA journal_mode=WAL")
+            await db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    async def open(self):
+        # Writer first so the file is switched to WAL before readers attach
+        self.writer = await self._connect(read_only=False)
+        for _ in range(self.reader_count):
+            reader = await self._connect(read_only=True)
+            self._all_readers.append(reader)
+            self._readers.put_nowait(reader)
+
+    async def close(self):
+        for reader in self._all_readers:
+            await reader.close()
+        self._all_readers.clear()
+        self._readers = asyncio.Queue()
+        if self.writer:
+            await self.writer.close()
+            self.writer = None
+
+    # -----------------------------
+    # READS
+    # -----------------------------
+    async def fetchone(self, sql: str, params: Iterable[Any] = ()):
+        reader = await self._readers.get()
+        try:
+            async with reader.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+        finally:
+            self._readers.put_nowait(reader)
+
+    async def fetchall(self, sql: str, params: Iterable[Any] = ()):
+        reader = await self._readers.get()
+        try:
+            async with reader.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+        finally:
+            self._readers.put_nowait(reader)
+
+    # -----------------------------
+    # WRITES
+    # -----------------------------
+    async def execute(self, sql: str, params: Iterable[Any] = ()):
+        """Run one write statement in its own transaction"""
+        async with self._write_lock:
+            try:
+                await self.writer.execute(sql, params)
+                await self.writer.commit()
+            except Exception:
+                await self.writer.rollback()
+                raise
+
+    async def executemany(self, sql: str, rows: Iterable[Iterable[Any]]):
+        async with self._write_lock:
+            try:
+                await self.writer.executemany(sql, rows)
+                await self.writer.commit()
+            except Exception:
+                await self.writer.rollback()
+                raise
+
+    async def executescript(self, script: str):
+        async with self._write_lock:
+            await self.writer.executescript(script)
+            await self.writer.commit()
+
+
+# -----------------------------
+# SHARED POOLS (one per database file)
+# -----------------------------
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = asyncio.Lock()
+
+
+async def get_pool(path: str) -> ConnectionPool:
+    """The shared pool for path, opened on first use"""
+    pool = _pools.get(path)
+    if pool:
+        return pool
+    async with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = ConnectionPool(path)
+            await pool.open()
+            _pools[path] = pool
+    return pool
+
+
+async def close_pools():
+    """Close every shared pool (called on bot shutdown)"""
+    while _pools:
+        _, pool = _pools.popitem()
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.error("❌ Error closing database %s: %s", pool.path, e)
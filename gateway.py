@@ -0,0 +1,152 @@
+# gateway.py - Gateway intents and member caching derived from the loaded cogs
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger("MerlinBot")
+
+# Every profile gets these: prefix commands need message content, and guilds is required for caching
+BASE_INTENTS = ("guilds", "guild_messages", "dm_messages", "message_content")
+
+PROFILES = ("auto", "minimal", "all")
+MEMBER_CACHE_POLICIES = ("on_demand", "joined", "all")
+
+
+def build_intents(profile: str, cogs: Iterable[str], cog_intents: Dict[str, List[str]]) -> discord.Intents:
+    """Intents for a profile.
+
+    all     - everything (the old behaviour, including presences)
+    minimal - BASE_INTENTS only
+    auto    - BASE_INTENTS plus whatever the loaded cogs declare in COG_INTENTS
+    """
+    if profile == "all":
+        return discord.Intents.all()
+    if profile not in PROFILES:
+        logger.warning(f"⚠️ Unknown intent profile '{profile}', using 'auto'")
+        profile = "auto"
+
+    names = set(BASE_INTENTS)
+    if profile == "auto":
+        for cog in cogs:
+            names.update(cog_intents.get(cog, ()))
+
+    intents = discord.Intents.none()
+    for name in names:
+        setattr(intents, name, True)
+    return intents
+
+
+def build_member_cache(policy: str, intents: discord.Intents) -> Tuple[discord.MemberCacheFlags, bool]:
+    """(member_cache_flags, chunk_guilds_at_startup) for a cache policy.
+
+    on_demand - keep no member lists; members come from the message payload
+                or are looked up when a command needs them
+    joined    - cache members as they show up, but never download full lists
+    all       - download and keep every member of every guild (old behaviour)
+    """
+    if policy == "all" and intents.members:
+        return discord.MemberCacheFlags.from_intents(intents), True
+    if policy == "joined" and intents.members:
+        return discord.MemberCacheFlags(joined=True, voice=intents.voice_states), False
+    if policy not in MEMBER_CACHE_POLICIES:
+        logger.warning(f"⚠️ Unknown member cache policy '{policy}', using 'on_demand'")
+    return discord.MemberCacheFlags.none(), False
+
+
+def rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+class GatewayMonitor:
+    """Counts gateway events and reports RAM/event rate once the bot has settled.
+
+    Events are only counted during the report window: the listener is
+    attached for it and removed afterwards, so the rest of the bot's life
+    pays nothing per event. Each run's numbers are saved per profile in
+    report_file, so the report can show the difference against the last
+    run with the 'all' profile.
+    """
+
+    def __init__(self, profile: str, member_cache: str, window: float = 60, report_file: str = "gateway_profile.json"):
+        self.profile = profile
+        self.member_cache = member_cache
+        self.window = window
+        self.report_file = report_file
+        self.events: Counter = Counter()
+        self._reported = False
+
+    async def on_event(self, event_type: str):
+        self.events[event_type] += 1
+
+    def _load_history(self) -> Dict:
+        try:
+            with open(self.report_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_history(self, history: Dict):
+        try:
+            with open(self.report_file, 'w') as f:
+                json.dump(history, f, indent=2)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save gateway report: {e}")
+
+    async def report_after_ready(self, bot):
+        """Measure over the first window after on_ready, log it, and compare with the 'all' baseline"""
+        if self._reported or self.window <= 0:
+            return
+        self._reported = True
+        self.events.clear()
+        bot.add_listener(self.on_event, "on_socket_event_type")
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            bot.remove_listener(self.on_event, "on_socket_event_type")
+
+        per_minute = sum(self.events.values()) * 60 / self.window
+        memory = rss_mb()
+        cached_members = sum(len(guild.members) for guild in bot.guilds)
+        key = f"{self.profile}/{self.member_cache}"
+        top = ", ".join(f"{name} {count}" for name, count in self.events.most_common(5)) or "none"
+
+        memory_text = f"{memory:.1f} MB RSS, " if memory is not None else ""
+        logger.info(f"📡 Gateway profile '{key}': {per_minute:.0f} events/min, {memory_text}{cached_members} cached members")
+        logger.info(f"📡 Busiest events: {top}")
+
+        history = self._load_history()
+        history[key] = {
+            "events_per_minute": round(per_minute, 1),
+            "rss_mb": round(memory, 1) if memory is not None else None,
+            "cached_members": cached_members,
+            "guilds": len(bot.guilds),
+            "measured_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self._save_history(history)
+
+        baseline = next((value for name, value in history.items() if name.startswith("all/") and name != key), None)
+        if baseline:
+            event_drop = baseline["events_per_minute"] - per_minute
+            line = f"📉 vs 'all' intents: {event_drop:+.0f} fewer events/min"
+            if memory is not None and baseline.get("rss_mb") is not None:
+                line += f", {baseline['rss_mb'] - memory:+.1f} MB less RSS"
+            logger.info(line + f" (baseline from {baseline['measured_at']})")
+        elif self.profile != "all":
+            logger.info("📉 No 'all' baseline yet - run once with INTENT_PROFILE = \"all\" to measure the reduction")
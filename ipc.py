@@ -0,0 +1,175 @@
+# ipc.py - Local message hub so cluster processes can answer cross-shard commands
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 20000
+
+# Wire format: one JSON object per line
+#   hello    {"type": "hello", "cluster": 0}
+#   request  {"type": "request", "id": 7, "op": "stats", "payload": {...}}
+#   response {"type": "response", "id": 7, "data": ...}
+#   result   {"type": "result", "id": 7, "data": [..one entry per cluster..]}
+
+
+async def _send(writer: asyncio.StreamWriter, message: Dict):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+class IPCHub:
+    """Runs in launcher.py. Fans each request out to every cluster and returns the collected answers."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.clients: Dict[int, asyncio.StreamWriter] = {}
+        self._waiting: Dict[int, Dict[int, asyncio.Future]] = {}
+        self._ids = itertools.count(1)
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"📡 IPC hub listening on {self.host}:{self.port}")
+
+    async def close(self):
+        for writer in list(self.clients.values()):
+            writer.close()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        cluster_id = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                kind = message.get("type")
+                if kind == "hello":
+                    cluster_id = message["cluster"]
+                    self.clients[cluster_id] = writer
+                elif kind == "request":
+                    asyncio.create_task(self._fan_out(writer, message))
+                elif kind == "response":
+                    future = self._waiting.get(message["id"], {}).get(cluster_id)
+                    if future and not future.done():
+                        future.set_result(message.get("data"))
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ IPC connection from cluster {cluster_id} dropped: {e}")
+        finally:
+            if cluster_id is not None and self.clients.get(cluster_id) is writer:
+                del self.clients[cluster_id]
+            writer.close()
+
+    async def _fan_out(self, requester: asyncio.StreamWriter, message: Dict):
+        hub_id = next(self._ids)
+        loop = asyncio.get_running_loop()
+        futures = {cluster_id: loop.create_future() for cluster_id in self.clients}
+        self._waiting[hub_id] = futures
+        forward = {"type": "request", "id": hub_id, "op": message["op"], "payload": message.get("payload")}
+        try:
+            for cluster_id, writer in list(self.clients.items()):
+                try:
+                    await _send(writer, forward)
+                except ConnectionError:
+                    futures[cluster_id].set_result(None)
+            done = set()
+            if futures:
+                done, _ = await asyncio.wait(futures.values(), timeout=self.timeout)
+            data = [future.result() for future in futures.values() if future in done and future.result() is not None]
+            await _send(requester, {"type": "result", "id": message["id"], "data": data})
+        except ConnectionError:
+            pass
+        finally:
+            del self._waiting[hub_id]
+
+
+Handler = Callable[[Optional[Dict]], Awaitable[Any]]
+
+
+class IPCClient:
+    """Runs in each cluster. Answers the hub's requests and can broadcast its own."""
+
+    def __init__(self, cluster_id: int, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 6.0):
+        self.cluster_id = cluster_id
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.handlers: Dict[str, Handler] = {}
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self._results: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None
+
+    def handler(self, op: str, callback: Handler):
+        self.handlers[op] = callback
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    async def _run(self):
+        """Stay connected to the hub, reconnecting if it goes away"""
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                self.writer = writer
+                await _send(writer, {"type": "hello", "cluster": self.cluster_id})
+                logger.info(f"📡 Cluster {self.cluster_id} connected to IPC hub")
+                async for line in reader:
+                    await self._dispatch(json.loads(line))
+            except (ConnectionError, OSError, json.JSONDecodeError) as e:
+                logger.warning(f"⚠️ IPC hub unavailable ({e}), retrying")
+            self.writer = None
+            await asyncio.sleep(5)
+
+    async def _dispatch(self, message: Dict):
+        kind = message.get("type")
+        if kind == "result":
+            future = self._results.pop(message["id"], None)
+            if future and not future.done():
+                future.set_result(message.get("data", []))
+        elif kind == "request":
+            asyncio.create_task(self._answer(message))
+
+    async def _answer(self, message: Dict):
+        callback = self.handlers.get(message["op"])
+        data = None
+        if callback:
+            try:
+                data = await callback(message.get("payload"))
+            except Exception as e:
+                logger.error(f"❌ IPC handler '{message['op']}' failed: {e}")
+        if self.writer:
+            await _send(self.writer, {"type": "response", "id": message["id"], "data": data})
+
+    async def broadcast(self, op: str, payload: Optional[Dict] = None) -> List[Any]:
+        """Ask every cluster (including this one); returns their answers"""
+        if not self.writer:
+            raise ConnectionError("not connected to the IPC hub")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._results[request_id] = future
+        try:
+            await _send(self.writer, {"type": "request", "id": request_id, "op": op, "payload": payload})
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._results.pop(request_id, None)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Run Merlin as several processes, each owning a slice of the shards.
+
+Usage:
+    python launcher.py             - start every cluster from config.SHARDING
+    python launcher.py partition   - split bot_data.json / level_data.json per cluster
+                                     (run once before the first sharded start, and
+                                     again whenever processes or shard_count change)
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+
+import config
+from ipc import IPCHub
+from sharding import ClusterInfo, partition_path, plan_clusters, split_by_guild
+from storage import Config as StorageConfig, JournalBackend, ShardedJsonBackend, SnapshotBackend
+from xp_ledger import DEFAULT_DATA_FILE as LEVEL_DATA_FILE
+
+logger = logging.getLogger("MerlinLauncher")
+logger.setLevel(logging.INFO)
+_handler = logging.StreamHandler()
+_handler.setFormatter(logging.Formatter("[%(asctime)s] [launcher] %(message)s"))
+logger.addHandler(_handler)
+
+SETTINGS = getattr(config, "SHARDING", {})
+PROCESSES = SETTINGS.get("processes", 1)
+SHARD_COUNT = SETTINGS.get("shard_count") or PROCESSES * SETTINGS.get("shards_per_process", 1)
+IPC_HOST = SETTINGS.get("ipc_host", "127.0.0.1")
+IPC_PORT = SETTINGS.get("ipc_port", 20000)
+RESTART_DELAY = SETTINGS.get("restart_delay_seconds", 10)
+
+
+# -----------------------------
+# DATA PARTITIONING
+# -----------------------------
+STORAGE_BACKEND = StorageConfig.STORAGE_SETTINGS.get("backend", "json")
+
+
+def _sharded_dir(cluster_id=None) -> str:
+    root, _ = os.path.splitext(StorageConfig.DATA_FILE)
+    directory = StorageConfig.STORAGE_SETTINGS.get("sharded_dir") or f"{root}.guilds"
+    return partition_path(directory, cluster_id) if cluster_id is not None else directory
+
+
+def _read_storage(cluster_id=None):
+    """bot_data for the base files or one cluster, through the configured backend's files"""
+    json_file = partition_path(StorageConfig.DATA_FILE, cluster_id) if cluster_id is not None else StorageConfig.DATA_FILE
+    if STORAGE_BACKEND == "journal":
+        return JournalBackend(json_file, legacy_json=json_file).read()[0]
+    if STORAGE_BACKEND == "sharded":
+        return ShardedJsonBackend(_sharded_dir(cluster_id), legacy_json=json_file).read()
+    if STORAGE_BACKEND == "snapshot":
+        root, _ = os.path.splitext(StorageConfig.DATA_FILE)
+        snapshot_file = partition_path(f"{root}.snap", cluster_id) if cluster_id is not None else f"{root}.snap"
+        return SnapshotBackend(snapshot_file, legacy_json=json_file).read()
+    if not os.path.exists(json_file):
+        return None
+    with open(json_file, 'r') as f:
+        return json.load(f)
+
+
+def _cluster_ids(patterns):
+    """Cluster numbers that have files matching any of the patterns (name.clusterN.ext)"""
+    ids = set()
+    for pattern in patterns:
+        for file in glob.glob(pattern):
+            match = re.search(r"\.cluster(\d+)\.", os.path.basename(file))
+            if match:
+                ids.add(int(match.group(1)))
+    return sorted(ids)
+
+
+def _storage_patterns(path: str):
+    root, ext = os.path.splitext(path)
+    patterns = [f"{root}.cluster*{ext}"]
+    if STORAGE_BACKEND == "journal":
+        patterns += [f"{root}.cluster*.snapshot", f"{root}.cluster*.journal"]
+    elif STORAGE_BACKEND == "sharded":
+        sharded_root, sharded_ext = os.path.splitext(_sharded_dir())
+        patterns.append(f"{sharded_root}.cluster*{sharded_ext}")
+    elif STORAGE_BACKEND == "snapshot":
+        patterns.append(f"{root}.cluster*.snap")
+    return patterns
+
+
+def _read_all(path: str, sectioned: bool):
+    """Unpartitioned data plus any existing cluster data, merged (cluster data wins)"""
+    merged = {}
+    root, ext = os.path.splitext(path)
+    patterns = _storage_patterns(path) if sectioned else [f"{root}.cluster*{ext}"]
+    for cluster_id in [None] + _cluster_ids(patterns):
+        if sectioned:
+            data = _read_storage(cluster_id)
+        else:
+            file = partition_path(path, cluster_id) if cluster_id is not None else path
+            data = None
+            if os.path.exists(file):
+                with open(file, 'r') as f:
+                    data = json.load(f)
+        if not data:
+            continue
+        if sectioned:
+            for section, servers in data.items():
+                merged.setdefault(section, {}).update(servers)
+        else:
+            merged.update(data)
+    return merged
+
+
+def partition():
+    clusters = plan_clusters(SHARD_COUNT, PROCESSES)
+    for path, sectioned in ((StorageConfig.DATA_FILE, True), (LEVEL_DATA_FILE, False)):
+        data = _read_all(path, sectioned)
+        if not data:
+            logger.info(f"⏭️ {path}: nothing to partition")
+            continue
+        parts = split_by_guild(data, clusters, SHARD_COUNT, sectioned)
+        root, ext = os.path.splitext(path)
+        # Write every partition beside its target first, so a failed write leaves the old files intact
+        targets = [partition_path(path, cluster_id) for cluster_id in range(len(parts))]
+        written = []
+        try:
+            for target, part in zip(targets, parts):
+                tmp_path = f"{target}.tmp"
+                written.append(tmp_path)
+                with open(tmp_path, 'w') as f:
+                    json.dump(part, f, indent=2)
+        except OSError:
+            for tmp_path in written:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+        # Each cluster re-imports its new JSON partition into its backend's files on start
+        keep = set(targets) | set(written)
+        for pattern in (_storage_patterns(path) if sectioned else [f"{root}.cluster*{ext}"]):
+            for stale in glob.glob(pattern):
+                if stale in keep:
+                    continue
+                if os.path.isdir(stale):
+                    shutil.rmtree(stale)
+                else:
+                    os.remove(stale)
+        for target, tmp_path, part in zip(targets, written, parts):
+            os.replace(tmp_path, target)
+            guilds = len(part) if not sectioned else len({key for servers in part.values() for key in servers})
+            logger.info(f"✅ {target}: {guilds} guild(s)")
+    if STORAGE_BACKEND == "sqlite":
+        logger.warning("⚠️ sqlite storage: each cluster migrates its partitioned JSON on first start")
+
+
+# -----------------------------
+# CLUSTER PROCESSES
+# -----------------------------
+async def run_cluster(info: ClusterInfo, stopping: asyncio.Event):
+    """Keep one cluster process alive until the launcher stops"""
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    while not stopping.is_set():
+        env = dict(os.environ, **info.env())
+        process = await asyncio.create_subprocess_exec(sys.executable, app, env=env)
+        logger.info(f"🚀 Cluster {info.cluster_id} started (pid {process.pid}, shards {info.shard_ids})")
+        stop_wait = asyncio.create_task(stopping.wait())
+        exit_wait = asyncio.create_task(process.wait())
+        await asyncio.wait({stop_wait, exit_wait}, return_when=asyncio.FIRST_COMPLETED)
+        if stopping.is_set():
+            exit_wait.cancel()
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            return
+        stop_wait.cancel()
+        logger.error(f"❌ Cluster {info.cluster_id} exited with code {process.returncode}, restarting in {RESTART_DELAY}s")
+        try:
+            await asyncio.wait_for(stopping.wait(), RESTART_DELAY)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    clusters = plan_clusters(SHARD_COUNT, PROCESSES)
+    logger.info(f"🤖 Starting {len(clusters)} cluster(s) for {SHARD_COUNT} shard(s)")
+
+    hub = IPCHub(IPC_HOST, IPC_PORT)
+    await hub.start()
+
+    stopping = asyncio.Event()
+    tasks = [
+        asyncio.create_task(run_cluster(ClusterInfo(cluster_id, shards, SHARD_COUNT, IPC_PORT), stopping))
+        for cluster_id, shards in enumerate(clusters)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        stopping.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await hub.close()
+        logger.info("🛑 All clusters stopped")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["partition"]:
+        partition()
+    elif sys.argv[1:]:
+        print(__doc__)
+        sys.exit(1)
+    else:
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
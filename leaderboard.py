@@ -0,0 +1,198 @@
+# leaderboard.py - Incremental XP rankings and guild statistics
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class RankIndex:
+    """XP ranking for one guild, kept sorted as XP changes.
+
+    Entries are (-xp, user_key) tuples stored in a list of small sorted
+    buckets. A Fenwick tree over the bucket sizes turns "how many users are
+    ahead of me" into an O(log n) query, and reading the top N only walks
+    the first bucket(s).
+    """
+
+    LOAD = 512  # target bucket size; buckets split at twice this
+
+    def __init__(self, items: Iterable[Tuple[str, int]] = ()):
+        self._xp: Dict[str, int] = {}
+        entries = []
+        for user_key, xp in items:
+            self._xp[user_key] = xp
+            entries.append((-xp, user_key))
+        entries.sort()
+        self._buckets: List[List[Tuple[int, str]]] = [
+            entries[i:i + self.LOAD] for i in range(0, len(entries), self.LOAD)
+        ]
+        self._rebuild()
+
+    def __len__(self):
+        return len(self._xp)
+
+    def __contains__(self, user_key):
+        return user_key in self._xp
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _rebuild(self):
+        """Recompute bucket maxima and the Fenwick tree (only after a split/merge)"""
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        size = len(self._buckets)
+        tree = [0] * (size + 1)
+        for i, bucket in enumerate(self._buckets, 1):
+            tree[i] += len(bucket)
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, index: int, delta: int):
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def _tree_prefix(self, index: int) -> int:
+        """Number of entries in buckets [0, index)"""
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def _locate(self, entry: Tuple[int, str]) -> int:
+        index = bisect_left(self._maxes, entry)
+        return min(index, len(self._buckets) - 1)
+
+    def _insert(self, entry: Tuple[int, str]):
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._rebuild()
+            return
+        index = self._locate(entry)
+        bucket = self._buckets[index]
+        insort(bucket, entry)
+        self._maxes[index] = bucket[-1]
+        if len(bucket) > 2 * self.LOAD:
+            self._buckets[index:index + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._rebuild()
+        else:
+            self._tree_add(index, 1)
+
+    def _remove(self, entry: Tuple[int, str]):
+        index = self._locate(entry)
+        bucket = self._buckets[index]
+        pos = bisect_left(bucket, entry)
+        if pos == len(bucket) or bucket[pos] != entry:
+            return
+        del bucket[pos]
+        if not bucket:
+            del self._buckets[index]
+            self._rebuild()
+            return
+        self._maxes[index] = bucket[-1]
+        self._tree_add(index, -1)
+
+    # -----------------------------
+    # PUBLIC API
+    # -----------------------------
+    def update(self, user_key: str, xp: int):
+        """Set a user's XP, moving them to their new position"""
+        old_xp = self._xp.get(user_key)
+        if old_xp == xp:
+            return
+        if old_xp is not None:
+            self._remove((-old_xp, user_key))
+        self._xp[user_key] = xp
+        self._insert((-xp, user_key))
+
+    def discard(self, user_key: str):
+        old_xp = self._xp.pop(user_key, None)
+        if old_xp is not None:
+            self._remove((-old_xp, user_key))
+
+    def rank(self, user_key: str) -> Optional[int]:
+        """1-based rank of a user, or None if they have no XP entry"""
+        xp = self._xp.get(user_key)
+        if xp is None:
+            return None
+        entry = (-xp, user_key)
+        index = self._locate(entry)
+        return self._tree_prefix(index) + bisect_left(self._buckets[index], entry) + 1
+
+    def top(self, count: int = 10) -> List[Tuple[str, int]]:
+        """The highest-XP users as (user_key, xp), best first"""
+        result = []
+        for bucket in self._buckets:
+            for neg_xp, user_key in bucket:
+                if len(result) >= count:
+                    return result
+                result.append((user_key, -neg_xp))
+        return result
+
+
+class GuildStats:
+    """Running XP/message totals and a level histogram for one guild.
+
+    Updated on every XP change so !xpstats never has to scan members.
+    Percentiles walk the histogram, which has at most one bucket per level.
+    """
+
+    def __init__(self, level_of: Callable[[int], int], members: Iterable[Tuple[int, int]] = (),
+                 levels_of: Optional[Callable[[List[int]], List[int]]] = None):
+        self.level_of = level_of
+        members = list(members)
+        xps = [xp for xp, _ in members]
+        # The starting histogram comes from one batch conversion when levels_of is given
+        levels = levels_of(xps) if levels_of else [level_of(xp) for xp in xps]
+        self.users = len(members)
+        self.total_xp = sum(xps)
+        self.total_messages = sum(messages for _, messages in members)
+        self.level_sum = sum(levels)
+        self.histogram: Counter = Counter(levels)
+
+    def add_user(self, xp: int = 0, messages: int = 0):
+        level = self.level_of(xp)
+        self.users += 1
+        self.total_xp += xp
+        self.total_messages += messages
+        self.level_sum += level
+        self.histogram[level] += 1
+
+    def record(self, old_xp: int, new_xp: int, messages: int = 0):
+        """An existing member went from old_xp to new_xp (and sent messages more messages)"""
+        self.total_xp += new_xp - old_xp
+        self.total_messages += messages
+        old_level, new_level = self.level_of(old_xp), self.level_of(new_xp)
+        if old_level != new_level:
+            self.level_sum += new_level - old_level
+            self.histogram[old_level] -= 1
+            if not self.histogram[old_level]:
+                del self.histogram[old_level]
+            self.histogram[new_level] += 1
+
+    @property
+    def average_xp(self) -> float:
+        return self.total_xp / self.users if self.users else 0.0
+
+    @property
+    def average_level(self) -> float:
+        return self.level_sum / self.users if self.users else 0.0
+
+    def percentile(self, percent: float) -> int:
+        """Level at or below which percent% of members sit (0 with no members)"""
+        if not self.users:
+            return 0
+        target = max(1, -(-self.users * percent // 100))
+        seen = 0
+        for level in sorted(self.histogram):
+            seen += self.histogram[level]
+            if seen >= target:
+                return level
+        return max(self.histogram)
+
+    @property
+    def median_level(self) -> int:
+        return self.percentile(50)
@@ -0,0 +1,100 @@
+# level_curve.py - The one XP -> level curve used by every cog
+from bisect import bisect_right
+from functools import partial
+from math import isqrt
+from typing import Dict, Iterable, List, Optional
+
+CURVES = ("quadratic", "exponential")
+
+
+class LevelCurve:
+    """XP thresholds for every level, computed once.
+
+    Everyone starts at level 1 with 0 XP. Curves:
+      quadratic   - level L needs (L - 1)^2 * base_xp total XP
+      exponential - level L needs base_xp * xp_multiplier^(L - 2) total XP
+    Levels stop at max_level.
+    """
+
+    def __init__(self, curve: str = "quadratic", base_xp: int = 100, xp_multiplier: float = 1.5,
+                 max_level: int = 1000):
+        if curve not in CURVES:
+            raise ValueError(f"Unknown level curve '{curve}' (expected one of {', '.join(CURVES)})")
+        self.curve = curve
+        self.base_xp = base_xp
+        self.xp_multiplier = xp_multiplier
+        self.max_level = max(1, max_level)
+        # thresholds[i] = total XP needed to reach level i + 1
+        self.thresholds: List[int] = [self._formula(level) for level in range(1, self.max_level + 1)]
+
+    def _formula(self, level: int) -> int:
+        if level <= 1:
+            return 0
+        if self.curve == "quadratic":
+            return (level - 1) ** 2 * self.base_xp
+        return int(self.base_xp * self.xp_multiplier ** (level - 2))
+
+    def level_for(self, xp: int) -> int:
+        """Level reached with xp total XP"""
+        if xp <= 0:
+            return 1
+        if self.curve == "quadratic":
+            level = isqrt(int(xp) // self.base_xp) + 1
+            return min(level, self.max_level)
+        return bisect_right(self.thresholds, xp)
+
+    def xp_for_level(self, level: int) -> int:
+        """Total XP needed to reach level"""
+        if 1 <= level <= self.max_level:
+            return self.thresholds[level - 1]
+        return self._formula(level)
+
+    def levels_for(self, xps: Iterable[int]) -> List[int]:
+        """level_for() over a whole guild in one pass (GuildStats' starting histogram)"""
+        if self.curve == "quadratic":
+            base, cap = self.base_xp, self.max_level
+            return [min(isqrt(int(xp) // base) + 1, cap) if xp > 0 else 1 for xp in xps]
+        return [level or 1 for level in map(partial(bisect_right, self.thresholds), xps)]
+
+    def progress(self, xp: int) -> Dict[str, int]:
+        """Level plus how far into it xp is, for progress bars"""
+        level = self.level_for(xp)
+        floor = self.xp_for_level(level)
+        if level >= self.max_level:
+            required = 0
+        else:
+            required = self.xp_for_level(level + 1) - floor
+        current = xp - floor
+        percentage = min(100, int(current / required * 100)) if required > 0 else 100
+        return {
+            "level": level,
+            "current_xp": int(current),
+            "required_xp": int(required),
+            "progress_percentage": percentage,
+            "total_xp": xp
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> "LevelCurve":
+        return cls(
+            curve=settings.get("curve", "quadratic"),
+            base_xp=settings.get("base_xp", 100),
+            xp_multiplier=settings.get("xp_multiplier", 1.5),
+            max_level=settings.get("max_level", 1000)
+        )
+
+
+_curve: Optional[LevelCurve] = None
+
+
+def get_curve() -> LevelCurve:
+    """The curve configured in config.LEVEL_SETTINGS (built on first use)"""
+    global _curve
+    if _curve is None:
+        try:
+            import config
+            settings = getattr(config, "LEVEL_SETTINGS", {})
+        except ImportError:
+            settings = {}
+        _curve = LevelCurve.from_settings(settings)
+    return _curve
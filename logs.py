@@ -0,0 +1,124 @@
+# logs.py - Queue-backed logging, per-module levels and sampling for chatty events
+import logging
+import logging.handlers
+import queue
+from collections import Counter
+from typing import Dict, Optional
+
+DEFAULT_FORMAT = "[%(asctime)s] [%(levelname)s] %(message)s"
+LEVEL_NAMES = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_samplers: Dict[str, "SamplingFilter"] = {}
+
+
+class SamplingFilter(logging.Filter):
+    """Passes the first record of each message template, then one in every `every`.
+
+    Meant for per-message events: with lazy %-style logging the template
+    (record.msg) is the same for every message, so it makes a good key.
+    WARNING and above always get through.
+    """
+
+    def __init__(self, every: int, max_level: int = logging.INFO):
+        super().__init__()
+        self.every = max(1, every)
+        self.max_level = max_level
+        self.seen: Counter = Counter()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1 or record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg)
+        count = self.seen[key]
+        self.seen[key] = count + 1
+        if count % self.every == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+def setup_logging(settings: Optional[Dict] = None, fmt: str = DEFAULT_FORMAT) -> logging.handlers.QueueListener:
+    """Send every logger's records through a queue to a background thread.
+
+    settings (config.LOG_SETTINGS):
+        level        - root level, e.g. "INFO"
+        levels       - {"logger name": "LEVEL"} overrides (cogs log as "cogs.<name>")
+        sample_every - {"logger name": N} keep 1 in N INFO/DEBUG records per message template
+        file         - optional log file (rotated at 5 MB)
+    """
+    global _listener, _queue_handler
+    settings = settings or {}
+    stop_logging()
+
+    formatter = logging.Formatter(fmt)
+    handlers = [logging.StreamHandler()]
+    if settings.get("file"):
+        handlers.append(logging.handlers.RotatingFileHandler(
+            settings["file"], maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # The event loop only pays for the enqueue; formatting output and I/O happen on the listener thread
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(records)
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(settings.get("level", "INFO"))
+
+    for name, level in settings.get("levels", {}).items():
+        logging.getLogger(name).setLevel(level)
+    for name, every in settings.get("sample_every", {}).items():
+        set_sampling(name, every)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush the queue and detach (safe to call when logging was never set up)"""
+    global _listener, _queue_handler
+    if _listener:
+        _listener.stop()
+        _listener = None
+    if _queue_handler:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def set_level(name: str, level: str) -> str:
+    """Change a logger's level at runtime; returns the level now in effect"""
+    level = level.upper()
+    if level not in LEVEL_NAMES:
+        raise ValueError(f"unknown level '{level}' (use one of {', '.join(LEVEL_NAMES)})")
+    logger = logging.getLogger(name or None)
+    logger.setLevel(level)
+    return logging.getLevelName(logger.getEffectiveLevel())
+
+
+def set_sampling(name: str, every: int):
+    """Keep 1 in `every` INFO/DEBUG records of a logger (1 turns sampling off)"""
+    logger = logging.getLogger(name)
+    old = _samplers.pop(name, None)
+    if old:
+        logger.removeFilter(old)
+    if every > 1:
+        _samplers[name] = SamplingFilter(every)
+        logger.addFilter(_samplers[name])
+
+
+def levels() -> Dict[str, str]:
+    """Effective level of the root logger and every logger with its own level or sampling"""
+    result = {"root": logging.getLevelName(logging.getLogger().level)}
+    for name, logger in sorted(logging.root.manager.loggerDict.items()):
+        if isinstance(logger, logging.Logger) and (logger.level or name in _samplers):
+            result[name] = logging.getLevelName(logger.getEffectiveLevel())
+    return result
+
+
+def sampling_stats() -> Dict[str, Dict[str, int]]:
+    return {name: {"every": sampler.every, "dropped": sampler.dropped} for name, sampler in _samplers.items()}
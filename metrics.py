@@ -0,0 +1,310 @@
+# metrics.py - Counters and latency histograms for the hot paths, with Prometheus text export
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("MerlinBot")
+
+# Seconds; fixed so observe() is one bisect and an increment
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NULL_TIMER = nullcontext()
+
+# A collector returns (metric name, labels, value) samples; read only at export time
+Sample = Tuple[str, Dict[str, str], float]
+Collector = Callable[[], Iterable[Sample]]
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labelnames: Tuple[str, ...]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        if not self.registry.enabled:
+            return
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size  # per bucket, +Inf last; made cumulative on export
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Histogram:
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple, _HistogramSeries] = {}
+
+    def observe(self, value: float, *labels):
+        if not self.registry.enabled:
+            return
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.count += 1
+        series.sum += value
+        if value > series.max:
+            series.max = value
+
+    def time(self, *labels):
+        """with histogram.time("label"): ... - a shared no-op when metrics are disabled"""
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def quantile(self, labels: Tuple, q: float) -> Optional[float]:
+        """Estimate from the buckets (linear inside the bucket that holds the q-th observation)"""
+        series = self.series.get(labels)
+        if not series or not series.count:
+            return None
+        target = q * series.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (series.max,), series.counts):
+            if count and seen + count >= target:
+                upper = min(upper, series.max)
+                return lower + (upper - lower) * (target - seen) / count
+            seen += count
+            lower = upper
+        return series.max
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{label_text} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Every metric the bot keeps. Disabled, observe()/inc() return at once and time() is a shared no-op."""
+
+    def __init__(self, enabled: bool = True, prefix: str = "merlin_"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.metrics: Dict[str, object] = {}
+        self.collectors: Dict[str, Collector] = {}
+        self.started = time.time()
+
+    def counter(self, name: str, help: str = "", labels: Iterable[str] = ()) -> Counter:
+        name = self.prefix + name
+        if name not in self.metrics:
+            self.metrics[name] = Counter(self, name, help, tuple(labels))
+        return self.metrics[name]
+
+    def histogram(self, name: str, help: str = "", labels: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        name = self.prefix + name
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(self, name, help, tuple(labels), buckets)
+        return self.metrics[name]
+
+    def collector(self, name: str, callback: Collector):
+        """Register (or replace) a callback that reports existing stats dicts at export time"""
+        self.collectors[name] = callback
+
+    def remove_collector(self, name: str):
+        self.collectors.pop(name, None)
+
+    def _collected(self) -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+        samples: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+        for source, callback in list(self.collectors.items()):
+            try:
+                for name, labels, value in callback():
+                    if value is not None:
+                        samples.setdefault(self.prefix + name, []).append((labels, value))
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector '{source}' failed: {e}")
+        return samples
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = [f"# TYPE {self.prefix}uptime_seconds gauge",
+                 f"{self.prefix}uptime_seconds {time.time() - self.started:.0f}"]
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        for name, samples in sorted(self._collected().items()):
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = _format_labels(tuple(labels), tuple(labels.values()))
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, limit: int = 10) -> List[Dict]:
+        """Histogram series with the most total time, for !perf"""
+        rows = []
+        for metric in self.metrics.values():
+            if not isinstance(metric, Histogram):
+                continue
+            for labels, series in metric.series.items():
+                rows.append({
+                    'metric': metric.name[len(self.prefix):],
+                    'labels': ",".join(str(label) for label in labels),
+                    'count': series.count,
+                    'total_ms': series.sum * 1000,
+                    'avg_ms': series.sum / series.count * 1000 if series.count else 0.0,
+                    'p95_ms': (metric.quantile(labels, 0.95) or 0.0) * 1000,
+                    'max_ms': series.max * 1000,
+                })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        for metric in self.metrics.values():
+            if isinstance(metric, Counter):
+                metric.values.clear()
+            else:
+                metric.series.clear()
+        self.started = time.time()
+
+
+# One registry per process; hot paths keep a reference to their metric objects
+registry = MetricsRegistry(enabled=False)
+
+LISTENER_SECONDS = registry.histogram("listener_seconds", "Event listener run time", ("event",))
+COMMAND_SECONDS = registry.histogram("command_seconds", "Command run time", ("command",))
+COMMAND_ERRORS = registry.counter("command_errors_total", "Commands that failed", ("command",))
+STAGE_SECONDS = registry.histogram("pipeline_stage_seconds", "Message pipeline stage run time", ("stage",))
+STORAGE_WRITE_SECONDS = registry.histogram("storage_write_seconds", "Storage flush time", ("store",))
+
+
+def configure(enabled: bool):
+    registry.enabled = enabled
+
+
+# -----------------------------
+# PROMETHEUS EXPORT
+# -----------------------------
+class MetricsExporter:
+    """Writes registry.render() to a file every interval and/or serves it over HTTP at /metrics"""
+
+    def __init__(self, registry: MetricsRegistry, path: Optional[str] = None, host: str = "127.0.0.1",
+                 port: Optional[int] = None, interval: float = 15):
+        self.registry = registry
+        self.path = path
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if self.path and self._task is None:
+            self._task = asyncio.create_task(self._write_loop())
+        if self.port and self._server is None:
+            self._server = await asyncio.start_server(self._serve, self.host, self.port)
+            logger.info(f"📈 Metrics served on http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.path:
+            self.write_file()
+
+    def write_file(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(self.registry.render())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write metrics file: {e}")
+
+    async def _write_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.write_file()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            # Drain the headers; we only care about the request line
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+            parts = request.decode(errors="replace").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                body = self.registry.render().encode()
+                status = "200 OK"
+            else:
+                body = b"not found\n"
+                status = "404 Not Found"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,141 @@
+# pipeline.py - Single on_message pipeline shared by the bot core and cogs
+import asyncio
+import logging
+import re
+import time
+from functools import cached_property
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Stage phases - lower runs first
+PRE_FILTER = 0
+XP = 100
+TRIGGERS = 200
+COMMANDS = 300
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class MessageContext:
+    """Everything the stages need about one message, computed once"""
+
+    def __init__(self, message, prefix: str, pipeline: Optional["MessagePipeline"] = None):
+        self.message = message
+        self.pipeline = pipeline
+        self.author = message.author
+        self.guild = message.guild
+        self.content: str = message.content
+        self.lowered: str = self.content.lower()
+        self.user_key = str(self.author.id)
+        self.guild_key: Optional[str] = str(self.guild.id) if self.guild else None
+        self.is_command = bool(prefix) and self.content.startswith(prefix)
+        self.stopped = False
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Lowercased words of the message"""
+        return TOKEN_PATTERN.findall(self.lowered)
+
+    def stop(self):
+        """Skip every later stage (including command processing)"""
+        self.stopped = True
+
+    def send_later(self, coro: Awaitable) -> asyncio.Task:
+        """Run a reply/send in the background so later stages (and the command) don't wait on Discord"""
+        if self.pipeline is not None:
+            return self.pipeline.spawn(coro)
+        return asyncio.ensure_future(coro)
+
+
+StageCallback = Callable[[MessageContext], Awaitable[None]]
+
+
+class Stage:
+    def __init__(self, name: str, callback: StageCallback, phase: int):
+        self.name = name
+        self.callback = callback
+        self.phase = phase
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class MessagePipeline:
+    """Runs registered stages in phase order against one shared MessageContext"""
+
+    PRE_FILTER = PRE_FILTER
+    XP = XP
+    TRIGGERS = TRIGGERS
+    COMMANDS = COMMANDS
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.stages: List[Stage] = []
+        self.messages = 0
+        self.short_circuits = 0
+        self.background_errors = 0
+        self._background: Set[asyncio.Task] = set()  # strong refs until each send finishes
+
+    def register(self, name: str, callback: StageCallback, phase: int = TRIGGERS):
+        """Add a stage; registering the same name again replaces it (e.g. on cog reload)"""
+        self.unregister(name)
+        self.stages.append(Stage(name, callback, phase))
+        # Stable sort keeps registration order inside a phase
+        self.stages.sort(key=lambda stage: stage.phase)
+
+    def unregister(self, name: str):
+        self.stages = [stage for stage in self.stages if stage.name != name]
+
+    def spawn(self, coro: Awaitable) -> asyncio.Task:
+        """Start a stage's network call as its own task; failures are logged like stage errors"""
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+        return task
+
+    def _background_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.background_errors += 1
+            logger.error("❌ Background message send failed: %s", error)
+
+    async def process(self, message) -> MessageContext:
+        ctx = MessageContext(message, self.prefix, self)
+        self.messages += 1
+        for stage in self.stages:
+            if ctx.stopped:
+                self.short_circuits += 1
+                break
+            started = time.perf_counter()
+            try:
+                await stage.callback(ctx)
+            except Exception as e:
+                stage.errors += 1
+                logger.error("❌ Message stage '%s' failed: %s", stage.name, e)
+            elapsed = time.perf_counter() - started
+            stage.calls += 1
+            stage.total_seconds += elapsed
+            if elapsed > stage.max_seconds:
+                stage.max_seconds = elapsed
+            STAGE_SECONDS.observe(elapsed, stage.name)
+        return ctx
+
+    def stats(self) -> List[Dict]:
+        return [
+            {
+                'name': stage.name,
+                'phase': stage.phase,
+                'calls': stage.calls,
+                'errors': stage.errors,
+                'avg_ms': (stage.total_seconds / stage.calls * 1000) if stage.calls else 0.0,
+                'max_ms': stage.max_seconds * 1000,
+            }
+            for stage in self.stages
+        ]
@@ -0,0 +1,281 @@
+# records.py - Compact per-user record types for DataStorage
+import sys
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Epoch microseconds, or the original string if it was not an ISO timestamp we wrote
+Timestamp = Union[int, str]
+
+
+def intern_id(value) -> str:
+    """Server/user ID as a dict key; every section shares the same string object"""
+    return sys.intern(str(value))
+
+
+def now_timestamp() -> int:
+    return (datetime.now() - _EPOCH) // _MICROSECOND
+
+
+def timestamp_from_iso(value) -> Timestamp:
+    """ISO string (naive local time, as datetime.now().isoformat() writes it) -> int, losslessly"""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is not None:
+        return value
+    timestamp = (parsed - _EPOCH) // _MICROSECOND
+    # Anything that would not come back byte-for-byte stays a string
+    return timestamp if timestamp_to_iso(timestamp) == value else value
+
+
+def timestamp_to_iso(value: Timestamp) -> str:
+    if isinstance(value, int):
+        return (_EPOCH + value * _MICROSECOND).isoformat()
+    return value
+
+
+class Record:
+    """Dict-style access on top of the slots, so existing code keeps using record['key'].
+
+    Timestamp fields are ints internally and ISO strings through the mapping
+    interface and in JSON, exactly as the old dicts stored them. Keys a
+    record has no slot for are kept in `extra`.
+    """
+    __slots__ = ()
+    TIMESTAMPS = ()
+    INTERNED = ()  # short strings repeated across users (ids, rarities, banner names)
+    FIELDS: Tuple[str, ...] = ()  # filled in below, in JSON key order
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Record":
+        values = {}
+        extra = None
+        for key, value in data.items():
+            if key in cls.TIMESTAMPS:
+                values[key] = timestamp_from_iso(value)
+            elif key in cls.INTERNED and isinstance(value, str):
+                values[key] = sys.intern(value)
+            elif key in cls.FIELDS:
+                values[key] = value
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record = cls(**values)
+        record.extra = extra
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        for name in self.TIMESTAMPS:
+            data[name] = timestamp_to_iso(data[name])
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_row(self) -> List:
+        """Slot values in FIELDS order, then extra; timestamps stay ints (the bot_data.snap layout)"""
+        row = [getattr(self, name) for name in self.FIELDS]
+        row.append(self.extra)
+        return row
+
+    @classmethod
+    def from_row(cls, row: List, fields: Optional[Tuple[str, ...]] = None) -> "Record":
+        """Inverse of to_row(); fields are the names the row was written with, if not the current FIELDS"""
+        if fields is None or fields == cls.FIELDS:
+            record = cls(*row[:-1])
+        else:
+            record = cls()
+            for name, value in zip(fields, row):
+                if name in cls.FIELDS:
+                    setattr(record, name, value)
+                else:
+                    record.extra = record.extra or {}
+                    record.extra[name] = value
+        if row[-1]:
+            record.extra = {**(record.extra or {}), **row[-1]}
+        for name in cls.INTERNED:
+            value = getattr(record, name)
+            if isinstance(value, str):
+                setattr(record, name, sys.intern(value))
+        return record
+
+    def __getitem__(self, key: str):
+        if key in self.TIMESTAMPS:
+            return timestamp_to_iso(getattr(self, key))
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in self.TIMESTAMPS:
+            setattr(self, key, timestamp_from_iso(value))
+        elif key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key) -> bool:
+        return key in self.FIELDS or bool(self.extra and key in self.extra)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def update(self, values: Dict):
+        for key, value in values.items():
+            self[key] = value
+
+
+@dataclass(slots=True, eq=False)
+class Profile(Record):
+    bio: str = 'No bio set yet...'
+    title: str = 'Newcomer'
+    color: Optional[str] = None
+    banner: str = 'assassin'
+    badges: List[str] = field(default_factory=list)
+    profile_views: int = 0
+    created_at: Timestamp = field(default_factory=now_timestamp)
+    last_updated: Timestamp = field(default_factory=now_timestamp)
+    extra: Optional[Dict] = None
+    TIMESTAMPS = ('created_at', 'last_updated')
+    INTERNED = ('title', 'banner')
+
+
+@dataclass(slots=True, eq=False)
+class Marriage(Record):
+    partner: int = 0
+    married_at: Timestamp = field(default_factory=now_timestamp)
+    partner_name: str = ''
+    extra: Optional[Dict] = None
+    TIMESTAMPS = ('married_at',)
+    INTERNED = ('partner_name',)
+
+
+@dataclass(slots=True, eq=False)
+class Child(Record):
+    name: str = ''
+    adopted_at: Timestamp = field(default_factory=now_timestamp)
+    level: int = 1
+    happiness: int = 100
+    extra: Optional[Dict] = None
+    TIMESTAMPS = ('adopted_at',)
+
+
+@dataclass(slots=True, eq=False)
+class WarningEntry(Record):
+    reason: str = ''
+    timestamp: Timestamp = field(default_factory=now_timestamp)
+    extra: Optional[Dict] = None
+    TIMESTAMPS = ('timestamp',)
+
+
+@dataclass(slots=True, eq=False)
+class Achievement(Record):
+    id: str = ''
+    name: str = 'Unknown'
+    description: str = ''
+    icon: str = '🏆'
+    unlocked_at: Timestamp = field(default_factory=now_timestamp)
+    rarity: str = 'common'
+    extra: Optional[Dict] = None
+    TIMESTAMPS = ('unlocked_at',)
+    INTERNED = ('id', 'name', 'description', 'icon', 'rarity')
+
+
+@dataclass(slots=True, eq=False)
+class Banner(Record):
+    id: str = ''
+    name: str = ''
+    unlocked_at: Timestamp = field(default_factory=now_timestamp)
+    extra: Optional[Dict] = None
+    TIMESTAMPS = ('unlocked_at',)
+    INTERNED = ('id', 'name')
+
+
+for _record_type in (Profile, Marriage, Child, WarningEntry, Achievement, Banner):
+    _record_type.FIELDS = tuple(f.name for f in fields(_record_type) if f.name != 'extra')
+
+
+# section -> (record type, whether each user holds a list of them)
+SECTION_RECORDS = {
+    'user_profiles': (Profile, False),
+    'marriages': (Marriage, False),
+    'children': (Child, True),
+    'warnings': (WarningEntry, True),
+    'achievements': (Achievement, True),
+    'backgrounds': (Banner, True),
+}
+
+
+def to_json(value):
+    """json.dumps(default=...) hook: records serialize as the dicts they replaced"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def from_json_section(section: str, servers: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Loaded JSON for one section -> the in-memory layout (interned keys, records where defined)"""
+    record_type, is_list = SECTION_RECORDS.get(section, (None, False))
+    result = {}
+    for server_key, users in servers.items():
+        if not isinstance(users, dict):
+            # Server-level sections (auto_reply_mutes) hold a plain list
+            result[intern_id(server_key)] = users
+            continue
+        if record_type is None:
+            result[intern_id(server_key)] = {intern_id(user_key): value for user_key, value in users.items()}
+        elif is_list:
+            result[intern_id(server_key)] = {
+                intern_id(user_key): [_load(record_type, item) for item in items]
+                for user_key, items in users.items()
+            }
+        else:
+            result[intern_id(server_key)] = {
+                intern_id(user_key): _load(record_type, value) for user_key, value in users.items()
+            }
+    return result
+
+
+def _load(record_type, value):
+    return record_type.from_dict(value) if isinstance(value, dict) else value
+
+
+def from_row_section(section: str, servers: Dict[str, Dict], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Like from_json_section, for a bot_data.snap section whose records are to_row() lists"""
+    record_type, is_list = SECTION_RECORDS.get(section, (None, False))
+    if record_type is None:
+        return from_json_section(section, servers)
+    fields = tuple(fields) if fields is not None else None
+    result = {}
+    for server_key, users in servers.items():
+        if is_list:
+            result[intern_id(server_key)] = {
+                intern_id(user_key): [record_type.from_row(row, fields) for row in rows]
+                for user_key, rows in users.items()
+            }
+        else:
+            result[intern_id(server_key)] = {
+                intern_id(user_key): record_type.from_row(row, fields) for user_key, row in users.items()
+            }
+    return result
@@ -0,0 +1,100 @@
+# sharding.py - Which shards (and so which guilds) this process owns
+import os
+from typing import Dict, List, Optional
+
+# Set by launcher.py for every cluster process it spawns
+ENV_CLUSTER_ID = "MERLIN_CLUSTER_ID"
+ENV_SHARD_IDS = "MERLIN_SHARD_IDS"
+ENV_SHARD_COUNT = "MERLIN_SHARD_COUNT"
+ENV_IPC_PORT = "MERLIN_IPC_PORT"
+
+
+class ClusterInfo:
+    """One launcher-managed process: its cluster number and the shards it runs"""
+
+    def __init__(self, cluster_id: int, shard_ids: List[int], shard_count: int, ipc_port: Optional[int] = None):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.ipc_port = ipc_port
+
+    @classmethod
+    def from_env(cls) -> Optional["ClusterInfo"]:
+        if ENV_CLUSTER_ID not in os.environ:
+            return None
+        port = os.environ.get(ENV_IPC_PORT)
+        return cls(
+            cluster_id=int(os.environ[ENV_CLUSTER_ID]),
+            shard_ids=[int(shard) for shard in os.environ[ENV_SHARD_IDS].split(",")],
+            shard_count=int(os.environ[ENV_SHARD_COUNT]),
+            ipc_port=int(port) if port else None
+        )
+
+    def env(self) -> Dict[str, str]:
+        env = {
+            ENV_CLUSTER_ID: str(self.cluster_id),
+            ENV_SHARD_IDS: ",".join(str(shard) for shard in self.shard_ids),
+            ENV_SHARD_COUNT: str(self.shard_count),
+        }
+        if self.ipc_port:
+            env[ENV_IPC_PORT] = str(self.ipc_port)
+        return env
+
+
+_cluster: Optional[ClusterInfo] = None
+_cluster_loaded = False
+
+
+def current_cluster() -> Optional[ClusterInfo]:
+    """This process's cluster, or None when running as a plain single process"""
+    global _cluster, _cluster_loaded
+    if not _cluster_loaded:
+        _cluster = ClusterInfo.from_env()
+        _cluster_loaded = True
+    return _cluster
+
+
+def plan_clusters(shard_count: int, processes: int) -> List[List[int]]:
+    """Spread shard IDs over processes (round-robin so clusters stay even)"""
+    processes = max(1, min(processes, shard_count))
+    return [list(range(cluster_id, shard_count, processes)) for cluster_id in range(processes)]
+
+
+def shard_for_guild(guild_id, shard_count: int) -> int:
+    """Discord's guild -> shard mapping"""
+    return (int(guild_id) >> 22) % shard_count
+
+
+def partition_path(path: str, cluster_id: Optional[int] = None) -> str:
+    """Per-cluster data file, e.g. bot_data.json -> bot_data.cluster1.json (unchanged outside a cluster)"""
+    if cluster_id is None:
+        cluster = current_cluster()
+        if cluster is None:
+            return path
+        cluster_id = cluster.cluster_id
+    root, ext = os.path.splitext(path)
+    return f"{root}.cluster{cluster_id}{ext}"
+
+
+def split_by_guild(data: Dict, clusters: List[List[int]], shard_count: int, sectioned: bool) -> List[Dict]:
+    """Split guild-keyed data into one dict per cluster.
+
+    sectioned=True for {section: {server_key: ...}} (bot_data.json),
+    False for {server_key: ...} (level_data.json).
+    """
+    owner = {shard: cluster_id for cluster_id, shards in enumerate(clusters) for shard in shards}
+
+    def cluster_of(server_key: str) -> int:
+        return owner[shard_for_guild(server_key, shard_count)]
+
+    if not sectioned:
+        parts: List[Dict] = [{} for _ in clusters]
+        for server_key, value in data.items():
+            parts[cluster_of(server_key)][server_key] = value
+        return parts
+
+    parts = [{section: {} for section in data} for _ in clusters]
+    for section, servers in data.items():
+        for server_key, value in servers.items():
+            parts[cluster_of(server_key)][section][server_key] = value
+    return parts
@@ -0,0 +1,191 @@
+# snapshots.py - Consistent copies of stored data, serialized off the event loop
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from records import Record, to_json
+
+# One fragment per (section, guild); the flat layout (xp ledger) uses "" as its only section
+FragmentKey = Tuple[str, str]
+
+_MUTABLE = (Record, dict, list)
+
+
+def freeze(value: Any) -> Any:
+    """Deep copy into plain JSON types, so a worker thread can serialize it while the loop keeps mutating"""
+    if isinstance(value, Record):
+        data = value.to_dict()
+        for key, item in data.items():
+            if isinstance(item, _MUTABLE):
+                data[key] = freeze(item)
+        return data
+    if isinstance(value, dict):
+        return {key: freeze(item) if isinstance(item, _MUTABLE) else item for key, item in value.items()}
+    if isinstance(value, list):
+        return [freeze(item) if isinstance(item, _MUTABLE) else item for item in value]
+    return value
+
+
+def freeze_rows(value: Any) -> Any:
+    """freeze(), with records as their to_row() lists (no ISO conversion; the bot_data.snap layout)"""
+    if isinstance(value, Record):
+        return [freeze_rows(item) if isinstance(item, _MUTABLE) else item for item in value.to_row()]
+    if isinstance(value, dict):
+        return {key: freeze_rows(item) if isinstance(item, _MUTABLE) else item for key, item in value.items()}
+    if isinstance(value, list):
+        return [freeze_rows(item) if isinstance(item, _MUTABLE) else item for item in value]
+    return value
+
+
+def _size(value: Any) -> int:
+    return len(value) if isinstance(value, (dict, list)) else 0
+
+
+class _Pending:
+    """A guild that changed since its last fragment: the frozen copy, serialized in render()"""
+    __slots__ = ("value", "size")
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+
+
+class SnapshotCache:
+    """Serialized full snapshots, one cached fragment per (section, guild).
+
+    capture() runs on the loop and is the only step that looks at the live
+    data: a guild whose fragment is still current costs a dict lookup, and
+    a changed one is frozen (deep-copied), so the copy is consistent and its
+    cost follows what changed since the last snapshot. render() runs in a
+    worker thread, serializes the frozen guilds and joins the fragments into
+    exactly what json.dumps(data, indent=indent) would have written (or,
+    with a compact dumps such as orjson's, the same document in its output).
+
+    Fragments are dropped by invalidate() with the dirty set of each flush;
+    a guild whose record count changed is re-frozen even if nobody marked it.
+    """
+
+    def __init__(self, indent: Optional[int] = 2, flat: bool = False, dumps: Optional[Callable[[Any], bytes]] = None,
+                 freezer: Callable[[Any], Any] = freeze):
+        self.indent = indent
+        self.flat = flat  # {guild: value} instead of {section: {guild: value}}
+        self.dumps = dumps  # compact bytes encoder replacing json.dumps (indent must be None)
+        self.freezer = freezer
+        self.fragments: Dict[FragmentKey, Tuple[int, bytes]] = {}
+        self.stats = {'snapshots': 0, 'reused': 0, 'frozen': 0}
+
+    def invalidate(self, dirty: Iterable[Tuple]):
+        """Forget the fragments of every guild in a dirty set ((section, server, ...) or plain server keys)"""
+        for entry in dirty:
+            key = ("", entry) if self.flat else (entry[0], entry[1])
+            self.fragments.pop(key, None)
+
+    def clear(self):
+        self.fragments = {}
+
+    def seed(self, data: Dict[str, Dict]):
+        """Add fragments for freshly loaded plain data (call it in the loading thread, before the loop sees the data).
+
+        Without this the first snapshot after startup would freeze every guild on the loop.
+        """
+        sections = {"": data} if self.flat else data
+        self.fragments.update(
+            ((section, server_key), (_size(value), self.encode(value)))
+            for section, servers in sections.items() for server_key, value in servers.items()
+        )
+
+    def encode(self, value: Any) -> bytes:
+        """A guild's value, indented for the depth it sits at in the document"""
+        if self.dumps is not None:
+            return self.dumps(value)
+        if self.indent is None:
+            return json.dumps(value, separators=(',', ':'), default=to_json).encode()
+        text = json.dumps(value, indent=self.indent, default=to_json).encode()
+        # JSON strings never hold a raw newline, so this only touches the layout
+        return text.replace(b"\n", b"\n" + b" " * (self.indent * (1 if self.flat else 2)))
+
+    # -----------------------------
+    # ON THE LOOP
+    # -----------------------------
+    def capture(self, data: Dict[str, Dict]) -> List[Tuple[str, List[Tuple[str, Any]]]]:
+        """[(section, [(guild, fragment bytes or _Pending)])] - no awaits, so nothing changes halfway"""
+        sections = {"": data} if self.flat else data
+        layout = []
+        reused = frozen = 0
+        for section, servers in sections.items():
+            items = []
+            for server_key, value in servers.items():
+                size = _size(value)
+                cached = self.fragments.get((section, server_key))
+                if cached is not None and cached[0] == size:
+                    items.append((server_key, cached[1]))
+                    reused += 1
+                else:
+                    items.append((server_key, _Pending(self.freezer(value), size)))
+                    frozen += 1
+            layout.append((section, items))
+        self.stats['snapshots'] += 1
+        self.stats['reused'] += reused
+        self.stats['frozen'] += frozen
+        return layout
+
+    # -----------------------------
+    # IN A WORKER THREAD
+    # -----------------------------
+    def render(self, layout: List[Tuple[str, List[Tuple[str, Any]]]]) -> List[bytes]:
+        """The serialized document as chunks to write in order; also replaces the fragment cache.
+
+        Chunks rather than one joined buffer: copying a document of tens of
+        MB holds the GIL, which is exactly the stall this class exists to avoid.
+        """
+        sections = self._fragments(layout)
+        chunks: List[bytes] = []
+        self._emit(chunks, sections[0][1] if self.flat and sections else sections, 0)
+        return chunks
+
+    def render_sections(self, layout: List[Tuple[str, List[Tuple[str, Any]]]]) -> List[Tuple[str, List[bytes]]]:
+        """Like render(), but each section as its own document: [(section, chunks of {guild: value})]"""
+        result = []
+        for section, items in self._fragments(layout):
+            chunks: List[bytes] = []
+            self._emit(chunks, items, 0)
+            result.append((section, chunks))
+        return result
+
+    def _fragments(self, layout: List[Tuple[str, List[Tuple[str, Any]]]]) -> List[Tuple[str, List[Tuple[str, bytes]]]]:
+        fragments = {}
+        sections = []
+        for section, items in layout:
+            joined = []
+            for server_key, item in items:
+                if isinstance(item, _Pending):
+                    fragment = self.encode(item.value)
+                    fragments[(section, server_key)] = (item.size, fragment)
+                else:
+                    fragment = item
+                    fragments[(section, server_key)] = self.fragments[(section, server_key)]
+                joined.append((server_key, fragment))
+            sections.append((section, joined))
+        self.fragments = fragments
+        return sections
+
+    def _emit(self, chunks: List[bytes], items: List[Tuple[str, Any]], level: int):
+        """One JSON object from already-serialized values (or nested item lists), laid out as json.dumps would"""
+        if not items:
+            chunks.append(b"{}")
+            return
+        if self.indent is None:
+            opening, separator, colon, closing = b"{", b",", b":", b"}"
+        else:
+            pad = b"\n" + b" " * (self.indent * (level + 1))
+            opening, separator, colon = b"{" + pad, b"," + pad, b": "
+            closing = b"\n" + b" " * (self.indent * level) + b"}"
+        chunks.append(opening)
+        for index, (key, value) in enumerate(items):
+            if index:
+                chunks.append(separator)
+            chunks.append(json.dumps(key).encode() + colon)
+            if isinstance(value, list):
+                self._emit(chunks, value, level + 1)
+            else:
+                chunks.append(value)
+        chunks.append(closing)
@@ -1,11 +1,35 @@
 import json
 import os
+import time
 import aiofiles
 import asyncio
+import zlib
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 import logging
 
+from metrics import STORAGE_WRITE_SECONDS
+from records import (SECTION_RECORDS, Achievement, Banner, Child, Marriage, Profile, WarningEntry,
+                     from_json_section, from_row_section, intern_id, now_timestamp, to_json)
+from sharding import partition_path
+from snapshots import SnapshotCache, freeze, freeze_rows
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Config fallback
 try:
     import config
@@ -19,6 +43,12 @@ try:
             "cooldown": 60,
             "max_level": 100
         })
+        STORAGE_SETTINGS = getattr(config, 'STORAGE_SETTINGS', {
+            "backend": "json",
+            "sqlite_file": "bot_data.db",
+            "flush_interval_seconds": 5,
+            "max_flush_delay_seconds": 30
+        })
         @classmethod
         def validate_config(cls):
             return getattr(config, 'validate_config', lambda: True)()
@@ -33,12 +63,806 @@ except ImportError:
             "cooldown": 60,
             "max_level": 100
         }
+        STORAGE_SETTINGS = {
+            "backend": "json",
+            "sqlite_file": "bot_data.db",
+            "flush_interval_seconds": 5,
+            "max_flush_delay_seconds": 30
+        }
         @classmethod
         def validate_config(cls):
             return True
 
 logger = logging.getLogger(__name__)
 
+# Every persisted section, in the order they appear in bot_data.json
+SECTIONS = (
+    'muted_users', 'warnings', 'user_levels', 'auto_reply_mutes',
+    'marriages', 'children', 'friends', 'reputation', 'gifts',
+    'user_profiles', 'achievements', 'backgrounds',
+)
+
+# Sections keyed by server only (the value is a list of user IDs, not a per-user record)
+SERVER_LEVEL_SECTIONS = ('auto_reply_mutes',)
+
+
+def _record_value(sections: Dict[str, Dict], section: str, server_key: str, user_key: Optional[str]):
+    """Current value of one record, or None if it has been deleted"""
+    server_data = sections[section].get(server_key)
+    if user_key is None or server_data is None:
+        return server_data
+    return server_data.get(user_key)
+
+
+def _orjson_dumps(value) -> bytes:
+    return orjson.dumps(value, default=to_json)
+
+
+def quarantine(path: str) -> str:
+    """Move a damaged data file aside (never delete it) and return where it went"""
+    moved_to = f"{path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+    os.replace(path, moved_to)
+    return moved_to
+
+
+# -----------------------------
+# STORAGE BACKENDS
+# -----------------------------
+class JsonBackend:
+    """The original single-file layout: every write rewrites bot_data.json.
+
+    The rewrite is a SnapshotCache snapshot: only guilds changed since the
+    last write are copied on the loop, and serializing and writing happen
+    in a worker thread.
+    """
+    name = "json"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cache = SnapshotCache(indent=2)
+
+    async def load(self) -> Optional[Dict[str, Dict]]:
+        if not os.path.exists(self.path):
+            return None
+        return await asyncio.to_thread(self.read)
+
+    def read(self) -> Dict[str, Dict]:
+        with open(self.path, 'r') as f:
+            content = f.read()
+        try:
+            sections = json.loads(content)
+        except ValueError:
+            # Keep the damaged file for recovery instead of overwriting it on the next flush
+            moved_to = quarantine(self.path)
+            logger.error(f"❌ {self.path} is damaged; kept as {moved_to}")
+            raise
+        self.cache.clear()
+        self.cache.seed(sections)
+        return sections
+
+    def _write_file(self, layout):
+        data_file_dir = os.path.dirname(self.path)
+        if data_file_dir:
+            os.makedirs(data_file_dir, exist_ok=True)
+        # Temp file + rename, so an interrupted write never leaves a truncated bot_data.json
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.writelines(self.cache.render(layout))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def write(self, sections: Dict[str, Dict], dirty: Set[Tuple[str, str, Optional[str]]]):
+        self.cache.invalidate(dirty)
+        await asyncio.to_thread(self._write_file, self.cache.capture(sections))
+
+    async def close(self):
+        pass
+
+
+class SQLiteBackend:
+    """One table per section, one row per (server, user) record.
+
+    Only the records that changed since the last flush are written, so the
+    cost of a flush no longer depends on how many guilds the bot is in.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None):
+        if aiosqlite is None:
+            raise RuntimeError("aiosqlite is required for the sqlite storage backend")
+        self.path = path
+        self.legacy_json = legacy_json
+        self.db = None
+
+    async def connect(self):
+        if self.db is not None:
+            return
+        self.db = await aiosqlite.connect(self.path)
+        await self.db.execute("PRAGMA journal_mode=WAL")
+        await self.db.execute("PRAGMA synchronous=NORMAL")
+        await self.db.execute(
+            "CREATE TABLE IF NOT EXISTS storage_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        for section in SECTIONS:
+            # user_id is '' for server-level sections such as auto_reply_mutes
+            await self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {section} ("
+                "server_id TEXT NOT NULL, user_id TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (server_id, user_id)) WITHOUT ROWID"
+            )
+            await self.db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{section}_user ON {section} (user_id)"
+            )
+        await self.db.commit()
+
+    async def load(self) -> Optional[Dict[str, Dict]]:
+        await self.connect()
+        if self.legacy_json and not await self._get_meta('migrated_from'):
+            await self.migrate_from_json(self.legacy_json)
+
+        sections = {section: {} for section in SECTIONS}
+        for section in SECTIONS:
+            server_level = section in SERVER_LEVEL_SECTIONS
+            async with self.db.execute(f"SELECT server_id, user_id, data FROM {section}") as cursor:
+                async for server_id, user_id, data in cursor:
+                    if server_level:
+                        sections[section][server_id] = json.loads(data)
+                    else:
+                        sections[section].setdefault(server_id, {})[user_id] = json.loads(data)
+        return sections
+
+    @staticmethod
+    def _encode_rows(changed: List[Tuple[str, str, str, object]]) -> Dict[str, List[Tuple[str, str, str]]]:
+        upserts: Dict[str, List[Tuple[str, str, str]]] = {}
+        for section, server_key, row_user, value in changed:
+            upserts.setdefault(section, []).append((server_key, row_user, json.dumps(value)))
+        return upserts
+
+    async def write(self, sections: Dict[str, Dict], dirty: Set[Tuple[str, str, Optional[str]]]):
+        await self.connect()
+        changed: List[Tuple[str, str, str, object]] = []
+        deletes: Dict[str, List[Tuple[str, str]]] = {}
+        for section, server_key, user_key in dirty:
+            value = _record_value(sections, section, server_key, user_key)
+            row_user = user_key if user_key is not None else ''
+            if value is None:
+                deletes.setdefault(section, []).append((server_key, row_user))
+            else:
+                changed.append((section, server_key, row_user, freeze(value)))
+        # Frozen copies, so serializing them in a thread can't see later changes
+        upserts = await asyncio.to_thread(self._encode_rows, changed)
+
+        try:
+            for section, rows in upserts.items():
+                await self.db.executemany(
+                    f"INSERT INTO {section} (server_id, user_id, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(server_id, user_id) DO UPDATE SET data = excluded.data",
+                    rows
+                )
+            for section, rows in deletes.items():
+                await self.db.executemany(
+                    f"DELETE FROM {section} WHERE server_id = ? AND user_id = ?", rows
+                )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+    async def migrate_from_json(self, json_path: str) -> int:
+        """One-shot import of an existing bot_data.json. Returns the number of records copied."""
+        await self.connect()
+        copied = 0
+        if os.path.exists(json_path):
+            data = await JsonBackend(json_path).load() or {}
+            dirty = set()
+            for section in SECTIONS:
+                for server_key, server_data in data.get(section, {}).items():
+                    if section in SERVER_LEVEL_SECTIONS:
+                        dirty.add((section, server_key, None))
+                    else:
+                        for user_key in server_data:
+                            dirty.add((section, server_key, user_key))
+            sections = {section: data.get(section, {}) for section in SECTIONS}
+            await self.write(sections, dirty)
+            copied = len(dirty)
+            logger.info(f"📦 Migrated {copied} records from {json_path} to {self.path}")
+        await self.db.execute(
+            "REPLACE INTO storage_meta (key, value) VALUES ('migrated_from', ?)", (json_path,)
+        )
+        await self.db.commit()
+        return copied
+
+    async def _get_meta(self, key: str) -> Optional[str]:
+        async with self.db.execute("SELECT value FROM storage_meta WHERE key = ?", (key,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+
+class JournalBackend:
+    """Checksummed snapshot plus an append-only journal of changed records.
+
+    A flush appends one line per changed record to bot_data.journal, so
+    its cost follows the size of the change rather than of the data. Once
+    the journal passes compact_records lines or compact_bytes, everything
+    is written to bot_data.snapshot (temp file, fsync, rename) and a new
+    journal generation starts. Loading reads the snapshot and replays the
+    journal of the same generation; a torn last line is dropped, and a
+    damaged snapshot is moved aside rather than overwritten.
+    """
+    name = "journal"
+    SNAPSHOT_FORMAT = "merlin-snapshot"
+    HEADER = "#generation"
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None,
+                 compact_records: int = 10000, compact_bytes: int = 16 * 1024 * 1024):
+        root, _ = os.path.splitext(path)
+        self.snapshot_path = f"{root}.snapshot"
+        self.journal_path = f"{root}.journal"
+        self.legacy_json = legacy_json
+        self.compact_records = compact_records
+        self.compact_bytes = compact_bytes
+        self.generation = 0
+        self.journal_records = 0
+        self.journal_bytes = 0
+        self._journal = None  # append handle for the current generation
+        self.cache = SnapshotCache(indent=None)  # compaction reuses the guilds no flush touched
+        self.stats = {'appends': 0, 'compactions': 0, 'replayed': 0, 'torn_lines': 0, 'last_load_ms': 0.0}
+
+    # -----------------------------
+    # ENCODING
+    # -----------------------------
+    @staticmethod
+    def encode_line(entry) -> bytes:
+        payload = json.dumps(entry, separators=(',', ':'), default=to_json).encode()
+        return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+    @staticmethod
+    def decode_line(line: bytes):
+        """The entry, or None for a torn or damaged line"""
+        if not line.endswith(b"\n"):
+            return None
+        checksum, _, payload = line[:-1].partition(b" ")
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload)
+        except ValueError:
+            return None
+
+    # -----------------------------
+    # LOAD (blocking parts run in a thread)
+    # -----------------------------
+    async def load(self) -> Optional[Dict[str, Dict]]:
+        started = time.perf_counter()
+        sections, migrated = await asyncio.to_thread(self.read)
+        self.stats['last_load_ms'] = (time.perf_counter() - started) * 1000
+        if migrated:
+            # Make the snapshot the source of truth straight away
+            await self.compact(sections)
+            logger.info(f"📦 Migrated {self.legacy_json} into {self.snapshot_path}")
+        return sections
+
+    def read(self) -> Tuple[Optional[Dict[str, Dict]], bool]:
+        """(sections, migrated_from_legacy_json) from snapshot + journal"""
+        sections = self._read_snapshot()
+        migrated = False
+        if sections is None and self.legacy_json and os.path.exists(self.legacy_json):
+            with open(self.legacy_json, 'r') as f:
+                content = f.read()
+            try:
+                sections = json.loads(content)
+            except ValueError:
+                moved_to = quarantine(self.legacy_json)
+                logger.error(f"❌ {self.legacy_json} is damaged; kept as {moved_to}")
+                raise
+            migrated = True
+        if sections is None and not os.path.exists(self.journal_path):
+            return None, False
+        sections = sections if sections is not None else {}
+        self._replay(sections)
+        self.cache.clear()
+        self.cache.seed(sections)
+        return sections, migrated
+
+    def _read_snapshot(self) -> Optional[Dict[str, Dict]]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path, 'rb') as f:
+            header_line = f.readline()
+            body = f.read()
+        try:
+            header = json.loads(header_line)
+            if header.get('format') != self.SNAPSHOT_FORMAT:
+                raise ValueError("not a snapshot file")
+            if header['bytes'] != len(body) or header['crc32'] != zlib.crc32(body):
+                raise ValueError("checksum mismatch")
+            sections = json.loads(body)
+        except (ValueError, KeyError, TypeError) as e:
+            moved_to = quarantine(self.snapshot_path)
+            logger.error(f"❌ Snapshot {self.snapshot_path} is damaged ({e}); kept as {moved_to}")
+            if os.path.exists(self.journal_path):
+                # Its records only make sense on top of that snapshot; keep it next to it
+                logger.error(f"❌ Journal kept as {quarantine(self.journal_path)}")
+            return None
+        self.generation = header['generation']
+        return sections
+
+    def _replay(self, sections: Dict[str, Dict]):
+        """Apply journal lines of the current generation; truncate at the first bad line"""
+        if not os.path.exists(self.journal_path):
+            return
+        good_bytes = 0
+        lines = 0
+        with open(self.journal_path, 'rb') as f:
+            first = f.readline()
+            header = self.decode_line(first)
+            if not (isinstance(header, list) and header[:1] == [self.HEADER] and header[1] == self.generation):
+                # Left over from before the last compaction; its changes are in the snapshot
+                return
+            good_bytes = len(first)
+            for line in f:
+                entry = self.decode_line(line)
+                if entry is None:
+                    self.stats['torn_lines'] += 1
+                    break
+                section, server_key, user_key, value = entry
+                servers = sections.setdefault(section, {})
+                if user_key is None:
+                    if value is None:
+                        servers.pop(server_key, None)
+                    else:
+                        servers[server_key] = value
+                elif value is None:
+                    servers.get(server_key, {}).pop(user_key, None)
+                else:
+                    servers.setdefault(server_key, {})[user_key] = value
+                good_bytes += len(line)
+                lines += 1
+        if self.stats['torn_lines']:
+            logger.warning(f"⚠️ Dropped a damaged tail from {self.journal_path} after {lines} records")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_bytes)
+        self.stats['replayed'] = lines
+        self.journal_records = lines
+        self.journal_bytes = good_bytes
+
+    # -----------------------------
+    # APPEND / COMPACT
+    # -----------------------------
+    def _open_journal(self):
+        """Append handle for this generation, starting a fresh journal if the file is stale"""
+        current = False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                header = self.decode_line(f.readline())
+            current = isinstance(header, list) and header[:1] == [self.HEADER] and header[1] == self.generation
+        if not current:
+            self._write_atomic(self.journal_path, [self.encode_line([self.HEADER, self.generation])])
+            self.journal_records = 0
+            self.journal_bytes = 0
+        self._journal = open(self.journal_path, 'ab')
+
+    def _append_entries(self, entries: List[list]) -> bytes:
+        data = b"".join(self.encode_line(entry) for entry in entries)
+        self._append(data)
+        return data
+
+    def _append(self, data: bytes):
+        if self._journal is None:
+            self._open_journal()
+        self._journal.write(data)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    @staticmethod
+    def _write_atomic(path: str, chunks: List[bytes]):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    async def write(self, sections: Dict[str, Dict], dirty: Set[Tuple[str, str, Optional[str]]]):
+        self.cache.invalidate(dirty)
+        # Freeze on the loop so the values are the ones current at this flush; encode in the thread
+        entries = [[section, server_key, user_key, freeze(_record_value(sections, section, server_key, user_key))]
+                   for section, server_key, user_key in dirty]
+        data = await asyncio.to_thread(self._append_entries, entries)
+        self.stats['appends'] += len(dirty)
+        self.journal_records += len(dirty)
+        self.journal_bytes += len(data)
+        if self.journal_records >= self.compact_records or self.journal_bytes >= self.compact_bytes:
+            await self.compact(sections)
+
+    async def compact(self, sections: Dict[str, Dict]):
+        """Fold the journal into a new snapshot and start the next journal generation"""
+        await asyncio.to_thread(self._swap_snapshot, self.cache.capture(sections), self.generation + 1)
+        self.stats['compactions'] += 1
+
+    def _swap_snapshot(self, layout, generation: int):
+        body = self.cache.render(layout)
+        crc = 0
+        for chunk in body:
+            crc = zlib.crc32(chunk, crc)
+        header = json.dumps({
+            'format': self.SNAPSHOT_FORMAT, 'version': 1, 'generation': generation,
+            'bytes': sum(len(chunk) for chunk in body), 'crc32': crc
+        }).encode() + b"\n"
+        # A crash between these steps is safe: the old journal's generation no longer matches
+        self._write_atomic(self.snapshot_path, [header] + body)
+        self.generation = generation
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._open_journal()
+
+    async def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class ShardedJsonBackend:
+    """One JSON file per guild and section: bot_data.guilds/<guild>/<section>.json.
+
+    Flushes rewrite only the (guild, section) files that changed, so their
+    cost follows the size of the active guild rather than the deployment.
+    Loading reads the guild directories concurrently in worker threads.
+    """
+    name = "sharded"
+
+    def __init__(self, directory: str, legacy_json: Optional[str] = None, max_concurrency: int = 32):
+        self.directory = directory
+        self.legacy_json = legacy_json
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats = {'files_written': 0, 'files_removed': 0, 'bytes_written': 0, 'guilds_loaded': 0}
+
+    def guild_path(self, server_key: str) -> str:
+        return os.path.join(self.directory, server_key)
+
+    def file_path(self, server_key: str, section: str) -> str:
+        return os.path.join(self.directory, server_key, f"{section}.json")
+
+    # -----------------------------
+    # LOAD
+    # -----------------------------
+    def guild_keys(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory) if os.path.isdir(self.guild_path(name))]
+
+    def read_guild(self, server_key: str) -> Dict[str, object]:
+        """{section: value} for one guild (blocking)"""
+        result = {}
+        for section in SECTIONS:
+            path = self.file_path(server_key, section)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                content = f.read()
+            try:
+                result[section] = json.loads(content)
+            except ValueError:
+                logger.error(f"❌ {path} is damaged; kept as {quarantine(path)}")
+        return result
+
+    async def _load_guild(self, server_key: str, sections: Dict[str, Dict]):
+        async with self._semaphore:
+            guild = await asyncio.to_thread(self.read_guild, server_key)
+        # Filed here rather than returned: gather() results outlive the load and would pin every raw guild
+        for section, value in guild.items():
+            sections[section][server_key] = value
+
+    async def prepare(self):
+        """Split bot_data.json into guild folders if that has not happened yet (lazy loading reads nothing else)"""
+        if not os.path.isdir(self.directory) and self.legacy_json and os.path.exists(self.legacy_json):
+            await self.migrate_from_json(self.legacy_json)
+
+    async def load(self) -> Optional[Dict[str, Dict]]:
+        if not os.path.isdir(self.directory):
+            if self.legacy_json and os.path.exists(self.legacy_json):
+                return await self.migrate_from_json(self.legacy_json)
+            return None
+        sections = {section: {} for section in SECTIONS}
+        guild_keys = self.guild_keys()
+        await asyncio.gather(*(self._load_guild(key, sections) for key in guild_keys))
+        self.stats['guilds_loaded'] = len(guild_keys)
+        return sections
+
+    def read(self) -> Optional[Dict[str, Dict]]:
+        """Everything, synchronously (launcher.py partition)"""
+        if not os.path.isdir(self.directory):
+            if self.legacy_json and os.path.exists(self.legacy_json):
+                with open(self.legacy_json, 'r') as f:
+                    return json.load(f)
+            return None
+        sections = {section: {} for section in SECTIONS}
+        for server_key in self.guild_keys():
+            for section, value in self.read_guild(server_key).items():
+                sections[section][server_key] = value
+        return sections
+
+    async def migrate_from_json(self, json_path: str) -> Dict[str, Dict]:
+        async with aiofiles.open(json_path, 'r') as f:
+            content = await f.read()
+        try:
+            data = json.loads(content)
+        except ValueError:
+            logger.error(f"❌ {json_path} is damaged; kept as {quarantine(json_path)}")
+            raise
+        dirty = {(section, server_key, None) for section, servers in data.items() if section in SECTIONS for server_key in servers}
+        await self.write(data, dirty)
+        logger.info(f"📦 Split {json_path} into {len({key for _, key, _ in dirty})} guild folders in {self.directory}")
+        return data
+
+    # -----------------------------
+    # WRITE
+    # -----------------------------
+    def _write_files(self, files: List[Tuple[str, Optional[bytes]]]):
+        for path, payload in files:
+            if payload is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                    self.stats['files_removed'] += 1
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            self.stats['files_written'] += 1
+            self.stats['bytes_written'] += len(payload)
+
+    async def write(self, sections: Dict[str, Dict], dirty: Set[Tuple[str, str, Optional[str]]]):
+        # A changed record rewrites its guild's file for that section, nothing else
+        touched = {(section, server_key) for section, server_key, _ in dirty}
+        # Frozen on the loop, serialized with the file writes in the thread
+        files = []
+        for section, server_key in touched:
+            value = sections[section].get(server_key)
+            files.append((self.file_path(server_key, section), None if value is None else freeze(value)))
+        await asyncio.to_thread(self._encode_files, files)
+
+    def _encode_files(self, files: List[Tuple[str, object]]):
+        self._write_files([
+            (path, None if value is None else json.dumps(value, separators=(',', ':')).encode())
+            for path, value in files
+        ])
+
+    async def close(self):
+        pass
+
+
+class SnapshotBackend:
+    """bot_data.snap: compact, optionally compressed, one frame per section.
+
+    The file is a JSON header line, then for every section a frame line
+    "<section> <length> <crc32>" followed by that many bytes: the section's
+    JSON (written by orjson when installed), gzip- or zstd-compressed if
+    configured. Records are stored as to_row() lists - slot values with
+    timestamps as ints, field names once in the header - so neither saving
+    nor loading converts timestamps to and from ISO strings.
+
+    Loading reads, checks and hydrates one frame at a time in a worker
+    thread, so neither the whole file nor the whole decoded document is held
+    at once. Writes go through SnapshotCache, like JsonBackend.
+    """
+    name = "snapshot"
+    FORMAT = "merlin-snap"
+    CODECS = ("orjson", "json")
+    COMPRESSIONS = (None, "gzip", "zstd")
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None, codec: str = "orjson",
+                 compression: Optional[str] = None, level: Optional[int] = None):
+        if codec not in self.CODECS:
+            logger.warning(f"⚠️ Unknown snapshot codec '{codec}', using json")
+            codec = "json"
+        if codec == "orjson" and orjson is None:
+            logger.warning("⚠️ orjson is not installed; writing snapshots with the json module")
+            codec = "json"
+        if compression not in self.COMPRESSIONS:
+            logger.warning(f"⚠️ Unknown snapshot compression '{compression}', writing uncompressed")
+            compression = None
+        if compression == "zstd" and zstandard is None:
+            logger.warning("⚠️ zstandard is not installed; compressing snapshots with gzip")
+            compression = "gzip"
+        self.path = path
+        self.legacy_json = legacy_json
+        self.codec = codec
+        self.compression = compression
+        self.level = level
+        self.cache = SnapshotCache(indent=None, dumps=_orjson_dumps if codec == "orjson" else None,
+                                   freezer=freeze_rows)
+        self.stats = {'last_load_ms': 0.0, 'last_write_bytes': 0}
+
+    # -----------------------------
+    # FRAMES
+    # -----------------------------
+    def _compress(self, chunks: List[bytes]) -> List[bytes]:
+        if self.compression is None:
+            return chunks
+        if self.compression == "zstd":
+            compressor = zstandard.ZstdCompressor(level=self.level or 3).compressobj()
+        else:
+            compressor = zlib.compressobj(self.level or 6, zlib.DEFLATED, 31)  # 31: gzip container
+        return [compressor.compress(chunk) for chunk in chunks] + [compressor.flush()]
+
+    @staticmethod
+    def _decompress(payload: bytes, compression: Optional[str]) -> bytes:
+        if compression is None:
+            return payload
+        if compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read this zstd-compressed snapshot")
+            return zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+        return zlib.decompress(payload, 31)
+
+    @staticmethod
+    def _decode(payload: bytes):
+        return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+    def _read_header(self, f) -> Dict:
+        header = json.loads(f.readline())
+        if header.get('format') != self.FORMAT:
+            raise ValueError(f"not a {self.FORMAT} file")
+        return header
+
+    def _header(self) -> bytes:
+        return json.dumps({
+            'format': self.FORMAT, 'version': 1, 'codec': self.codec, 'compression': self.compression,
+            'fields': {section: list(record_type.FIELDS) for section, (record_type, _) in SECTION_RECORDS.items()}
+        }).encode() + b"\n"
+
+    def _read_frame(self, f, compression: Optional[str]) -> Optional[Tuple[str, Dict]]:
+        """(section, plain data) of the next frame, or None at the end of the file"""
+        line = f.readline()
+        if not line:
+            return None
+        section, length, checksum = line.split()
+        payload = f.read(int(length))
+        if len(payload) != int(length) or zlib.crc32(payload) != int(checksum, 16):
+            raise ValueError(f"section {section.decode()} is damaged")
+        return section.decode(), self._decode(self._decompress(payload, compression))
+
+    # -----------------------------
+    # LOAD
+    # -----------------------------
+    def read(self) -> Optional[Dict[str, Dict]]:
+        """Every section in the bot_data.json layout (for the launcher; the bot streams with load_sections)"""
+        if not os.path.exists(self.path):
+            if self.legacy_json and os.path.exists(self.legacy_json):
+                with open(self.legacy_json, 'r') as f:
+                    return json.load(f)
+            return None
+        sections = {}
+        with open(self.path, 'rb') as f:
+            header = self._read_header(f)
+            while (frame := self._read_frame(f, header.get('compression'))) is not None:
+                section, servers = frame
+                sections[section] = freeze(from_row_section(section, servers, header['fields'].get(section)))
+        return sections
+
+    async def load(self) -> Optional[Dict[str, Dict]]:
+        return await asyncio.to_thread(self.read)
+
+    def _hydrate_frame(self, f, header: Dict):
+        frame = self._read_frame(f, header.get('compression'))
+        if frame is None:
+            return None
+        section, servers = frame
+        # The decoded rows are exactly what the next write would produce for these guilds
+        self.cache.seed({section: servers})
+        return section, from_row_section(section, servers, header['fields'].get(section))
+
+    async def load_sections(self):
+        """Yield (section, hydrated data) one section at a time; reading and hydrating happen in a thread"""
+        started = time.perf_counter()
+        self.cache.clear()
+        if not os.path.exists(self.path):
+            if self.legacy_json and os.path.exists(self.legacy_json):
+                async for item in self._migrate_from_json():
+                    yield item
+            return
+        f = await asyncio.to_thread(open, self.path, 'rb')
+        try:
+            try:
+                header = await asyncio.to_thread(self._read_header, f)
+                while (item := await asyncio.to_thread(self._hydrate_frame, f, header)) is not None:
+                    yield item
+            except (ValueError, zlib.error):
+                f.close()
+                # Keep the damaged file for recovery instead of overwriting it on the next flush
+                logger.error(f"❌ {self.path} is damaged; kept as {quarantine(self.path)}")
+                raise
+        finally:
+            f.close()
+        self.stats['last_load_ms'] = (time.perf_counter() - started) * 1000
+
+    async def _migrate_from_json(self):
+        def migrate():
+            with open(self.legacy_json, 'r') as f:
+                sections = {section: from_json_section(section, servers) for section, servers in json.load(f).items()}
+            # Written before the loop sees the records, so capturing them in this thread is safe
+            self._write_file(self.cache.capture(sections))
+            return sections
+
+        sections = await asyncio.to_thread(migrate)
+        logger.info(f"📦 Migrated {self.legacy_json} into {self.path}")
+        for item in sections.items():
+            yield item
+
+    # -----------------------------
+    # WRITE
+    # -----------------------------
+    def _write_file(self, layout):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = self._header()
+        written = len(header)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            for section, chunks in self.cache.render_sections(layout):
+                payload = self._compress(chunks)
+                crc = 0
+                for chunk in payload:
+                    crc = zlib.crc32(chunk, crc)
+                length = sum(len(chunk) for chunk in payload)
+                f.write(b"%s %d %08x\n" % (section.encode(), length, crc))
+                f.writelines(payload)
+                written += length
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.stats['last_write_bytes'] = written
+
+    async def write(self, sections: Dict[str, Dict], dirty: Set[Tuple[str, str, Optional[str]]]):
+        self.cache.invalidate(dirty)
+        await asyncio.to_thread(self._write_file, self.cache.capture(sections))
+
+    async def close(self):
+        pass
+
+
+def create_backend(settings: Optional[Dict] = None):
+    settings = settings if settings is not None else Config.STORAGE_SETTINGS
+    backend = settings.get('backend', 'json')
+    # Under launcher.py each cluster keeps only its own guilds, in its own files
+    if backend == 'sqlite':
+        return SQLiteBackend(partition_path(settings.get('sqlite_file', 'bot_data.db')),
+                             legacy_json=partition_path(Config.DATA_FILE))
+    if backend == 'sharded':
+        root, _ = os.path.splitext(Config.DATA_FILE)
+        directory = settings.get('sharded_dir') or f"{root}.guilds"
+        return ShardedJsonBackend(partition_path(directory), legacy_json=partition_path(Config.DATA_FILE))
+    if backend == 'snapshot':
+        root, _ = os.path.splitext(Config.DATA_FILE)
+        return SnapshotBackend(partition_path(f"{root}.snap"), legacy_json=partition_path(Config.DATA_FILE),
+                               codec=settings.get('snapshot_codec', 'orjson'),
+                               compression=settings.get('snapshot_compression'),
+                               level=settings.get('snapshot_compression_level'))
+    if backend == 'journal':
+        return JournalBackend(partition_path(Config.DATA_FILE), legacy_json=partition_path(Config.DATA_FILE),
+                              compact_records=settings.get('compact_every_records', 10000),
+                              compact_bytes=settings.get('compact_max_bytes', 16 * 1024 * 1024))
+    if backend != 'json':
+        logger.warning(f"⚠️ Unknown storage backend '{backend}', falling back to json")
+    return JsonBackend(partition_path(Config.DATA_FILE))
+
 class DataStorage:
     _instance = None
     _lock = asyncio.Lock()
@@ -67,96 +891,112 @@ class DataStorage:
             self.user_profiles: Dict[str, Dict] = {}
             self.achievements: Dict[str, Dict] = {}
             self.backgrounds: Dict[str, Dict] = {}
+            # Profiles, marriages, children, warnings, achievements and banners
+            # are records.py slotted records; keys are interned ID strings
+
+            self.backend = create_backend()
+
+            # Lazy guild hydration (see ensure_guild / evict_guilds)
+            settings = Config.STORAGE_SETTINGS
+            self.lazy = bool(settings.get('lazy_guilds', False)) and hasattr(self.backend, 'read_guild')
+            self.resident: OrderedDict = OrderedDict()  # server_key -> last use (monotonic), least recent first
+            self._guild_sizes: Dict[str, int] = {}
+            self._budget_records = settings.get('guild_memory_budget_mb', 256) * 2 ** 20 / settings.get('guild_record_bytes', 400)
+            self._hydrating: Dict[str, asyncio.Future] = {}
+            self._evict_wakeup = asyncio.Event()
+            self._evictor: Optional[asyncio.Task] = None
+            self._closing = False
+            self.guild_stats = {'hits': 0, 'misses': 0, 'sync_misses': 0, 'evictions': 0, 'write_backs': 0}
+
+            # Write coalescing (see _mark_dirty / flush)
+            self._dirty: Set[Tuple[str, str, Optional[str]]] = set()
+            self._dirty_since: Optional[float] = None
+            self._last_mutation: float = 0.0
+            self._flusher: Optional[asyncio.Task] = None
+            self._writing: List[Set[Tuple[str, str, Optional[str]]]] = []  # dirty sets being written right now
+            self.flush_stats = {
+                'mutations': 0,
+                'writes': 0,
+                'failed_writes': 0,
+                'last_flush_records': 0,
+                'last_flush_ms': 0.0
+            }
 
             self.initialized = True
 
     # -----------------------------
     # PROFILE METHODS
     # -----------------------------
-    def get_user_profile(self, user_id: int, server_id: int) -> Dict:
-        server_key = str(server_id)
-        user_key = str(user_id)
+    def get_user_profile(self, user_id: int, server_id: int) -> Profile:
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.user_profiles:
             self.user_profiles[server_key] = {}
         if user_key not in self.user_profiles[server_key]:
-            self.user_profiles[server_key][user_key] = {
-                'bio': 'No bio set yet...',
-                'title': 'Newcomer',
-                'color': None,
-                'banner': 'assassin',
-                'badges': [],
-                'profile_views': 0,
-                'created_at': datetime.now().isoformat(),
-                'last_updated': datetime.now().isoformat()
-            }
+            self.user_profiles[server_key][user_key] = Profile()
         return self.user_profiles[server_key][user_key]
 
     def update_user_profile(self, user_id: int, server_id: int, updates: Dict):
         profile = self.get_user_profile(user_id, server_id)
         profile.update(updates)
-        profile['last_updated'] = datetime.now().isoformat()
-        asyncio.create_task(self.save_data_async())
+        profile.last_updated = now_timestamp()
+        self._mark_dirty('user_profiles', intern_id(server_id), intern_id(user_id))
 
     def increment_profile_views(self, user_id: int, server_id: int):
         profile = self.get_user_profile(user_id, server_id)
-        profile['profile_views'] = profile.get('profile_views', 0) + 1
-        asyncio.create_task(self.save_data_async())
+        profile.profile_views += 1
+        self._mark_dirty('user_profiles', intern_id(server_id), intern_id(user_id))
 
     # -----------------------------
     # ACHIEVEMENT METHODS
     # -----------------------------
     def add_achievement(self, user_id: int, server_id: int, achievement_id: str, achievement_data: Dict):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.achievements:
             self.achievements[server_key] = {}
         if user_key not in self.achievements[server_key]:
             self.achievements[server_key][user_key] = []
         existing_ids = [a.get('id') for a in self.achievements[server_key][user_key]]
         if achievement_id not in existing_ids:
-            achievement = {
+            achievement = Achievement.from_dict({
                 'id': achievement_id,
                 'name': achievement_data.get('name', 'Unknown'),
                 'description': achievement_data.get('description', ''),
                 'icon': achievement_data.get('icon', '🏆'),
-                'unlocked_at': datetime.now().isoformat(),
                 'rarity': achievement_data.get('rarity', 'common')
-            }
+            })
             self.achievements[server_key][user_key].append(achievement)
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('achievements', server_key, user_key)
             return True
         return False
 
     def get_achievements(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.achievements.get(server_key, {}).get(user_key, [])
 
     # -----------------------------
     # BANNER METHODS
     # -----------------------------
     def unlock_banner(self, user_id: int, server_id: int, banner_id: str, banner_name: str):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.backgrounds:
             self.backgrounds[server_key] = {}
         if user_key not in self.backgrounds[server_key]:
             self.backgrounds[server_key][user_key] = []
         existing_ids = [bg.get('id') for bg in self.backgrounds[server_key][user_key]]
         if banner_id not in existing_ids:
-            banner_data = {
-                'id': banner_id,
-                'name': banner_name,
-                'unlocked_at': datetime.now().isoformat()
-            }
+            banner_data = Banner.from_dict({'id': banner_id, 'name': banner_name})
             self.backgrounds[server_key][user_key].append(banner_data)
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('backgrounds', server_key, user_key)
             return True
         return False
 
     def get_banners(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.backgrounds.get(server_key, {}).get(user_key, [])
 
     def has_banner(self, user_id: int, server_id: int, banner_id: str) -> bool:
@@ -167,45 +1007,39 @@ class DataStorage:
     def update_user_banner(self, user_id: int, server_id: int, banner_id: str):
         profile = self.get_user_profile(user_id, server_id)
         profile['banner'] = banner_id
-        asyncio.create_task(self.save_data_async())
+        self._mark_dirty('user_profiles', intern_id(server_id), intern_id(user_id))
 
     # -----------------------------
     # MARRIAGE METHODS
     # -----------------------------
     def get_marriage(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.marriages.get(server_key, {}).get(user_key)
 
     def is_married(self, user_id: int, server_id: int) -> bool:
         return self.get_marriage(user_id, server_id) is not None
 
     def add_marriage(self, user1_id: int, user2_id: int, server_id: int):
-        server_key = str(server_id)
+        server_key = self._guild(server_id)
         if server_key not in self.marriages:
             self.marriages[server_key] = {}
-        timestamp = datetime.now().isoformat()
-        self.marriages[server_key][str(user1_id)] = {
-            'partner': user2_id,
-            'married_at': timestamp,
-            'partner_name': f"User_{user2_id}"
-        }
-        self.marriages[server_key][str(user2_id)] = {
-            'partner': user1_id,
-            'married_at': timestamp,
-            'partner_name': f"User_{user1_id}"
-        }
-        asyncio.create_task(self.save_data_async())
+        timestamp = now_timestamp()
+        self.marriages[server_key][intern_id(user1_id)] = Marriage(user2_id, timestamp, f"User_{user2_id}")
+        self.marriages[server_key][intern_id(user2_id)] = Marriage(user1_id, timestamp, f"User_{user1_id}")
+        self._mark_dirty('marriages', server_key, intern_id(user1_id))
+        self._mark_dirty('marriages', server_key, intern_id(user2_id))
 
     def remove_marriage(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key in self.marriages and user_key in self.marriages[server_key]:
             partner_id = self.marriages[server_key][user_key]['partner']
             del self.marriages[server_key][user_key]
             if str(partner_id) in self.marriages[server_key]:
                 del self.marriages[server_key][str(partner_id)]
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('marriages', server_key, user_key)
+            self._mark_dirty('marriages', server_key, str(partner_id))
             return partner_id
         return None
 
@@ -213,24 +1047,19 @@ class DataStorage:
     # CHILDREN METHODS
     # -----------------------------
     def add_child(self, parent_id: int, child_name: str, server_id: int):
-        server_key = str(server_id)
-        parent_key = str(parent_id)
+        server_key = self._guild(server_id)
+        parent_key = intern_id(parent_id)
         if server_key not in self.children:
             self.children[server_key] = {}
         if parent_key not in self.children[server_key]:
             self.children[server_key][parent_key] = []
-        child_data = {
-            'name': child_name,
-            'adopted_at': datetime.now().isoformat(),
-            'level': 1,
-            'happiness': 100
-        }
+        child_data = Child(child_name)
         self.children[server_key][parent_key].append(child_data)
-        asyncio.create_task(self.save_data_async())
+        self._mark_dirty('children', server_key, parent_key)
 
     def get_children(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.children.get(server_key, {}).get(user_key, [])
 
     def get_children_count(self, user_id: int, server_id: int) -> int:
@@ -240,27 +1069,27 @@ class DataStorage:
     # FRIEND METHODS
     # -----------------------------
     def add_friend(self, user_id: int, friend_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.friends:
             self.friends[server_key] = {}
         if user_key not in self.friends[server_key]:
             self.friends[server_key][user_key] = []
         if friend_id not in self.friends[server_key][user_key]:
             self.friends[server_key][user_key].append(friend_id)
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('friends', server_key, user_key)
 
     def remove_friend(self, user_id: int, friend_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key in self.friends and user_key in self.friends[server_key]:
             if friend_id in self.friends[server_key][user_key]:
                 self.friends[server_key][user_key].remove(friend_id)
-                asyncio.create_task(self.save_data_async())
+                self._mark_dirty('friends', server_key, user_key)
 
     def get_friends(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.friends.get(server_key, {}).get(user_key, [])
 
     def get_friends_count(self, user_id: int, server_id: int) -> int:
@@ -270,95 +1099,92 @@ class DataStorage:
     # REPUTATION METHODS
     # -----------------------------
     def add_reputation(self, user_id: int, server_id: int, points: int = 1):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.reputation:
             self.reputation[server_key] = {}
         if user_key not in self.reputation[server_key]:
             self.reputation[server_key][user_key] = 0
         self.reputation[server_key][user_key] += points
-        asyncio.create_task(self.save_data_async())
+        self._mark_dirty('reputation', server_key, user_key)
         return self.reputation[server_key][user_key]
 
     def get_reputation(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.reputation.get(server_key, {}).get(user_key, 0)
 
     # -----------------------------
     # GIFT METHODS
     # -----------------------------
     def add_gift(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.gifts:
             self.gifts[server_key] = {}
         if user_key not in self.gifts[server_key]:
             self.gifts[server_key][user_key] = 0
         self.gifts[server_key][user_key] += 1
-        asyncio.create_task(self.save_data_async())
+        self._mark_dirty('gifts', server_key, user_key)
         return self.gifts[server_key][user_key]
 
     def get_gifts(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.gifts.get(server_key, {}).get(user_key, 0)
 
     # -----------------------------
     # AUTO-REPLY MUTE METHODS
     # -----------------------------
     def mute_auto_reply(self, user_id: int, server_id: int):
-        server_key = str(server_id)
+        server_key = self._guild(server_id)
         if server_key not in self.auto_reply_mutes:
             self.auto_reply_mutes[server_key] = []
         if user_id not in self.auto_reply_mutes[server_key]:
             self.auto_reply_mutes[server_key].append(user_id)
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('auto_reply_mutes', server_key)
 
     def unmute_auto_reply(self, user_id: int, server_id: int):
-        server_key = str(server_id)
+        server_key = self._guild(server_id)
         if server_key in self.auto_reply_mutes and user_id in self.auto_reply_mutes[server_key]:
             self.auto_reply_mutes[server_key].remove(user_id)
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('auto_reply_mutes', server_key)
 
     def is_auto_reply_muted(self, user_id: int, server_id: int) -> bool:
-        server_key = str(server_id)
+        server_key = self._guild(server_id)
         return server_key in self.auto_reply_mutes and user_id in self.auto_reply_mutes[server_key]
 
     # -----------------------------
     # WARNING METHODS
     # -----------------------------
     def add_warning(self, user_id: int, server_id: int, reason: str):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.warnings:
             self.warnings[server_key] = {}
         if user_key not in self.warnings[server_key]:
             self.warnings[server_key][user_key] = []
-        self.warnings[server_key][user_key].append({
-            'reason': reason,
-            'timestamp': datetime.now().isoformat()
-        })
-        asyncio.create_task(self.save_data_async())
+        self.warnings[server_key][user_key].append(WarningEntry(reason))
+        self._mark_dirty('warnings', server_key, user_key)
 
     def get_warnings(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return self.warnings.get(server_key, {}).get(user_key, [])
 
     def clear_warnings(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key in self.warnings and user_key in self.warnings[server_key]:
             del self.warnings[server_key][user_key]
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('warnings', server_key, user_key)
 
     # -----------------------------
     # MUTE USER METHODS
     # -----------------------------
     def add_muted_user(self, user_id: int, server_id: int, duration: int = None):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key not in self.muted_users:
             self.muted_users[server_key] = {}
         self.muted_users[server_key][user_key] = {
@@ -366,90 +1192,376 @@ class DataStorage:
             'duration': duration,
             'unmute_at': (datetime.now().timestamp() + duration) if duration else None
         }
-        asyncio.create_task(self.save_data_async())
+        self._mark_dirty('muted_users', server_key, user_key)
 
     def remove_muted_user(self, user_id: int, server_id: int):
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         if server_key in self.muted_users and user_key in self.muted_users[server_key]:
             del self.muted_users[server_key][user_key]
-            asyncio.create_task(self.save_data_async())
+            self._mark_dirty('muted_users', server_key, user_key)
 
     def is_user_muted(self, user_id: int, server_id: int) -> bool:
-        server_key = str(server_id)
-        user_key = str(user_id)
+        server_key = self._guild(server_id)
+        user_key = intern_id(user_id)
         return server_key in self.muted_users and user_key in self.muted_users[server_key]
 
     def get_muted_users(self, server_id: int) -> Dict:
-        server_key = str(server_id)
+        server_key = self._guild(server_id)
         return self.muted_users.get(server_key, {})
 
+    # -----------------------------
+    # LAZY GUILD HYDRATION
+    # -----------------------------
+    # With lazy_guilds (sharded backend only) a guild's records are read from
+    # its folder the first time the guild is used, and dropped again once it
+    # has been idle for guild_idle_seconds or, least recently used first, when
+    # the resident guilds pass guild_memory_budget_mb. The budget is an
+    # estimate: stored records times guild_record_bytes. Dirty records are
+    # written back before their guild is dropped.
+    def _guild(self, server_id) -> str:
+        """Interned key of a guild whose data is in memory (read synchronously if it was not)"""
+        server_key = intern_id(server_id)
+        if self.lazy:
+            if server_key in self.resident:
+                self.resident[server_key] = time.monotonic()
+                self.resident.move_to_end(server_key)
+            else:
+                # Reached without ensure_guild first; event handlers that write storage await it,
+                # so this is a corner case (e.g. an admin tool calling in directly)
+                self.guild_stats['sync_misses'] += 1
+                self._install_guild(server_key, self._read_guild(server_key))
+        return server_key
+
+    def _read_guild(self, server_key: str) -> Dict[str, object]:
+        """{section: hydrated value} of one guild (blocking)"""
+        return {
+            section: from_json_section(section, {server_key: value})[server_key]
+            for section, value in self.backend.read_guild(server_key).items() if section in SECTIONS
+        }
+
+    def _guild_records(self, server_key: str) -> int:
+        return sum(len(getattr(self, section).get(server_key) or ()) for section in SECTIONS)
+
+    def _install_guild(self, server_key: str, guild: Dict[str, object]):
+        for section, value in guild.items():
+            getattr(self, section)[server_key] = value
+        self.resident[server_key] = time.monotonic()
+        self._guild_sizes[server_key] = self._guild_records(server_key)
+        if sum(self._guild_sizes.values()) > self._budget_records:
+            self._evict_wakeup.set()
+
+    async def _hydrate(self, server_key: str):
+        try:
+            guild = await asyncio.to_thread(self._read_guild, server_key)
+        finally:
+            self._hydrating.pop(server_key, None)
+        # A synchronous access may have loaded (and changed) it while the thread was reading
+        if server_key not in self.resident:
+            self._install_guild(server_key, guild)
+
+    async def ensure_guild(self, server_id):
+        """Bring a guild's data into memory without blocking the loop (called before a message is handled)"""
+        if not self.lazy:
+            return
+        server_key = intern_id(server_id)
+        if server_key in self.resident:
+            self.guild_stats['hits'] += 1
+            self.resident[server_key] = time.monotonic()
+            self.resident.move_to_end(server_key)
+            return
+        pending = self._hydrating.get(server_key)
+        if pending is None:
+            self.guild_stats['misses'] += 1
+            pending = self._hydrating[server_key] = asyncio.ensure_future(self._hydrate(server_key))
+        # Shielded: one cancelled message handler must not cancel the load for the others
+        await asyncio.shield(pending)
+
+    def _ensure_evictor(self):
+        if self._evictor is not None and not self._evictor.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._evictor = loop.create_task(self._evict_loop())
+
+    async def _evict_loop(self):
+        settings = Config.STORAGE_SETTINGS
+        interval = min(60, settings.get('guild_idle_seconds', 3600) / 4)
+        while True:
+            try:
+                await asyncio.wait_for(self._evict_wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._evict_wakeup.clear()
+            if self._closing:
+                return
+            try:
+                await self.evict_guilds()
+            except Exception as e:
+                logger.error(f"❌ Guild eviction failed: {e}")
+
+    async def evict_guilds(self) -> int:
+        """Drop idle guilds, then least recently used ones while over budget; returns how many were dropped"""
+        if not self.lazy or not self.resident:
+            return 0
+        # Recount, since guilds grow while they are resident
+        self._guild_sizes = {server_key: self._guild_records(server_key) for server_key in self.resident}
+        total = sum(self._guild_sizes.values())
+        idle_seconds = Config.STORAGE_SETTINGS.get('guild_idle_seconds', 3600)
+        now = time.monotonic()
+        victims = []
+        for server_key, last_used in self.resident.items():  # least recently used first
+            if total <= self._budget_records and now - last_used < idle_seconds:
+                break
+            victims.append(server_key)
+            total -= self._guild_sizes[server_key]
+        if not victims:
+            return 0
+
+        candidates = set(victims)
+        written_back = {server_key for _, server_key, _ in self._dirty if server_key in candidates}
+        if written_back:
+            await self.flush()
+        # Anything still unsaved (failed or in-flight writes) stays, as does anything used meanwhile
+        busy = {server_key for dirty in (self._dirty, *self._writing) for _, server_key, _ in dirty}
+        evicted = 0
+        for server_key in victims:
+            last_used = self.resident.get(server_key)
+            if last_used is None or last_used > now or server_key in busy:
+                continue
+            for section in SECTIONS:
+                getattr(self, section).pop(server_key, None)
+            del self.resident[server_key]
+            self._guild_sizes.pop(server_key, None)
+            evicted += 1
+            if server_key in written_back:
+                self.guild_stats['write_backs'] += 1
+        self.guild_stats['evictions'] += evicted
+        if evicted:
+            logger.debug("🧹 Evicted %d guild(s); %d resident", evicted, len(self.resident))
+        return evicted
+
+    def get_guild_stats(self) -> Dict:
+        stats = dict(self.guild_stats)
+        stats['resident'] = len(self.resident)
+        stats['resident_records'] = sum(self._guild_sizes.values())
+        return stats
+
+    # -----------------------------
+    # WRITE COALESCING
+    # -----------------------------
+    # Mutators only mark records dirty; a single background task writes them
+    # once the data has been quiet for flush_interval_seconds, and never later
+    # than max_flush_delay_seconds after the first unsaved change.
+    def _mark_dirty(self, section: str, server_key: str, user_key: Optional[str] = None):
+        now = time.monotonic()
+        self._dirty.add((section, server_key, user_key))
+        self.flush_stats['mutations'] += 1
+        if self._dirty_since is None:
+            self._dirty_since = now
+        self._last_mutation = now
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet (e.g. during import); the data goes out with the next flush/close
+            return
+        self._flusher = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        settings = Config.STORAGE_SETTINGS
+        interval = settings.get('flush_interval_seconds', 5)
+        max_delay = settings.get('max_flush_delay_seconds', 30)
+        while self._dirty_since is not None:
+            deadline = min(self._last_mutation + interval, self._dirty_since + max_delay)
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if not await self.flush():
+                # Back off instead of spinning on a broken disk
+                await asyncio.sleep(interval)
+
+    async def flush(self) -> bool:
+        """Write pending changes to disk. Returns False if the write failed."""
+        if self._dirty_since is None:
+            return True
+        dirty = self._dirty
+        self._dirty = set()
+        self._dirty_since = None
+        started = time.perf_counter()
+        self._writing.append(dirty)
+        write = asyncio.ensure_future(self._write_data(dirty))
+        cancelled = False
+        while not write.done():
+            try:
+                await asyncio.wait((write,))
+            except asyncio.CancelledError:
+                # The backend may already be writing in a thread (or between executemany and commit);
+                # see the write through so its records are either on disk or dirty again
+                cancelled = True
+        self._writing.remove(dirty)
+        error = write.exception()
+        if error is not None:
+            # Keep the records dirty so the next flush retries them
+            self._dirty |= dirty
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self.flush_stats['failed_writes'] += 1
+            logger.error(f"❌ Error saving data: {error}")
+            if cancelled:
+                raise asyncio.CancelledError
+            return False
+        elapsed = time.perf_counter() - started
+        STORAGE_WRITE_SECONDS.observe(elapsed, self.backend.name)
+        self.flush_stats['writes'] += 1
+        self.flush_stats['last_flush_records'] = len(dirty)
+        self.flush_stats['last_flush_ms'] = elapsed * 1000
+        logger.debug("💾 Bot data saved (%d records)", len(dirty))
+        if cancelled:
+            raise asyncio.CancelledError
+        return True
+
+    def get_flush_stats(self) -> Dict:
+        stats = dict(self.flush_stats)
+        stats['pending_records'] = len(self._dirty)
+        stats['writes_saved'] = max(0, stats['mutations'] - stats['writes'])
+        cache = getattr(self.backend, 'cache', None)
+        if cache is not None:
+            # Guilds a full snapshot could reuse vs had to copy on the loop
+            stats['snapshot_reused'] = cache.stats['reused']
+            stats['snapshot_frozen'] = cache.stats['frozen']
+        return stats
+
+    async def close(self):
+        """Stop the background flusher (and evictor) and write whatever is still pending.
+
+        A task cancelled in the middle of flush() finishes that write first, so
+        awaiting it leaves nothing half-written before the final flush.
+        """
+        if self._evictor is not None:
+            # Woken rather than cancelled: on 3.11, wait_for() can swallow a cancel that races the wakeup
+            self._closing = True
+            self._evict_wakeup.set()
+            await self._evictor
+            self._evictor = None
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        self._flusher = None
+        await self.flush()
+        await self.backend.close()
+        stats = self.get_flush_stats()
+        logger.info(f"💾 Storage closed: {stats['mutations']} changes in {stats['writes']} writes "
+                    f"({stats['writes_saved']} writes saved)")
+
     # -----------------------------
     # ASYNC LOAD/SAVE METHODS
     # -----------------------------
     async def load_data_async(self):
         async with self._lock:
-            if os.path.exists(Config.DATA_FILE):
-                try:
-                    async with aiofiles.open(Config.DATA_FILE, 'r') as f:
-                        content = await f.read()
-                        data = json.loads(content)
-                        # Load all data sections
-                        self.muted_users = data.get('muted_users', {})
-                        self.warnings = data.get('warnings', {})
-                        self.user_levels = data.get('user_levels', {})
-                        self.auto_reply_mutes = data.get('auto_reply_mutes', {})
-                        self.marriages = data.get('marriages', {})
-                        self.children = data.get('children', {})
-                        self.friends = data.get('friends', {})
-                        self.reputation = data.get('reputation', {})
-                        self.gifts = data.get('gifts', {})
-                        self.user_profiles = data.get('user_profiles', {})
-                        self.achievements = data.get('achievements', {})
-                        self.backgrounds = data.get('backgrounds', {})
-                    logger.info("✅ Bot data loaded successfully")
-                except Exception as e:
-                    logger.error(f"❌ Error loading data: {e}")
-                    self._reset_all_data()
-            else:
-                logger.info("📁 No existing data file, starting fresh")
+            try:
+                if self.lazy:
+                    # Only the first start reads everything (to split bot_data.json); guilds load on first use
+                    await self.backend.prepare()
+                    guilds = len(await asyncio.to_thread(self.backend.guild_keys))
+                    logger.info(f"✅ Bot data ready ({self.backend.name} backend, {guilds} guilds load on first use)")
+                    self._ensure_evictor()
+                    return
+                if hasattr(self.backend, 'load_sections'):
+                    # Streaming backends hand over one hydrated section at a time
+                    loaded = False
+                    async for section, servers in self.backend.load_sections():
+                        if section in SECTIONS:
+                            setattr(self, section, servers)
+                        loaded = True
+                    if not loaded:
+                        logger.info("📁 No existing data file, starting fresh")
+                        return
+                    logger.info(f"✅ Bot data loaded successfully ({self.backend.name} backend)")
+                    return
+                data = await self.backend.load()
+                if data is None:
+                    logger.info("📁 No existing data file, starting fresh")
+                    return
+                # Load all data sections
+                for section in SECTIONS:
+                    setattr(self, section, from_json_section(section, data.get(section, {})))
+                logger.info(f"✅ Bot data loaded successfully ({self.backend.name} backend)")
+            except Exception as e:
+                # Damaged files have been moved aside by the backend, so starting empty overwrites nothing
+                logger.error(f"❌ Error loading data, starting with empty data: {e}")
+                self._reset_all_data()
 
     async def save_data_async(self):
+        """Write everything to disk right now instead of waiting for the flush interval"""
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        await self.flush()
+
+    def _sections(self) -> Dict[str, Dict]:
+        return {section: getattr(self, section) for section in SECTIONS}
+
+    async def _write_data(self, dirty: Set[Tuple[str, str, Optional[str]]]):
         async with self._lock:
-            try:
-                data_file_dir = os.path.dirname(Config.DATA_FILE)
-                if data_file_dir:
-                    os.makedirs(data_file_dir, exist_ok=True)
-                data = {
-                    'muted_users': self.muted_users,
-                    'warnings': self.warnings,
-                    'user_levels': self.user_levels,
-                    'auto_reply_mutes': self.auto_reply_mutes,
-                    'marriages': self.marriages,
-                    'children': self.children,
-                    'friends': self.friends,
-                    'reputation': self.reputation,
-                    'gifts': self.gifts,
-                    'user_profiles': self.user_profiles,
-                    'achievements': self.achievements,
-                    'backgrounds': self.backgrounds,
-                }
-                async with aiofiles.open(Config.DATA_FILE, 'w') as f:
-                    await f.write(json.dumps(data, indent=2))
-                logger.info("💾 Bot data saved successfully")
-            except Exception as e:
-                logger.error(f"❌ Error saving data: {e}")
+            await self.backend.write(self._sections(), dirty)
 
     def _reset_all_data(self):
-        self.muted_users = {}
-        self.warnings = {}
-        self.user_levels = {}
-        self.auto_reply_mutes = {}
-        self.marriages = {}
-        self.children = {}
-        self.friends = {}
-        self.reputation = {}
-        self.gifts = {}
-        self.user_profiles = {}
-        self.achievements = {}
-        self.backgrounds = {}
+        for section in SECTIONS:
+            setattr(self, section, {})
+
+
+# -----------------------------
+# ONE-SHOT MIGRATION / EXPORT
+# -----------------------------
+async def migrate_json_to_sqlite(json_path: Optional[str] = None, sqlite_path: Optional[str] = None) -> int:
+    """Copy bot_data.json into the SQLite backend (python storage.py migrate)"""
+    backend = SQLiteBackend(sqlite_path or Config.STORAGE_SETTINGS.get('sqlite_file', 'bot_data.db'))
+    try:
+        return await backend.migrate_from_json(json_path or Config.DATA_FILE)
+    finally:
+        await backend.close()
+
+
+async def export_to_json(json_path: Optional[str] = None) -> int:
+    """Write everything in the configured backend to bot_data.json (python storage.py export).
+
+    The other backends import bot_data.json once and never update it, so
+    this is the way back to "backend": "json". Returns the number of guilds.
+    """
+    storage = DataStorage()
+    storage.lazy = False  # every guild, not only the ones touched
+    try:
+        await storage.load_data_async()
+    finally:
+        await storage.backend.close()
+    sections = storage._sections()
+    guilds = len({server_key for servers in sections.values() for server_key in servers})
+    if not guilds:
+        # Nothing loaded (or the load failed): never replace bot_data.json with an empty file
+        logger.warning(f"⚠️ No data in the {storage.backend.name} backend; bot_data.json left as it is")
+        return 0
+    await JsonBackend(json_path or Config.DATA_FILE).write(sections, set())
+    logger.info(f"✅ Exported {guilds} guilds from the {storage.backend.name} backend")
+    return guilds
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+    if sys.argv[1:2] == ["migrate"]:
+        asyncio.run(migrate_json_to_sqlite(*sys.argv[2:4]))
+    elif sys.argv[1:2] == ["export"]:
+        asyncio.run(export_to_json(*sys.argv[2:3]))
+    else:
+        print("Usage: python storage.py migrate [bot_data.json] [bot_data.db]\n"
+              "       python storage.py export [bot_data.json]")
@@ -0,0 +1,75 @@
+# trigger_matcher.py - Aho-Corasick matcher for auto-reply triggers
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional
+
+
+class TriggerMatcher:
+    """Finds every trigger contained in a message in one pass over the text.
+
+    Triggers are given in priority order (earlier wins). The automaton is
+    built once; call rebuild() only when the trigger list changes.
+    """
+
+    def __init__(self, triggers: Iterable[str] = ()):
+        self.hits: Counter = Counter()
+        self.rebuild(triggers)
+
+    def rebuild(self, triggers: Iterable[str]):
+        # Dedupe but keep the first (highest) priority of each trigger
+        self.triggers: List[str] = list(dict.fromkeys(t for t in triggers if t))
+        self.priority: Dict[str, int] = {t: i for i, t in enumerate(self.triggers)}
+
+        goto: List[Dict[str, int]] = [{}]
+        output: List[List[int]] = [[]]
+        for index, trigger in enumerate(self.triggers):
+            state = 0
+            for char in trigger:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(index)
+
+        # Breadth-first pass for failure links; outputs are merged along them
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fallback = goto[link].get(char, 0)
+                fail[next_state] = fallback if fallback != next_state else 0
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = [sorted(set(found)) for found in output]
+
+    def __len__(self):
+        return len(self.triggers)
+
+    def find_all(self, text: str) -> List[str]:
+        """Every trigger contained in text, highest priority first"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return [self.triggers[i] for i in sorted(found)]
+
+    def first_match(self, text: str) -> Optional[str]:
+        matches = self.find_all(text)
+        return matches[0] if matches else None
+
+    def record_hit(self, trigger: str):
+        self.hits[trigger] += 1
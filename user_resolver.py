@@ -0,0 +1,94 @@
+# user_resolver.py - Display names for embeds without one API call per user
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+class UserResolver:
+    """Turns user IDs into display names as cheaply as possible.
+
+    Order of lookup: the guild's member cache, the client's user cache, a
+    local TTL/LRU cache of names fetched earlier, and only then the API -
+    all remaining IDs are fetched concurrently, at most max_concurrency at
+    a time, so a leaderboard costs one round trip at worst.
+    """
+
+    def __init__(self, bot, ttl: float = 3600, max_entries: int = 10_000, max_concurrency: int = 5):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._names: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (name, expires_at)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats = {'member_hits': 0, 'cache_hits': 0, 'fetches': 0, 'failures': 0}
+
+    def _cached(self, user_id: int) -> Optional[str]:
+        entry = self._names.get(user_id)
+        if entry is None:
+            return None
+        name, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._names[user_id]
+            return None
+        self._names.move_to_end(user_id)
+        return name
+
+    def _remember(self, user_id: int, name: str):
+        self._names[user_id] = (name, time.monotonic() + self.ttl)
+        self._names.move_to_end(user_id)
+        while len(self._names) > self.max_entries:
+            self._names.popitem(last=False)
+
+    def _local(self, user_id: int, guild=None) -> Optional[str]:
+        member = guild.get_member(user_id) if guild else None
+        if member is not None:
+            self.stats['member_hits'] += 1
+            return member.display_name
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            self.stats['member_hits'] += 1
+            return user.display_name
+        name = self._cached(user_id)
+        if name is not None:
+            self.stats['cache_hits'] += 1
+        return name
+
+    async def _fetch(self, user_id: int) -> Optional[str]:
+        async with self._semaphore:
+            self.stats['fetches'] += 1
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except Exception:
+                self.stats['failures'] += 1
+                return None
+        self._remember(user_id, user.display_name)
+        return user.display_name
+
+    async def display_names(self, user_ids: Iterable, guild=None) -> Dict[int, Optional[str]]:
+        """{user_id: display name or None if the user can't be found}, in input order"""
+        names: Dict[int, Optional[str]] = {}
+        missing = []
+        for user_id in user_ids:
+            user_id = int(user_id)
+            if user_id in names:
+                continue
+            names[user_id] = self._local(user_id, guild)
+            if names[user_id] is None:
+                missing.append(user_id)
+
+        if missing:
+            fetched = await asyncio.gather(*(self._fetch(user_id) for user_id in missing))
+            names.update(zip(missing, fetched))
+        return names
+
+    async def display_name(self, user_id, guild=None) -> Optional[str]:
+        return (await self.display_names([user_id], guild))[int(user_id)]
+
+
+def get_resolver(bot) -> UserResolver:
+    """The bot-wide resolver (created on first use for bots that don't set one up)"""
+    resolver = getattr(bot, "user_resolver", None)
+    if resolver is None:
+        resolver = UserResolver(bot)
+        bot.user_resolver = resolver
+    return resolver
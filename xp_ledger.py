@@ -0,0 +1,183 @@
+# xp_ledger.py - The single source of truth for member XP
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from metrics import STORAGE_WRITE_SECONDS
+from sharding import partition_path
+from snapshots import SnapshotCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_FILE = "level_data.json"
+
+# listener(server_key, user_key, old_xp, new_xp, messages); old_xp is None for a new member
+XPListener = Callable[[str, str, Optional[int], int, int], None]
+
+
+class XPLedger:
+    """Every XP award (messages, !givexp, achievement rewards) goes through here.
+
+    Awards are plain in-memory increments. The guilds they touch are
+    remembered, and once per flush window all of them are written together
+    in one atomic file replace, instead of a write per award.
+    """
+
+    def __init__(self, data_file: Optional[str] = None, flush_interval: float = 30):
+        # Under launcher.py each cluster gets its own partition of the file
+        self.data_file = data_file or partition_path(DEFAULT_DATA_FILE)
+        self.flush_interval = flush_interval
+        # Guilds untouched since the last flush are written from their cached JSON
+        self.cache = SnapshotCache(indent=2, flat=True)
+        self.data: Dict[str, Dict[str, Dict]] = self.load()
+        self.listeners: List[XPListener] = []
+        self._dirty_guilds: Set[str] = set()
+        self._pending_awards = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # one write at a time: they share the temp file and the fragment cache
+        self.stats = {'awards': 0, 'flushes': 0, 'failed_flushes': 0, 'last_flush_guilds': 0, 'last_flush_awards': 0}
+
+    # -----------------------------
+    # LOAD / FLUSH
+    # -----------------------------
+    def load(self) -> Dict[str, Dict[str, Dict]]:
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, 'r') as f:
+                    data = json.load(f)
+                self.cache.seed(data)
+                return data
+            except Exception as e:
+                logger.error("❌ Error loading XP data: %s", e)
+        return {}
+
+    def start(self):
+        """Start the background flush task (safe to call more than once)"""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def snapshot(self):
+        """Copy of the guilds changed since the last flush (the rest reuse their JSON); taken on the loop"""
+        return self.cache.capture(self.data)
+
+    def write_file(self, snapshot):
+        """Write to a temp file and atomically swap it in, so a crash never leaves a half-written file"""
+        tmp_file = f"{self.data_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.writelines(self.cache.render(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.data_file)
+
+    async def flush(self) -> bool:
+        """Write every guild touched since the last flush in one go"""
+        async with self._lock:
+            if not self._dirty_guilds:
+                return True
+            # Copy on the loop so awards can keep landing while the executor writes
+            guilds, awards = self._dirty_guilds, self._pending_awards
+            self._dirty_guilds, self._pending_awards = set(), 0
+            self.cache.invalidate(guilds)
+            snapshot = self.snapshot()
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            write = loop.run_in_executor(None, self.write_file, snapshot)
+            cancelled = False
+            while not write.done():
+                try:
+                    await asyncio.wait((write,))
+                except asyncio.CancelledError:
+                    # The executor thread cannot be stopped; let it finish so the guilds are saved or dirty again
+                    cancelled = True
+            error = write.exception()
+            if error is not None:
+                self._dirty_guilds |= guilds
+                self._pending_awards += awards
+                self.stats['failed_flushes'] += 1
+                logger.error("❌ Error saving XP data: %s", error)
+            else:
+                STORAGE_WRITE_SECONDS.observe(time.perf_counter() - started, "xp")
+                self.stats['flushes'] += 1
+                self.stats['last_flush_guilds'] = len(guilds)
+                self.stats['last_flush_awards'] = awards
+        if cancelled:
+            raise asyncio.CancelledError
+        return error is None
+
+    async def close(self):
+        """Stop the flush task (after any write it has in progress) and write what is left"""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    # -----------------------------
+    # RECORDS / AWARDS
+    # -----------------------------
+    def _notify(self, server_key: str, user_key: str, old_xp: Optional[int], new_xp: int, messages: int):
+        for listener in self.listeners:
+            listener(server_key, user_key, old_xp, new_xp, messages)
+
+    def get_record(self, user_id, server_id) -> Dict:
+        """Get or create a member's XP record"""
+        server_key, user_key = str(server_id), str(user_id)
+        users = self.data.setdefault(server_key, {})
+        record = users.get(user_key)
+        if record is None:
+            record = users[user_key] = {
+                'xp': 0,
+                'messages': 0,
+                'last_message': None,
+                'level_up_notifications': True
+            }
+            self.mark_dirty(server_id)
+            self._notify(server_key, user_key, None, 0, 0)
+        return record
+
+    def award(self, user_id, server_id, amount: int, messages: int = 0) -> Tuple[int, int]:
+        """Add XP (and optionally message count); returns (old_xp, new_xp)"""
+        record = self.get_record(user_id, server_id)
+        old_xp = record['xp']
+        record['xp'] = old_xp + amount
+        record['messages'] += messages
+        self.stats['awards'] += 1
+        self._pending_awards += 1
+        self.mark_dirty(server_id)
+        self._notify(str(server_id), str(user_id), old_xp, record['xp'], messages)
+        return old_xp, record['xp']
+
+    def mark_dirty(self, server_id):
+        """Flag a guild for the next flush (for edits made directly on a record)"""
+        self._dirty_guilds.add(str(server_id))
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['pending_guilds'] = len(self._dirty_guilds)
+        stats['pending_awards'] = self._pending_awards
+        return stats
+
+
+def get_ledger(bot) -> XPLedger:
+    """The bot-wide ledger (created on first use for bots that don't set one up)"""
+    ledger = getattr(bot, "xp_ledger", None)
+    if ledger is None:
+        try:
+            import config
+            settings = getattr(config, "LEVEL_SETTINGS", {})
+        except ImportError:
+            settings = {}
+        ledger = XPLedger(flush_interval=settings.get("save_interval_seconds", 30))
+        bot.xp_ledger = ledger
+    return ledger